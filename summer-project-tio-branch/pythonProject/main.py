@@ -47,6 +47,24 @@ def main():
                        help='数据收集起始日期 (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, default=None,
                        help='数据收集结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='增量收集: 仅下载各端点水位线(最后record_date)之后的新数据')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='禁用 data/raw/.http_cache 响应缓存')
+    parser.add_argument('--stream', action='store_true',
+                       help='流式写盘: 每页直接写入Parquet存储 (长历史回填时内存有界)')
+    parser.add_argument('--full-fields', action='store_true',
+                       help='下载所有字段 (归档用); 默认只请求模型用到的字段')
+    parser.add_argument('--backfill', choices=['year', 'quarter'], default=None,
+                       help='历史回填: 按年/季度分片并行下载 (起始日期默认为DTS首日 2005-10-03)')
+    parser.add_argument('--if-changed', action='store_true',
+                       help='仅在有新数据时运行 (collect/all): 先探测各端点最新record_date, 与水位线相同则跳过收集、特征构建和重训练')
+    parser.add_argument('--resume', action='store_true',
+                       help='断点续传: 从 data/raw/.checkpoints 中记录的最后完成页继续中断的收集')
+    parser.add_argument('--rebuild', action='store_true',
+                       help='完整重建: 用本次窗口替换本地CSV/Parquet/仓库中的数据 (默认合并到已有历史)')
+    parser.add_argument('--refit', action='store_true',
+                       help='强制完整重训练ARIMA (默认仅将新交易日追加到 data/raw/.models 中保存的模型状态)')
     
     args = parser.parse_args()
     
@@ -101,6 +119,10 @@ def run_complete_analysis(args):
     """运行完整分析流程"""
     print("\n🚀 开始完整分析流程...")
     
+    if args.if_changed and not has_new_data(args):
+        print("\n⏭️  Treasury未发布新数据, 跳过收集、特征构建和重训练")
+        return None
+    
     # 1. 数据收集
     print("\n" + "="*50)
     print("步骤 1: 增强数据收集")
@@ -131,22 +153,44 @@ def run_complete_analysis(args):
     print("="*50)
     generate_final_report(data_summary, model_results, demo_results, xdate_results, args)
 
+def has_new_data(args):
+    """新鲜度探测: 每个端点只请求最新一条 record_date 并与本地水位线比较 (探测用的collector随即关闭)"""
+    print("🔎 新鲜度探测...")
+    with EnhancedTreasuryCollector(use_cache=False) as collector:
+        return collector.has_new_data()
+
 def run_data_collection(args):
     """运行数据收集"""
     
     print("📊 启动增强Treasury数据收集...")
     
-    collector = EnhancedTreasuryCollector()
-    
-    # 收集详细数据
-    all_data = collector.collect_all_enhanced_data(
-        start_date=args.start_date,
-        end_date=args.end_date
-    )
+    if args.mode == 'collect' and args.if_changed and not has_new_data(args):
+        print("\n⏭️  Treasury未发布新数据, 跳过收集")
+        return None
+    
+    with EnhancedTreasuryCollector(use_cache=not args.no_cache, stream_to_disk=args.stream,
+                                   full_fields=args.full_fields) as collector:
+        # 收集详细数据
+        all_data = collector.collect_all_enhanced_data(
+            start_date=args.start_date,
+            end_date=args.end_date,
+            incremental=args.incremental,
+            resume=args.resume,
+            backfill=args.backfill,
+            rebuild=args.rebuild
+        )
     
     summary = all_data['summary']
     print(f"\n✅ 数据收集完成:")
     print(f"   📁 收集的数据集: {len(summary['datasets_collected'])}")
+    print(f"   📥 本次下载行数: {sum(summary['rows_fetched'].values())}")
+    if summary['http_cache']:
+        print(f"   🗄️  缓存命中/未命中: {summary['http_cache']['hits']}/{summary['http_cache']['misses']}")
+    if summary['datasets_failed']:
+        print(f"   ⚠️  失败的数据集 (未保存): {', '.join(summary['datasets_failed'])}")
+    if summary['resumable']:
+        print(f"   ↩️  可断点续传 (--resume): {', '.join(summary['resumable'])}")
+    print(f"   🔁 HTTP重试/限流: {summary['http_client']['retries']}/{summary['http_client']['throttled']}")
     print(f"   💰 TGA余额记录: {summary['tga_balance_records']}")
     print(f"   🏷️  分类现金流: {len(summary['categorized_flows'])}")
     print(f"   📋 交易分类数: {summary['category_mapping_size']}")
@@ -169,7 +213,7 @@ def run_model_analysis(args):
     
     # 1. ARIMA模型
     print("\n📈 训练ARIMA模型...")
-    arima_model = forecaster.fit_arima_model()
+    arima_model = forecaster.fit_arima_model(force_refit=getattr(args, 'refit', False))
     models_results['arima'] = arima_model is not None
     
     # 2. 季节性模型 (核心改进)
@@ -321,6 +365,8 @@ def run_xdate_prediction(args):
             'error': str(e),
             'financial_status': getattr(predictor, 'current_debt', None)
         }
+    finally:
+        predictor.close()
 
 def run_system_tests():
     """运行系统测试"""
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Collector benchmark against the local replay server (no network)
+Reports pages/s, bytes/s, JSON parse time and peak RSS for collect_detailed_cash_flows
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from src.data.data_collector import EnhancedTreasuryCollector
+from src.data.replay_server import ReplayConfig, ReplayServer
+
+
+def _serve(config: ReplayConfig, conn):
+    """Run the replay server in a child process so its memory is not counted"""
+    server = ReplayServer(EnhancedTreasuryCollector.DETAILED_ENDPOINTS, config).start()
+    conn.send(server.base_url)
+    conn.recv()  # wait for the benchmark to finish
+    stats = dict(server.stats)
+    server.stop()
+    conn.send(stats)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark EnhancedTreasuryCollector against a replay server')
+    parser.add_argument('--data-dir', default=None, help='serve recorded <data_name>.csv files instead of synthetic data')
+    parser.add_argument('--days', type=int, default=500, help='synthetic business days per endpoint')
+    parser.add_argument('--rows-per-day', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05, help='server latency per request (s)')
+    parser.add_argument('--max-page-size', type=int, default=None)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rps', type=float, default=0.0, help='client request rate cap (0 = unlimited)')
+    parser.add_argument('--sequential', action='store_true', help='sequential pages and endpoints')
+    parser.add_argument('--cache', action='store_true', help='enable the on-disk response cache')
+    parser.add_argument('--stream', action='store_true', help='stream pages to the Parquet store')
+    args = parser.parse_args()
+
+    config = ReplayConfig(latency=args.latency, max_page_size=args.max_page_size,
+                          rate_429=args.rate_429, retry_after=0.2, error_rate=args.error_rate,
+                          data_dir=args.data_dir, synthetic_days=args.days, rows_per_day=args.rows_per_day)
+    parent_conn, child_conn = mp.Pipe()
+    server = mp.Process(target=_serve, args=(config, child_conn), daemon=True)
+    server.start()
+    base_url = parent_conn.recv()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        collector = EnhancedTreasuryCollector(
+            data_dir=data_dir, base_url=base_url,
+            concurrent_pagination=not args.sequential, parallel_endpoints=not args.sequential,
+            max_workers=args.workers, max_requests_per_second=args.rps,
+            use_cache=args.cache, stream_to_disk=args.stream,
+        )
+        collector.client.backoff_base = 0.05
+        start_date = '2000-01-01'
+        end_date = '2100-01-01'
+
+        started = time.perf_counter()
+        if collector.stream_to_disk:
+            results = collector.stream_detailed_cash_flows(start_date, end_date)
+            rows = sum(results.values())
+        else:
+            results = collector.collect_detailed_cash_flows(start_date, end_date)
+            rows = sum(len(df) for df in results.values())
+        elapsed = time.perf_counter() - started
+        client = collector.client.stats()
+        collector.close()
+
+    parent_conn.send('done')
+    served = parent_conn.recv()
+    server.join(timeout=5)
+
+    pages = client['requests'] - client['retries']
+    print("📏 Collector benchmark (replay server)")
+    print("=" * 50)
+    print(f"   Mode:          {'sequential' if args.sequential else f'concurrent x{args.workers}'}"
+          f"{' + stream' if args.stream else ''}{' + cache' if args.cache else ''}")
+    print(f"   Endpoints:     {len(results)}/{len(collector.detailed_endpoints)} ok, {len(collector.collection_errors)} failed")
+    print(f"   Rows:          {rows:,}")
+    print(f"   Wall time:     {elapsed:.2f}s")
+    print(f"   Pages/s:       {pages / elapsed:.1f} ({pages} pages, {client['retries']} retries, {client['throttled']} throttled)")
+    print(f"   Bytes/s:       {client['bytes'] / elapsed / 1e6:.2f} MB/s decoded "
+          f"({client['bytes'] / 1e6:.1f} MB decoded, {served['bytes_sent'] / 1e6:.1f} MB on the wire)")
+    print(f"   Parse time:    {client['parse_seconds']:.2f}s")
+    print(f"   Peak RSS:      {peak_rss_mb():.0f} MB")
+    print(f"   Server:        {served['requests']} requests, {served['injected_429']} x 429, "
+          f"{served['injected_errors']} x 503, {served['not_modified']} x 304")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Backfill Planner - date-range sharding for long historical DTS pulls
+- Splits the requested range into calendar year or quarter shards
+- Shards of every endpoint run in one worker pool; the collector's TreasuryClient
+  (shared token bucket + request slots) keeps the combined request rate in check
+- Each shard is checkpointed separately (<data_name>@<start>_<end>), so resume=True
+  skips finished shards and continues unfinished ones from their last page
+- Shard results are merged per endpoint with de-duplication and upserted into the
+  local store; an endpoint is only saved once all of its shards succeeded
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.record_merge import dedupe_records
+
+# First DTS date served by the fiscal-data API (config.ResourceRequirements: "2005-present")
+DTS_HISTORY_START = '2005-10-03'
+SHARD_FREQUENCIES = {'year': 'YS', 'quarter': 'QS'}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Inclusive date window [start, end] (YYYY-MM-DD)"""
+    start: str
+    end: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.start}_{self.end}"
+
+
+def plan_shards(start_date: str, end_date: str, freq: str = 'year') -> List[Shard]:
+    """Calendar-aligned shards covering [start_date, end_date]"""
+    if freq not in SHARD_FREQUENCIES:
+        raise ValueError(f"Unknown shard frequency {freq!r} (expected one of {sorted(SHARD_FREQUENCIES)})")
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    if start > end:
+        return []
+    bounds = [start] + [b for b in pd.date_range(start, end, freq=SHARD_FREQUENCIES[freq]) if b > start]
+    shards = []
+    for i, lower in enumerate(bounds):
+        upper = bounds[i + 1] - pd.Timedelta(days=1) if i + 1 < len(bounds) else end
+        shards.append(Shard(lower.strftime('%Y-%m-%d'), upper.strftime('%Y-%m-%d')))
+    return shards
+
+
+class BackfillPlanner:
+    """Runs a sharded historical pull through an EnhancedTreasuryCollector"""
+
+    def __init__(self, collector, freq: str = 'year', max_parallel_shards: Optional[int] = None):
+        self.collector = collector
+        self.freq = freq
+        # Each shard also paginates concurrently; the client's request slots cap the total
+        self.max_parallel_shards = max_parallel_shards or 2 * collector.max_workers
+
+    def plan(self, start_date: str, end_date: str) -> List[Tuple[str, str, Shard]]:
+        """(data_name, endpoint, shard) tasks, newest shards first across all endpoints"""
+        shards = plan_shards(start_date, end_date, self.freq)
+        return [
+            (data_name, endpoint, shard)
+            for shard in reversed(shards)
+            for data_name, endpoint in self.collector.detailed_endpoints.items()
+        ]
+
+    def _fetch_shard(self, data_name: str, endpoint: str, shard: Shard, stream: bool, resume: bool):
+        collector = self.collector
+        checkpoint, params, _ = collector._open_checkpoint(
+            data_name, endpoint, shard.start, shard.end, False, resume,
+            'stream' if stream else 'memory', shard=shard.key
+        )
+        if stream:
+            result = collector._stream_paginated_request(data_name, endpoint, params, checkpoint=checkpoint)
+        else:
+            result = collector._make_paginated_request(endpoint, params, label=f"{data_name}@{shard.key}",
+                                                       checkpoint=checkpoint)
+        return checkpoint, result
+
+    def run(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+            resume: bool = False, stream: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Backfill every endpoint over [start_date, end_date].
+
+        Returns the merged DataFrame per endpoint (rows ingested per endpoint when
+        streaming). Failed endpoints are recorded in collector.collection_errors and
+        keep their shard checkpoints for a later resume=True run.
+        """
+        collector = self.collector
+        start_date = start_date or DTS_HISTORY_START
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        if stream is None:
+            stream = collector.stream_to_disk and collector.parquet_store.available
+        tasks = self.plan(start_date, end_date)
+        n_shards = len(tasks) // max(1, len(collector.detailed_endpoints))
+        logging.info(f"Backfill {start_date} → {end_date}: {n_shards} {self.freq} shard(s) "
+                     f"x {len(collector.detailed_endpoints)} endpoint(s), {self.max_parallel_shards} in parallel")
+        started = time.monotonic()
+
+        done: Dict[str, List[Tuple[Shard, Any, Any]]] = {name: [] for name in collector.detailed_endpoints}
+        with ThreadPoolExecutor(max_workers=self.max_parallel_shards) as pool:
+            futures = {
+                pool.submit(self._fetch_shard, data_name, endpoint, shard, stream, resume): (data_name, shard)
+                for data_name, endpoint, shard in tasks
+            }
+            for future in as_completed(futures):
+                data_name, shard = futures[future]
+                try:
+                    checkpoint, result = future.result()
+                except Exception as e:
+                    logging.error(f"❌ {data_name}@{shard.key} failed: {e}")
+                    collector.collection_errors.setdefault(data_name, str(e))
+                    continue
+                done[data_name].append((shard, checkpoint, result))
+
+        results = {}
+        for data_name, finished in done.items():
+            if data_name in collector.collection_errors:
+                # Keep what finished: the shard checkpoints let resume=True pick up from here
+                continue
+            finished.sort(key=lambda item: item[0].start)
+            checkpoints = [checkpoint for _, checkpoint, _ in finished]
+            if stream:
+                writers = [writer for _, _, writer in finished]
+                collector._commit_streams(data_name, writers, upsert=True)
+                rows = collector.rows_fetched[data_name] = sum(w.rows for w in writers)
+                if rows:
+                    results[data_name] = rows
+            else:
+                merged = self.merge([df for _, _, df in finished], data_name)
+                rows = collector.rows_fetched[data_name] = len(merged)
+                if rows:
+                    results[data_name] = collector._save_collected(data_name, merged)
+            for checkpoint in checkpoints:
+                checkpoint.clear()
+            logging.info(f"✅ {data_name}: backfilled {rows} rows")
+
+        logging.info(f"Backfill finished in {time.monotonic() - started:.1f}s "
+                     f"({len(results)}/{len(done)} endpoints)")
+        return results
+
+    def merge(self, frames: List[pd.DataFrame], data_name: str) -> pd.DataFrame:
+        """Concatenate shard results in date order and drop lines fetched twice (natural key)"""
+        frames = [df for df in frames if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        merged = dedupe_records(pd.concat(frames, ignore_index=True), data_name)
+        merged = merged.sort_values('record_date', kind='stable').reset_index(drop=True)
+        # Re-apply so per-shard category sets collapse into one
+        return self.collector._standardize_dtypes(merged, data_name)
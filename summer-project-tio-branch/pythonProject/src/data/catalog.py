@@ -0,0 +1,270 @@
+"""
+Data Catalog - one registry of datasets and model artifacts (table _catalog in treasury.db)
+- Every entry records name, kind (dataset / artifact), file path, record_date coverage,
+  schema version (digest of the column layout), row count and SHA-256 content hash
+- Writers register files as they save them; readers ask for the newest entry of a
+  name with one indexed lookup instead of globbing directories by mtime
+- Date-stamped legacy CSVs (debt_outstanding_2023-06-29_to_2025-06-28.csv, ...) are
+  registered under their base name the first time a name is looked up; a marker row
+  records that a directory was imported, so it is scanned only once
+- Model outputs saved before the catalog (output/forecasts/xdate_simulation_20250710_182311.csv,
+  cash_flow_forecasts_v2_*.csv) are registered the same way, dated by the run stamp in their name;
+  output/forecasts is located next to the data dir (<project>/data/raw), not the working directory
+- Paths are stored relative to the directory holding the database, so a moved
+  checkout keeps resolving its entries
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from src.data.warehouse import WAREHOUSE_FILE
+
+DATASET = 'dataset'
+ARTIFACT = 'artifact'
+_LEGACY_IMPORT = '_legacy_import'   # marker rows: name=_LEGACY_IMPORT, path=<imported dir>
+_DATED_NAME = re.compile(r'_\d{4}-\d{2}-\d{2}_to_\d{4}-\d{2}-\d{2}$')
+_RUN_STAMP = re.compile(r'_(\d{8}_\d{6})$')
+
+# Model artifacts written before the catalog existed: name -> file pattern in the artifact dir
+ARTIFACT_DIR = Path(__file__).resolve().parents[2] / 'output' / 'forecasts'
+LEGACY_ARTIFACTS = {
+    'cash_flow_forecasts': 'cash_flow_forecasts_v2_*.csv',
+    'xdate_simulation': 'xdate_simulation_*.csv',
+}
+_FIELDS = ('name', 'kind', 'path', 'start_date', 'end_date', 'row_count',
+           'schema_version', 'content_hash', 'created_at')
+
+
+def artifact_dir_for(data_dir) -> Path:
+    """output/forecasts of the project holding data_dir (<project>/data/raw), else ARTIFACT_DIR"""
+    data_dir = Path(data_dir).resolve()
+    if data_dir.parent.name == 'data':
+        return data_dir.parent.parent / 'output' / 'forecasts'
+    return ARTIFACT_DIR
+
+
+def content_hash(path) -> str:
+    """SHA-256 of a file, read in 1 MiB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def schema_version(columns: Iterable[str]) -> str:
+    """Short digest of the column layout; changes whenever a column is added, dropped or renamed"""
+    return hashlib.sha1(','.join(map(str, columns)).encode()).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    name: str
+    kind: str
+    path: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    row_count: Optional[int]
+    schema_version: Optional[str]
+    content_hash: Optional[str]
+    created_at: str
+
+    @property
+    def file(self) -> Path:
+        return Path(self.path)
+
+    def verify(self) -> bool:
+        """File still exists with the registered content"""
+        return self.file.exists() and content_hash(self.file) == self.content_hash
+
+
+class DataCatalog:
+    """Registry backed by the warehouse database (its own connection, shared lock per instance)"""
+
+    def __init__(self, db_path: Path, artifact_dir: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.root = self.db_path.parent.resolve()
+        self.artifact_dir = Path(artifact_dir) if artifact_dir is not None else artifact_dir_for(self.root)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS _catalog (name TEXT NOT NULL, kind TEXT NOT NULL, '
+                'path TEXT NOT NULL, start_date TEXT, end_date TEXT, row_count INTEGER, '
+                'schema_version TEXT, content_hash TEXT, created_at TEXT NOT NULL, PRIMARY KEY (name, path))'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx__catalog_latest ON _catalog (name, created_at)')
+
+    @classmethod
+    def for_data_dir(cls, data_dir) -> 'DataCatalog':
+        return cls(Path(data_dir) / WAREHOUSE_FILE)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'DataCatalog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Paths ----------
+    def _relative(self, path) -> str:
+        """Stored form of a path: relative to the database directory"""
+        return Path(os.path.relpath(Path(path).resolve(), self.root)).as_posix()
+
+    def _absolute(self, stored: str) -> str:
+        """Absolute path of a stored path (rows written with absolute paths stay as they are)"""
+        return os.path.normpath(self.root / stored)
+
+    # ---------- Write ----------
+    def register(self, name: str, path, kind: str = DATASET, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, row_count: Optional[int] = None,
+                 schema: Optional[str] = None, created_at: Optional[str] = None) -> CatalogEntry:
+        """Record (or refresh) the entry for a file that was just written"""
+        path = Path(path).resolve()
+        entry = CatalogEntry(
+            name=name, kind=kind, path=str(path), start_date=start_date, end_date=end_date,
+            row_count=None if row_count is None else int(row_count), schema_version=schema,
+            content_hash=content_hash(path), created_at=created_at or datetime.now().isoformat()
+        )
+        self._write(entry)
+        return entry
+
+    def _write(self, entry: CatalogEntry):
+        marks = ', '.join('?' for _ in _FIELDS)
+        row = tuple(self._relative(entry.path) if f == 'path' else getattr(entry, f) for f in _FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(f'INSERT OR REPLACE INTO _catalog ({", ".join(_FIELDS)}) VALUES ({marks})', row)
+
+    def register_frame(self, name: str, path, df: pd.DataFrame, kind: str = DATASET) -> CatalogEntry:
+        """register() with coverage, rows and schema taken from the frame that was written to path"""
+        if 'record_date' in df.columns:
+            dates = pd.to_datetime(df['record_date'])
+        elif isinstance(df.index, pd.DatetimeIndex):
+            dates = df.index.to_series()
+        else:
+            dates = pd.Series([], dtype='datetime64[ns]')
+        dates = dates.dropna()
+        start, end = (None, None) if dates.empty else (f"{dates.min():%Y-%m-%d}", f"{dates.max():%Y-%m-%d}")
+        return self.register(name, path, kind=kind, start_date=start, end_date=end,
+                             row_count=len(df), schema=schema_version(df.columns))
+
+    def _imported(self, directory) -> bool:
+        """A legacy import of directory already ran (primary-key lookup of its marker row)"""
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM _catalog WHERE name = ? AND path = ?',
+                                     (_LEGACY_IMPORT, self._relative(directory))).fetchone()
+        return row is not None
+
+    def _mark_imported(self, directory):
+        self._write(CatalogEntry(name=_LEGACY_IMPORT, kind=_LEGACY_IMPORT, path=str(Path(directory).resolve()),
+                                 start_date=None, end_date=None, row_count=None, schema_version=None,
+                                 content_hash=None, created_at=datetime.now().isoformat()))
+
+    def import_legacy(self, data_dir, force: bool = False) -> List[CatalogEntry]:
+        """
+        Register CSVs in data_dir that predate the catalog (dated names map to their base name).
+
+        Runs once per directory; force=True scans it again.
+        """
+        if not force and self._imported(data_dir):
+            return []
+        known = self._known_paths()
+        entries = []
+        for csv_file in sorted(Path(data_dir).glob('*.csv')):
+            if str(csv_file.resolve()) in known:
+                continue
+            header = pd.read_csv(csv_file, nrows=0).columns
+            df = pd.read_csv(csv_file, usecols=['record_date']) if 'record_date' in header else pd.DataFrame()
+            dates = pd.to_datetime(df['record_date'], errors='coerce').dropna() if not df.empty else pd.Series([])
+            modified = datetime.fromtimestamp(csv_file.stat().st_mtime).isoformat()
+            entries.append(self.register(
+                _DATED_NAME.sub('', csv_file.stem), csv_file,
+                start_date=f"{dates.min():%Y-%m-%d}" if len(dates) else None,
+                end_date=f"{dates.max():%Y-%m-%d}" if len(dates) else None,
+                row_count=len(df), schema=schema_version(header), created_at=modified
+            ))
+        self._mark_imported(data_dir)
+        if entries:
+            logging.info(f"✅ Catalog: registered {len(entries)} existing file(s) from {data_dir}")
+        return entries
+
+    def import_legacy_artifacts(self, artifact_dir=None, force: bool = False) -> List[CatalogEntry]:
+        """Register the LEGACY_ARTIFACTS files in artifact_dir (once per directory, like import_legacy)"""
+        artifact_dir = self.artifact_dir if artifact_dir is None else artifact_dir
+        if not force and self._imported(artifact_dir):
+            return []
+        known = self._known_paths()
+        entries = []
+        for name, pattern in LEGACY_ARTIFACTS.items():
+            for csv_file in sorted(Path(artifact_dir).glob(pattern)):
+                if str(csv_file.resolve()) in known:
+                    continue
+                header = pd.read_csv(csv_file, nrows=0).columns
+                dates = pd.to_datetime(pd.read_csv(csv_file, usecols=[0]).iloc[:, 0], errors='coerce').dropna()
+                stamp = _RUN_STAMP.search(csv_file.stem)
+                created = (datetime.strptime(stamp.group(1), '%Y%m%d_%H%M%S') if stamp
+                           else datetime.fromtimestamp(csv_file.stat().st_mtime))
+                entries.append(self.register(
+                    name, csv_file, kind=ARTIFACT,
+                    start_date=f"{dates.min():%Y-%m-%d}" if len(dates) else None,
+                    end_date=f"{dates.max():%Y-%m-%d}" if len(dates) else None,
+                    row_count=len(dates), schema=schema_version(header), created_at=created.isoformat()
+                ))
+        self._mark_imported(artifact_dir)
+        if entries:
+            logging.info(f"✅ Catalog: registered {len(entries)} existing artifact(s) from {artifact_dir}")
+        return entries
+
+    def _known_paths(self) -> set:
+        with self._lock:
+            return {self._absolute(row[0]) for row in self._conn.execute('SELECT path FROM _catalog')}
+
+    # ---------- Lookup ----------
+    def _select(self, sql: str, params: tuple) -> List[CatalogEntry]:
+        with self._lock:
+            rows = self._conn.execute(f'SELECT {", ".join(_FIELDS)} FROM _catalog {sql}', params).fetchall()
+        return [replace(entry, path=self._absolute(entry.path)) for entry in (CatalogEntry(*row) for row in rows)]
+
+    def history(self, name: str) -> List[CatalogEntry]:
+        """All entries of a name, newest first"""
+        return self._select('WHERE name = ? ORDER BY created_at DESC', (name,))
+
+    def latest(self, name: str, data_dir=None) -> Optional[CatalogEntry]:
+        """
+        Newest entry of name whose file still exists.
+
+        With data_dir, a name that was never registered triggers import_legacy(data_dir),
+        which scans the directory only the first time; LEGACY_ARTIFACTS names fall back
+        to import_legacy_artifacts() the same way.
+        """
+        newest = self._select('WHERE name = ? ORDER BY created_at DESC LIMIT 1', (name,))
+        if newest and newest[0].file.exists():
+            return newest[0]
+        for entry in (self.history(name) if newest else []):
+            if entry.file.exists():
+                return entry
+            logging.warning(f"⚠️ Catalog: {name} -> {entry.path} no longer exists")
+        if data_dir is not None and self.import_legacy(data_dir):
+            return self.latest(name)
+        if name in LEGACY_ARTIFACTS and self.import_legacy_artifacts():
+            return self.latest(name)
+        return None
+
+    def path_for(self, name: str, data_dir=None) -> Optional[Path]:
+        entry = self.latest(name, data_dir)
+        return entry.file if entry is not None else None
@@ -0,0 +1,64 @@
+"""
+Transaction Categorization - code-based mapping of DTS categories to transaction groups
+- transaction_catg is handled as categorical codes; the mapping is resolved once per
+  unique category into a lookup array, rows get their group by integer take
+- Subtotal/transfer exclusion is resolved the same way (one boolean per category)
+- Deposits and withdrawals are split in a single grouped pass
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class TransactionCategorizer:
+    """Vectorized transaction_catg -> transaction_group assignment"""
+
+    def __init__(self, category_mapping: Dict[str, str], excluded_categories: Iterable[str] = (),
+                 default_group: str = 'Other'):
+        self.category_mapping = category_mapping
+        self.excluded_categories = set(excluded_categories)
+        self.default_group = default_group
+        self.groups = pd.Index(sorted(set(category_mapping.values()) | {default_group}))
+
+    def _lookup(self, categories: pd.Index) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group code and keep flag per category code.
+
+        Both arrays carry one extra trailing slot so code -1 (missing category)
+        indexes it directly: missing categories fall into default_group and are kept.
+        """
+        mapped = pd.Series(categories, dtype=object).map(self.category_mapping).fillna(self.default_group)
+        group_codes = np.append(self.groups.get_indexer(mapped), self.groups.get_loc(self.default_group))
+        keep = np.append(~categories.isin(self.excluded_categories), True)
+        return group_codes.astype(np.int32), keep
+
+    def unmapped(self, catg: pd.Series) -> List[str]:
+        """Observed, non-excluded categories with no mapping entry"""
+        observed = pd.Index(catg.dropna().unique())
+        return sorted(c for c in observed if c not in self.category_mapping and c not in self.excluded_categories)
+
+    def categorize(self, df: pd.DataFrame, row_mask: np.ndarray = None) -> pd.DataFrame:
+        """Drop excluded categories and attach transaction_group (rows limited to row_mask)"""
+        catg = df['transaction_catg']
+        if not isinstance(catg.dtype, pd.CategoricalDtype):
+            catg = catg.astype('category')
+        codes = catg.cat.codes.to_numpy()
+        group_codes, keep = self._lookup(catg.cat.categories)
+
+        mask = keep[codes]
+        if row_mask is not None:
+            mask &= row_mask
+        result = df[mask].copy()
+        result['transaction_group'] = pd.Categorical.from_codes(group_codes[codes[mask]], categories=self.groups)
+        return result
+
+    def split(self, df: pd.DataFrame, names: Dict[str, str], by: str = 'transaction_type') -> Dict[str, pd.DataFrame]:
+        """One groupby pass over `by`; keys renamed via names, other values dropped"""
+        result = {}
+        for key, sub in df.groupby(by, observed=True, sort=False):
+            if key in names and not sub.empty:
+                result[names[key]] = sub
+        # Keep the order of names regardless of which label appears first
+        return {name: result[name] for name in names.values() if name in result}
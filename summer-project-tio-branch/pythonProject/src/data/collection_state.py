@@ -0,0 +1,149 @@
+"""
+Collection State - durable per-endpoint bookkeeping for the Treasury collector
+- Watermarks: last record_date stored locally for each endpoint (incremental pulls)
+- Checkpoints: pagination progress per endpoint/date shard so interrupted pulls resume
+"""
+
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class WatermarkStore:
+    """High-water marks (last stored record_date) per endpoint, persisted as JSON"""
+
+    def __init__(self, state_file: Path):
+        self.state_file = Path(state_file)
+        self._lock = threading.Lock()
+        self._marks: Dict[str, str] = {}
+        if self.state_file.exists():
+            with open(self.state_file) as f:
+                self._marks = json.load(f)
+
+    def get(self, data_name: str) -> Optional[str]:
+        """Last stored record_date (YYYY-MM-DD) for an endpoint, or None"""
+        with self._lock:
+            return self._marks.get(data_name)
+
+    def update(self, data_name: str, record_date: str):
+        """Advance the watermark (never moves backwards) and persist"""
+        with self._lock:
+            current = self._marks.get(data_name)
+            if current is not None and current >= record_date:
+                return
+            self._marks[data_name] = record_date
+            self._save()
+
+    def reset(self, data_name: str):
+        """Forget an endpoint's watermark (its stored copy is being rebuilt)"""
+        with self._lock:
+            if self._marks.pop(data_name, None) is not None:
+                self._save()
+
+    def as_dict(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._marks)
+
+    def _save(self):
+        # Write-then-rename so a crash never leaves a half-written state file
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self._marks, f, indent=2, sort_keys=True)
+        tmp_file.replace(self.state_file)
+
+
+class Checkpoint:
+    """
+    Progress of one paginated pull: request params, completed pages and counters.
+
+    In-memory pulls spool each completed page to <root>/<key>/page-NNNNNN.json;
+    streaming pulls keep their pages in the Parquet staging dir recorded here.
+    """
+
+    def __init__(self, root: Path, key: str, state: Dict[str, Any]):
+        self.root = Path(root)
+        self.key = key
+        self.state = state
+        self.state.setdefault('completed', [])
+        self._completed = set(self.state['completed'])
+
+    @property
+    def state_file(self) -> Path:
+        return self.root / f"{self.key}.json"
+
+    @property
+    def page_dir(self) -> Path:
+        return self.root / self.key
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.state['params']
+
+    @property
+    def completed(self) -> set:
+        return set(self._completed)
+
+    def get(self, name: str, default=None):
+        return self.state.get(name, default)
+
+    def set(self, **values):
+        self.state.update(values)
+        self._save()
+
+    def mark(self, page_number: int, records: Optional[List[dict]] = None, **values):
+        """Record a completed page (spooling its records when given) and persist"""
+        if records is not None:
+            self.page_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.page_dir / f"page-{page_number:06d}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(records, f)
+            tmp_file.replace(self.page_dir / f"page-{page_number:06d}.json")
+        self._completed.add(page_number)
+        self.state['completed'] = sorted(self._completed)
+        self.state.update(values)
+        self._save()
+
+    def load_page(self, page_number: int) -> List[dict]:
+        with open(self.page_dir / f"page-{page_number:06d}.json") as f:
+            return json.load(f)
+
+    def clear(self):
+        """Pull finished: drop the state file and any spooled pages"""
+        shutil.rmtree(self.page_dir, ignore_errors=True)
+        self.state_file.unlink(missing_ok=True)
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+
+class CheckpointStore:
+    """Durable checkpoints keyed by endpoint (and date shard), one JSON file each"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def create(self, key: str, **state) -> Checkpoint:
+        """Start a fresh checkpoint, discarding any previous one under the same key"""
+        previous = self.load(key)
+        if previous is not None:
+            previous.clear()
+        checkpoint = Checkpoint(self.root, key, dict(state))
+        checkpoint._save()
+        return checkpoint
+
+    def load(self, key: str) -> Optional[Checkpoint]:
+        state_file = self.root / f"{key}.json"
+        if not state_file.exists():
+            return None
+        with open(state_file) as f:
+            return Checkpoint(self.root, key, json.load(f))
+
+    def pending(self) -> List[str]:
+        """Keys of pulls that were interrupted"""
+        return sorted(p.stem for p in self.root.glob('*.json')) if self.root.exists() else []
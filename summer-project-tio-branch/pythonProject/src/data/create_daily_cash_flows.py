@@ -1,92 +1,73 @@
 #!/usr/bin/env python3
 """
-Create Daily Cash Flows File
-Generate daily_cash_flows_2023-06-29_to_2025-06-28.csv from deposits_withdrawals_operating_cash.csv
+Create Daily Cash Flows
+Refresh the daily_cash_flows table (TGA Deposits/Withdrawals per day) from
+deposits_withdrawals_operating_cash. Only the requested date range is re-aggregated;
+without a range the whole table is rebuilt. Models read it via daily_flows.load_daily_flows.
 """
 
-import pandas as pd
+import argparse
 from pathlib import Path
-from datetime import datetime
 import logging
 
-def create_daily_cash_flows():
-    """Create daily cash flows file from deposits_withdrawals_operating_cash data"""
-    
+from src.data.daily_flows import SOURCE, DailyFlowTable
+
+def create_daily_cash_flows(start_date=None, end_date=None, data_dir="./data/raw"):
+    """Refresh daily_cash_flows for [start_date, end_date] (full rebuild when no range is given)"""
+
     # Setup logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    
-    data_dir = Path("./data/raw")
-    
-    # Read the deposits_withdrawals_operating_cash data
-    deposits_file = data_dir / "deposits_withdrawals_operating_cash.csv"
-    
-    if not deposits_file.exists():
-        print(f"❌ Source file not found: {deposits_file}")
-        print("💡 Please run the data collection first!")
-        return False
-    
-    print(f"📖 Reading deposits/withdrawals data from: {deposits_file}")
-    df = pd.read_csv(deposits_file)
-    
-    print(f"📊 Original data shape: {df.shape}")
-    print(f"📅 Date range: {df['record_date'].min()} to {df['record_date'].max()}")
-    
-    # Filter for Treasury General Account (TGA) only
-    tga_data = df[df['account_type'] == 'Treasury General Account (TGA)'].copy()
-    print(f"💰 TGA data shape: {tga_data.shape}")
-    
-    # Convert date and amount columns
-    tga_data['record_date'] = pd.to_datetime(tga_data['record_date'])
-    tga_data['transaction_today_amt'] = pd.to_numeric(tga_data['transaction_today_amt'], errors='coerce')
-    
-    # Remove rows with missing amounts
-    tga_data = tga_data.dropna(subset=['transaction_today_amt'])
-    print(f"🧹 After cleaning: {tga_data.shape}")
-    
-    # Group by date and transaction type, sum the amounts
-    daily_summary = tga_data.groupby(['record_date', 'transaction_type'])['transaction_today_amt'].sum().reset_index()
-    
-    print(f"📈 Daily summary shape: {daily_summary.shape}")
-    print(f"🏷️  Transaction types: {daily_summary['transaction_type'].unique()}")
-    
-    # Create the output file
-    output_file = data_dir / "daily_cash_flows_2023-06-29_to_2025-06-28.csv"
-    daily_summary.to_csv(output_file, index=False)
-    
-    print(f"✅ Daily cash flows file created: {output_file}")
-    
-    # Show some statistics
-    deposits_total = daily_summary[daily_summary['transaction_type'] == 'Deposits']['transaction_today_amt'].sum()
-    withdrawals_total = daily_summary[daily_summary['transaction_type'] == 'Withdrawals']['transaction_today_amt'].sum()
-    
-    print(f"\n📋 Summary Statistics:")
-    print(f"   💰 Total Deposits: ${deposits_total:,.0f} million")
-    print(f"   💸 Total Withdrawals: ${withdrawals_total:,.0f} million")
-    print(f"   📊 Net Cash Flow: ${deposits_total - withdrawals_total:,.0f} million")
-    print(f"   📅 Number of days: {daily_summary['record_date'].nunique()}")
-    
-    # Verify the file was created correctly
-    verification_df = pd.read_csv(output_file)
-    print(f"\n✅ Verification - File contains {len(verification_df)} records")
-    print(f"   Columns: {list(verification_df.columns)}")
-    
-    return True
+
+    with DailyFlowTable(data_dir) as table:
+        if start_date is None and end_date is None:
+            rows = table.rebuild()
+        elif table.warehouse.ensure_table(table.data_dir, SOURCE):
+            # A fresh warehouse imports the raw table from Parquet / CSV first, as rebuild() does
+            rows = table.refresh(start_date, end_date)
+        else:
+            rows = 0
+        if rows == 0:
+            print(f"❌ No deposits/withdrawals data found in {data_dir}")
+            print("💡 Please run the data collection first!")
+            return False
+
+        print(f"✅ daily_cash_flows refreshed: {rows} rows")
+
+        # Show some statistics for the refreshed range
+        daily = table.totals(start_date, end_date)
+        deposits_total = daily['Deposits'].sum()
+        withdrawals_total = daily['Withdrawals'].sum()
+
+        print(f"\n📋 Summary Statistics:")
+        print(f"   📅 Date range: {daily.index.min():%Y-%m-%d} to {daily.index.max():%Y-%m-%d}")
+        print(f"   💰 Total Deposits: ${deposits_total:,.0f} million")
+        print(f"   💸 Total Withdrawals: ${withdrawals_total:,.0f} million")
+        print(f"   📊 Net Cash Flow: ${deposits_total - withdrawals_total:,.0f} million")
+        print(f"   📅 Number of days: {len(daily)}")
+
+        return True
 
 def main():
     """Main function"""
-    print("🚀 Creating daily cash flows file...")
+    parser = argparse.ArgumentParser(description='Refresh the daily_cash_flows table')
+    parser.add_argument('--start-date', default=None, help='first record_date to re-aggregate (YYYY-MM-DD)')
+    parser.add_argument('--end-date', default=None, help='last record_date to re-aggregate (YYYY-MM-DD)')
+    parser.add_argument('--data-dir', default='./data/raw')
+    args = parser.parse_args()
+
+    print("🚀 Refreshing daily cash flows...")
     print("=" * 60)
-    
-    success = create_daily_cash_flows()
-    
+
+    success = create_daily_cash_flows(args.start_date, args.end_date, args.data_dir)
+
     if success:
-        print("\n✅ Daily cash flows file creation completed successfully!")
+        print("\n✅ Daily cash flows refresh completed successfully!")
         print("💡 You can now run the cash flow forecaster models.")
     else:
-        print("\n❌ Failed to create daily cash flows file!")
+        print("\n❌ Failed to refresh daily cash flows!")
         print("💡 Please check the error messages above.")
-    
+
     print("=" * 60)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
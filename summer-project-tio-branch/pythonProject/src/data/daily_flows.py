@@ -0,0 +1,140 @@
+"""
+Daily Flows - incrementally maintained TGA Deposits/Withdrawals totals per day
+- Warehouse table daily_cash_flows (record_date, transaction_type, transaction_today_amt),
+  aggregated from the TGA rows of deposits_withdrawals_operating_cash
+- refresh(start, end) recomputes only the days in that range with one indexed
+  SUM ... GROUP BY in SQLite, so a daily update costs O(new days) instead of O(history)
+- First use bootstraps the table from the raw endpoint, or from the cataloged
+  daily_cash_flows file (legacy dated CSV) when only that exists
+- load_daily_flows(data_dir, start_date, end_date) is the date-range loader for the models;
+  load_daily_flows_csv(path) parses standalone long-format files (backtest inputs)
+- Both loaders are memoized on the source fingerprint (flow_cache.py): a run parses
+  each source once and later runs reuse the on-disk copy until the source changes
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from src.data.catalog import DataCatalog
+from src.data.flow_cache import FlowCache, fingerprint
+from src.data.record_merge import dedupe_records
+from src.data.warehouse import WAREHOUSE_FILE, TreasuryWarehouse
+
+DAILY_FLOWS = 'daily_cash_flows'
+SOURCE = 'deposits_withdrawals_operating_cash'
+TGA_ACCOUNT = 'Treasury General Account (TGA)'
+FLOW_TYPES = ['Deposits', 'Withdrawals']
+CACHE_DIR = '.flow_cache'
+
+
+class DailyFlowTable:
+    """daily_cash_flows kept in step with the raw deposits/withdrawals table"""
+
+    def __init__(self, data_dir="./data/raw", warehouse: Optional[TreasuryWarehouse] = None):
+        self.data_dir = Path(data_dir)
+        # Only a warehouse opened here is closed by close(); a shared one stays with its owner
+        self._owns_warehouse = warehouse is None
+        self.warehouse = warehouse or TreasuryWarehouse.for_data_dir(self.data_dir)
+
+    def close(self):
+        if self._owns_warehouse:
+            self.warehouse.close()
+
+    def __enter__(self) -> 'DailyFlowTable':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """Re-aggregate the days in [start_date, end_date] (whole history when both are None)"""
+        rows = self.warehouse.replace_sums(
+            DAILY_FLOWS, SOURCE, ['record_date', 'transaction_type'], 'transaction_today_amt',
+            where={'account_type': TGA_ACCOUNT}, start_date=start_date, end_date=end_date
+        )
+        window = f"{start_date or '…'} → {end_date or '…'}"
+        logging.info(f"✅ daily_cash_flows: {rows} day/type rows refreshed ({window})")
+        return rows
+
+    def rebuild(self) -> int:
+        """Full rebuild from the raw endpoint (first run or repair)"""
+        if not self.warehouse.ensure_table(self.data_dir, SOURCE):
+            return 0
+        return self.refresh()
+
+    def ensure(self) -> bool:
+        """Make sure the table exists, bootstrapping it on first use"""
+        if self.warehouse.has(DAILY_FLOWS):
+            return True
+        if self.rebuild() > 0:
+            return True
+        # Data dir without raw data: bootstrap from the daily_cash_flows file written by earlier versions
+        with DataCatalog.for_data_dir(self.data_dir) as catalog:
+            legacy_csv = catalog.path_for(DAILY_FLOWS, self.data_dir)
+        if legacy_csv is None:
+            return False
+        return self.warehouse.ensure_table(self.data_dir, DAILY_FLOWS, csv_name=str(legacy_csv))
+
+    def load(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Long format: one row per record_date and transaction_type"""
+        if not self.ensure():
+            raise FileNotFoundError(f"Dataset not found: {DAILY_FLOWS} ({self.data_dir})")
+        return self.warehouse.query(DAILY_FLOWS, start_date=start_date, end_date=end_date)
+
+    def totals(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Wide format: Deposits / Withdrawals per record_date (missing -> 0)"""
+        if not self.ensure():
+            raise FileNotFoundError(f"Dataset not found: {DAILY_FLOWS} ({self.data_dir})")
+        daily = self.warehouse.daily_totals(
+            DAILY_FLOWS, 'transaction_today_amt', 'transaction_type', FLOW_TYPES,
+            start_date=start_date, end_date=end_date
+        )
+        daily.columns.name = 'transaction_type'
+        return daily
+
+
+def load_daily_flows(data_dir="./data/raw", start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> pd.DataFrame:
+    """Deposits, Withdrawals and net_flow per record_date for a date range (memoized)"""
+    data_dir = Path(data_dir)
+    with DailyFlowTable(data_dir) as table:
+        if not table.ensure():
+            raise FileNotFoundError(f"Dataset not found: {DAILY_FLOWS} ({data_dir})")
+        # WAL mode: committed writes may still live in the -wal file
+        db_file = data_dir / WAREHOUSE_FILE
+        key = (fingerprint(db_file, db_file.with_name(db_file.name + '-wal')), start_date, end_date)
+
+        def build() -> pd.DataFrame:
+            daily = table.totals(start_date, end_date)
+            daily['net_flow'] = daily['Deposits'] - daily['Withdrawals']
+            return daily
+
+        return FlowCache(data_dir / CACHE_DIR).get(f"{DAILY_FLOWS}_{start_date}_{end_date}", key, build)
+
+
+def pivot_daily_flows(df: pd.DataFrame) -> pd.DataFrame:
+    """Long (record_date, transaction_type, transaction_today_amt) -> one column per type, plus net_flow"""
+    df = df.copy()
+    df['record_date'] = pd.to_datetime(df['record_date'])
+    df['transaction_today_amt'] = pd.to_numeric(df['transaction_today_amt'], errors='coerce')
+    # One row per (record_date, transaction_type); a re-appended day would be summed twice
+    df = dedupe_records(df, DAILY_FLOWS)
+    daily = df.pivot_table(
+        index='record_date', columns='transaction_type', values='transaction_today_amt', aggfunc='sum'
+    ).fillna(0).sort_index()
+    if 'Deposits' in daily.columns and 'Withdrawals' in daily.columns:
+        daily['net_flow'] = daily['Deposits'] - daily['Withdrawals']
+    return daily
+
+
+def load_daily_flows_csv(csv_file) -> pd.DataFrame:
+    """Parsed and pivoted long-format daily flows file (memoized on path, size and mtime)"""
+    csv_file = Path(csv_file)
+    if not csv_file.exists():
+        raise FileNotFoundError(f"Cash flow data file not found: {csv_file}")
+    return FlowCache(csv_file.parent / CACHE_DIR).get(
+        csv_file.stem, fingerprint(csv_file), lambda: pivot_daily_flows(pd.read_csv(csv_file))
+    )
@@ -1,50 +1,129 @@
 """
 Enhanced Treasury Data Collector - Extended DTS Data Collection (Fixed)
-- Fix TGA balance field (use close_today_bal for Closing Balance)
-- Deduplicate category mapping keys (e.g., GSA)
-- Exclude subtotal/transfer lines before categorization to avoid double-counting
-- Unify dtype conversions (dates and numeric)
-- Add unmapped-category diagnostics
+- Pulls the detailed DTS endpoints (pages and endpoints in parallel through the pooled
+  TreasuryClient), full-window, incremental past the stored watermarks, or as a sharded backfill
+- Every pull is merged into the stored copy on the natural DTS key: legacy CSV, year/month
+  Parquet store and SQLite warehouse; incomplete downloads are never saved, and interrupted
+  pulls resume from their checkpoints
+- Categorizes TGA deposits/withdrawals (subtotal/transfer lines excluded first, TGA balance
+  from close_today_bal) and refreshes daily_cash_flows and the flow cube for the days ingested
 """
 
-import requests
 import pandas as pd
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import time
 import logging
-from typing import Dict, Optional, Any, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, Optional, Any, List, Tuple
 import numpy as np
 
+from src.data.backfill import DTS_HISTORY_START, BackfillPlanner
+from src.data.catalog import DataCatalog, schema_version
+from src.data.categorization import TransactionCategorizer
+from src.data.daily_flows import DAILY_FLOWS, DailyFlowTable
+from src.data.flow_cube import FlowCube
+from src.data.collection_state import Checkpoint, CheckpointStore, WatermarkStore
+from src.data.http_cache import ResponseCache
+from src.data.parquet_store import ParquetStore
+from src.data.record_merge import upsert_records
+from src.data.schemas import apply_schema, fields_for
+from src.data.treasury_client import IncompleteDownloadError, TreasuryAPIError, TreasuryClient
+from src.data.warehouse import TreasuryWarehouse
+
 
 class EnhancedTreasuryCollector:
     """Enhanced Treasury Data Collector - Contains detailed DTS categorized data"""
+
+    BASE_URL = "https://api.fiscaldata.treasury.gov/services/api/fiscal_service"
+
+    # DTS endpoints
+    DETAILED_ENDPOINTS = {
+        'operating_cash_balance': 'v1/accounting/dts/operating_cash_balance',
+        'deposits_withdrawals_operating_cash': 'v1/accounting/dts/deposits_withdrawals_operating_cash',
+        'public_debt_transactions': 'v1/accounting/dts/public_debt_transactions',
+        'adjustment_public_debt_transactions_cash_basis': 'v1/accounting/dts/adjustment_public_debt_transactions_cash_basis',
+        'debt_subject_to_limit': 'v1/accounting/dts/debt_subject_to_limit',
+        'inter_agency_tax_transfers': 'v1/accounting/dts/inter_agency_tax_transfers',
+        'income_tax_refunds_issued': 'v1/accounting/dts/income_tax_refunds_issued',
+        'federal_tax_deposits': 'v1/accounting/dts/federal_tax_deposits',
+        'short_term_cash_investments': 'v1/accounting/dts/short_term_cash_investments'
+    }
     
-    def __init__(self, data_dir: str = "./data/raw"):
+    def __init__(self, data_dir: str = "./data/raw", concurrent_pagination: bool = True,
+                 max_workers: int = 4, max_requests_per_second: float = 4.0,
+                 parallel_endpoints: bool = True, use_cache: bool = True,
+                 cache_ttl_seconds: float = 900, stream_to_disk: bool = False,
+                 max_retries: int = 5, full_fields: bool = False, base_url: str = None):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.base_url = "https://api.fiscaldata.treasury.gov/services/api/fiscal_service"
+        # base_url can point at a local replay server (src/data/replay_server.py)
+        self.base_url = base_url or self.BASE_URL
         self.headers = {
             'User-Agent': 'Enhanced-Treasury-Collector/2.1 (Research)',
             'Accept': 'application/json'
         }
-        self.request_delay = 0.5
+
+        # Concurrent pagination: pages 2..N are fetched by a bounded pool; every worker
+        # goes through one client, so connections, the request budget and the
+        # adaptive rate limit are shared across endpoints
+        self.concurrent_pagination = concurrent_pagination
+        self.max_workers = max_workers
+        self.client = TreasuryClient(self.base_url, self.headers,
+                                     max_requests_per_second=max_requests_per_second,
+                                     max_in_flight=max_workers, max_retries=max_retries)
+        self.parallel_endpoints = parallel_endpoints
+        # Request only manifest columns (schemas.ENDPOINT_FIELDS) unless archiving everything
+        self.full_fields = full_fields
+        self.collection_errors: Dict[str, str] = {}
+        self.rows_fetched: Dict[str, int] = {}
+        # (first, last) record_date written per endpoint this run; drives the daily_cash_flows refresh
+        self.ingested_ranges: Dict[str, Tuple[str, str]] = {}
+
+        # Incremental collection: last stored record_date per endpoint
+        self.watermarks = WatermarkStore(self.data_dir / ".watermarks.json")
+        self.checkpoints = CheckpointStore(self.data_dir / ".checkpoints")
+
+        # On-disk page cache (None disables it)
+        self.response_cache = ResponseCache(self.data_dir / ".http_cache", cache_ttl_seconds) if use_cache else None
+
+        # Columnar copy of every endpoint (no-op when pyarrow is unavailable)
+        self.parquet_store = ParquetStore(self.data_dir / "parquet")
+        # Streaming ingest writes pages straight into the store instead of building a DataFrame
+        self.stream_to_disk = stream_to_disk
+        if stream_to_disk and not self.parquet_store.available:
+            logging.warning("⚠️ pyarrow not installed, streaming ingest disabled")
+            self.stream_to_disk = False
+        # Indexed SQL copy of every table for the models and visualizations
+        self.warehouse = TreasuryWarehouse.for_data_dir(self.data_dir)
+        # Where every saved file lives, with its coverage and content hash
+        self.catalog = DataCatalog.for_data_dir(self.data_dir)
         
-        # DTS endpoints
-        self.detailed_endpoints = {
-            'operating_cash_balance': 'v1/accounting/dts/operating_cash_balance',
-            'deposits_withdrawals_operating_cash': 'v1/accounting/dts/deposits_withdrawals_operating_cash',
-            'public_debt_transactions': 'v1/accounting/dts/public_debt_transactions',
-            'adjustment_public_debt_transactions_cash_basis': 'v1/accounting/dts/adjustment_public_debt_transactions_cash_basis',
-            'debt_subject_to_limit': 'v1/accounting/dts/debt_subject_to_limit',
-            'inter_agency_tax_transfers': 'v1/accounting/dts/inter_agency_tax_transfers',
-            'income_tax_refunds_issued': 'v1/accounting/dts/income_tax_refunds_issued',
-            'federal_tax_deposits': 'v1/accounting/dts/federal_tax_deposits',
-            'short_term_cash_investments': 'v1/accounting/dts/short_term_cash_investments'
+        # Columns the analysis steps need when raw tables are read back from the store
+        self.analysis_columns = {
+            'operating_cash_balance': ['record_date', 'account_type', 'close_today_bal', 'open_today_bal'],
+            'deposits_withdrawals_operating_cash': ['record_date', 'account_type', 'transaction_type',
+                                                    'transaction_catg', 'transaction_today_amt', 'src_line_nbr'],
         }
+
+        self.detailed_endpoints = dict(self.DETAILED_ENDPOINTS)
         
         self.category_mapping = self._get_transaction_categories()
+        self.categorizer = TransactionCategorizer(self.category_mapping, self._get_subtotal_categories())
+
+    def close(self):
+        """Close the HTTP session and the warehouse and catalog connections"""
+        self.client.close()
+        self.warehouse.close()
+        self.catalog.close()
+
+    def __enter__(self) -> 'EnhancedTreasuryCollector':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
     
     # ---------- Category Mapping ----------
     def _get_transaction_categories(self) -> Dict[str, str]:
@@ -194,78 +273,505 @@ class EnhancedTreasuryCollector:
             'Change in Balance of Uncollected Funds'
         ]
     
-    def _filter_detail_transactions(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Remove subtotal/transfer lines (detail-only)"""
-        if df.empty or 'transaction_catg' not in df.columns:
-            return df
-        subtotal_categories = self._get_subtotal_categories()
-        return df[~df['transaction_catg'].isin(subtotal_categories)].copy()
-
     # ---------- Networking ----------
-    def _make_paginated_request(self, endpoint: str, params: Dict[str, Any] = None) -> pd.DataFrame:
-        if params is None:
-            params = {}
+    def _fetch_page(self, endpoint: str, params: Dict[str, Any], page_number: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single page; returns the decoded JSON body or None once retries are exhausted"""
+        page_params = dict(params)
+        page_params["page[number]"] = page_number
+        cached = None
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(endpoint, page_params)
+            if cached is not None and cached['fresh']:
+                return cached['body']
+        try:
+            headers = self.response_cache.validators(cached) if self.response_cache is not None else None
+            response = self.client.get(endpoint, params=page_params, headers=headers)
+            if response.status_code == 304 and cached is not None:
+                self.response_cache.touch(endpoint, page_params, cached)
+                return cached['body']
+            body = self.client.decode(response)
+            if self.response_cache is not None and body.get("data"):
+                self.response_cache.store(endpoint, page_params, body,
+                                          etag=response.headers.get('ETag'),
+                                          last_modified=response.headers.get('Last-Modified'))
+            return body
+        except (TreasuryAPIError, ValueError) as e:
+            logging.error(f"❌ API request failed (page {page_number}): {e}")
+            return None
+
+    def _iter_pages(self, endpoint: str, params: Dict[str, Any], concurrent: bool,
+                    label: str = None, skip: Iterable[int] = (),
+                    total_pages: Optional[int] = None) -> Iterator[Tuple[int, int, Optional[List[dict]]]]:
+        """
+        Yield (page_number, total_pages, records); records is None when a page failed.
+
+        Concurrent mode reads meta.total-pages from page 1, then keeps at most
+        2 * max_workers pages in flight and yields them in completion order.
+        Sequential mode follows links.next and stops at the first empty or failed page.
+        Pages in skip (already checkpointed) are neither fetched nor yielded; page 1
+        is only skipped when total_pages is known from the checkpoint.
+        """
+        label = label or endpoint
+        skip = set(skip)
+        if 1 in skip and total_pages:
+            first = None
+        else:
+            first = self._fetch_page(endpoint, params, 1)
+            if first is None:
+                yield 1, 1, None
+                return
+            records = first.get("data", [])
+            total_pages = int(first.get("meta", {}).get("total-pages") or 1)
+            yield 1, total_pages, records
+            if not records:
+                return
+
+        if concurrent and total_pages > 1:
+            remaining = (n for n in range(2, total_pages + 1) if n not in skip)
+            done = len(skip & set(range(1, total_pages + 1))) + (first is not None)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = {
+                    pool.submit(self._fetch_page, endpoint, params, page_number): page_number
+                    for page_number in islice(remaining, 2 * self.max_workers)
+                }
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        page_number = pending.pop(future)
+                        body = future.result()
+                        done += 1
+                        logging.info(f"   {label}: {done}/{total_pages} pages")
+                        yield page_number, total_pages, (body.get("data", []) if body is not None else None)
+                        for next_page in islice(remaining, 1):
+                            pending[pool.submit(self._fetch_page, endpoint, params, next_page)] = next_page
+        else:
+            page_number = 1
+            has_next = bool(first.get("links", {}).get("next")) if first is not None else total_pages > 1
+            while has_next:
+                page_number += 1
+                if page_number in skip:
+                    has_next = page_number < total_pages
+                    continue
+                body = self._fetch_page(endpoint, params, page_number)
+                if body is None:
+                    yield page_number, total_pages, None
+                    return
+                records = body.get("data", [])
+                yield page_number, total_pages, records
+                if not records:
+                    return
+                has_next = bool(body.get("links", {}).get("next"))
+
+    def _make_paginated_request(self, endpoint: str, params: Dict[str, Any] = None,
+                                concurrent: Optional[bool] = None, label: str = None,
+                                checkpoint: Optional[Checkpoint] = None) -> pd.DataFrame:
+        """
+        Download every page into one typed DataFrame.
+
+        With a checkpoint, each page is spooled as it arrives and pages spooled by an
+        interrupted run are read back instead of being downloaded again.
+        """
+        params = dict(params) if params else {}
         params.setdefault('page[size]', 1000)
+        if concurrent is None:
+            concurrent = self.concurrent_pagination
+
+        pages, skip, total_pages = {}, (), None
+        if checkpoint is not None:
+            skip, total_pages = checkpoint.completed, checkpoint.get('total_pages')
+            pages = {page_number: checkpoint.load_page(page_number) for page_number in skip}
+        for page_number, total, records in self._iter_pages(endpoint, params, concurrent, label, skip, total_pages):
+            pages[page_number] = records
+            if checkpoint is not None and records is not None:
+                checkpoint.mark(page_number, records, total_pages=total)
+        failed = sorted(n for n, records in pages.items() if records is None)
+        if failed:
+            raise IncompleteDownloadError(
+                f"{endpoint}: {len(failed)} page(s) failed (first: {failed[0]})"
+                + ("; completed pages checkpointed, rerun with resume" if checkpoint is not None else "")
+            )
+
+        # Reassemble in page order; an empty page ends the result as in the sequential walk
         all_data, page_number = [], 1
-        
-        while True:
-            params["page[number]"] = page_number
-            try:
-                url = f"{self.base_url}/{endpoint}"
-                response = requests.get(url, headers=self.headers, params=params, timeout=60)
-                response.raise_for_status()
-                data = response.json()
-                records = data.get("data", [])
-                if not records:
-                    break
-                all_data.extend(records)
-                if data.get("links", {}).get("next"):
-                    page_number += 1
-                else:
-                    break
-                time.sleep(self.request_delay)
-            except requests.exceptions.RequestException as e:
-                logging.error(f"API request failed: {e}")
-                break
-        
-        df = pd.DataFrame(all_data)
-        # Standardize dtypes
-        if 'record_date' in df.columns:
-            df['record_date'] = pd.to_datetime(df['record_date'], errors='coerce')
-        for col in df.columns:
-            if ('amt' in col) or ('bal' in col):
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        return df
+        while pages.get(page_number):
+            all_data.extend(pages[page_number])
+            page_number += 1
+
+        return self._standardize_dtypes(pd.DataFrame(all_data), label)
+
+    def _stream_paginated_request(self, data_name: str, endpoint: str, params: Dict[str, Any] = None,
+                                  concurrent: Optional[bool] = None, checkpoint: Optional[Checkpoint] = None):
+        """
+        Write each page to a staging dataset as it arrives; returns the uncommitted writer.
+
+        With a checkpoint the staging dir outlives a failed run and the next run
+        reopens it, fetching only the pages that were not staged yet.
+        """
+        params = dict(params) if params else {}
+        params.setdefault('page[size]', 1000)
+        if concurrent is None:
+            concurrent = self.concurrent_pagination
+
+        skip, total_pages = (), None
+        if checkpoint is not None and checkpoint.get('staging_dir'):
+            writer = self.parquet_store.open_stream(data_name, Path(checkpoint.get('staging_dir')))
+            writer.resume(checkpoint.get('rows', 0), checkpoint.get('max_record_date'),
+                          checkpoint.get('min_record_date'))
+            skip, total_pages = checkpoint.completed, checkpoint.get('total_pages')
+        else:
+            writer = self.parquet_store.open_stream(data_name)
+            if checkpoint is not None:
+                checkpoint.set(staging_dir=str(writer.staging_dir))
+
+        failed = []
+        for page_number, total, records in self._iter_pages(endpoint, params, concurrent, data_name, skip, total_pages):
+            if records is None:
+                failed.append(page_number)
+                continue
+            if records:
+                writer.write_batch(self._standardize_dtypes(pd.DataFrame(records), data_name), page_number)
+            if checkpoint is not None:
+                checkpoint.mark(page_number, total_pages=total, rows=writer.rows,
+                                max_record_date=writer.max_record_date, min_record_date=writer.min_record_date)
+        if failed:
+            if checkpoint is None:
+                writer.abort()
+                raise IncompleteDownloadError(f"{endpoint}: {len(failed)} page(s) failed (first: {min(failed)}); staged pages discarded")
+            raise IncompleteDownloadError(f"{endpoint}: {len(failed)} page(s) failed (first: {min(failed)}); "
+                                          f"staged pages checkpointed, rerun with resume")
+        return writer
+
+    @staticmethod
+    def _standardize_dtypes(df: pd.DataFrame, data_name: Optional[str] = None) -> pd.DataFrame:
+        """Cast to the declared schema for data_name (see schemas.ENDPOINT_SCHEMAS)"""
+        return apply_schema(df, data_name)
+
+    # ---------- Freshness ----------
+    def probe_latest_record_date(self, endpoint: str) -> Optional[str]:
+        """Newest record_date the API serves for endpoint (single-row request, never cached)"""
+        params = {'fields': 'record_date', 'sort': '-record_date', 'page[size]': 1}
+        try:
+            body = self.client.decode(self.client.get(endpoint, params))
+        except (TreasuryAPIError, ValueError) as e:
+            logging.warning(f"⚠️ Freshness probe failed for {endpoint}: {e}")
+            return None
+        data = body.get('data') or []
+        return data[0].get('record_date') if data else None
+
+    def probe_freshness(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per endpoint: latest published record_date, local watermark and whether it is new.
+
+        An endpoint whose probe fails or that has never been collected counts as new,
+        so a failed probe never suppresses a run.
+        """
+        names = list(self.detailed_endpoints)
+        with ThreadPoolExecutor(max_workers=len(names)) as pool:
+            latest = dict(zip(names, pool.map(self.probe_latest_record_date, self.detailed_endpoints.values())))
+        status = {}
+        for data_name in names:
+            watermark = self._get_watermark(data_name)
+            status[data_name] = {
+                'latest': latest[data_name],
+                'watermark': watermark,
+                'new_data': latest[data_name] is None or watermark is None or latest[data_name] > watermark,
+            }
+        return status
+
+    def has_new_data(self) -> bool:
+        """True when at least one endpoint published a record_date past its watermark"""
+        status = self.probe_freshness()
+        for name, s in status.items():
+            marker = '🆕' if s['new_data'] else '✓'
+            logging.info(f"   {marker} {name}: latest {s['latest'] or 'unknown'} / local {s['watermark'] or 'none'}")
+        changed = [name for name, s in status.items() if s['new_data']]
+        if changed:
+            logging.info(f"🆕 New DTS data for: {', '.join(changed)}")
+        else:
+            latest = max((s['latest'] for s in status.values() if s['latest']), default='unknown')
+            logging.info(f"✅ No new DTS data (latest {latest})")
+        return bool(changed)
 
     # ---------- Collection ----------
-    def collect_detailed_cash_flows(self, start_date: str = None, end_date: str = None) -> Dict[str, pd.DataFrame]:
-        logging.info("Starting detailed Treasury cash flow data collection...")
+    def _load_local(self, data_name: str) -> pd.DataFrame:
+        """Load the locally stored copy of an endpoint (empty if none)"""
+        filepath = self.data_dir / f"{data_name}.csv"
+        if not filepath.exists():
+            return pd.DataFrame()
+        return self._standardize_dtypes(pd.read_csv(filepath), data_name)
+
+    def _get_watermark(self, data_name: str) -> Optional[str]:
+        """Stored watermark, seeded from the local file on first incremental run"""
+        watermark = self.watermarks.get(data_name)
+        if watermark is None:
+            local = self._load_local(data_name)
+            if not local.empty and 'record_date' in local.columns and local['record_date'].notna().any():
+                watermark = local['record_date'].max().strftime('%Y-%m-%d')
+                self.watermarks.update(data_name, watermark)
+        return watermark
+
+    def _endpoint_params(self, data_name: str, endpoint: str, start_date: str, end_date: str,
+                         watermark: Optional[str] = None) -> Dict[str, Any]:
+        """Field projection, date filter and sort for one endpoint (record_date:gt:<watermark> when incremental)"""
+        params = {}
+        fields = fields_for(data_name, self.full_fields)
+        if fields:
+            params['fields'] = fields
+        if 'dts' in endpoint:  # DTS datasets have record_date
+            if watermark is not None:
+                params['filter'] = f'record_date:gt:{watermark},record_date:lte:{end_date}'
+            else:
+                params['filter'] = f'record_date:gte:{start_date},record_date:lte:{end_date}'
+            params['sort'] = 'record_date'
+        return params
+
+    def _open_checkpoint(self, data_name: str, endpoint: str, start_date: str, end_date: str,
+                         incremental: bool, resume: bool, mode: str,
+                         shard: Optional[str] = None) -> Tuple[Checkpoint, Dict[str, Any], Optional[str]]:
+        """
+        Checkpoint, request params and watermark for one pull.
+
+        resume=True reuses an interrupted pull's params and watermark verbatim, so the
+        remaining pages line up with the ones already saved even if the window moved.
+        Date shards of a backfill are checkpointed separately under <data_name>@<shard>.
+        """
+        key = f"{data_name}@{shard}" if shard else data_name
+        checkpoint = self.checkpoints.load(key)
+        if checkpoint is not None and resume and checkpoint.get('mode') == mode and checkpoint.get('endpoint') == endpoint:
+            logging.info(f"↩️  {key}: resuming, {len(checkpoint.completed)}"
+                         f"/{checkpoint.get('total_pages') or '?'} pages already done")
+            return checkpoint, checkpoint.params, checkpoint.get('watermark')
+        if checkpoint is not None:
+            if resume:
+                logging.warning(f"⚠️ {key}: checkpoint was written by a {checkpoint.get('mode')} pull, starting over")
+            if checkpoint.get('staging_dir'):
+                self.parquet_store.open_stream(data_name, Path(checkpoint.get('staging_dir'))).abort()
+
+        if mode == 'stream':
+            watermark = self._get_watermark(data_name) if incremental else None
+        else:
+            watermark = self._get_watermark(data_name) if incremental and 'dts' in endpoint else None
+        params = self._endpoint_params(data_name, endpoint, start_date, end_date, watermark)
+        params.setdefault('page[size]', 1000)
+        checkpoint = self.checkpoints.create(key, mode=mode, endpoint=endpoint, params=params,
+                                             watermark=watermark, started=datetime.now().isoformat())
+        return checkpoint, params, watermark
+
+    def _collect_endpoint(self, data_name: str, endpoint: str, start_date: str, end_date: str,
+                          incremental: bool = False, resume: bool = False,
+                          rebuild: bool = False) -> pd.DataFrame:
+        """Download one endpoint and save it as <data_name>.csv"""
+        logging.info(f"Collecting {data_name} ...")
+        started = time.monotonic()
+        checkpoint, params, watermark = self._open_checkpoint(
+            data_name, endpoint, start_date, end_date, incremental, resume, 'memory'
+        )
+        df = self._make_paginated_request(endpoint, params, label=data_name, checkpoint=checkpoint)
+        self.rows_fetched[data_name] = len(df)
+
+        if watermark is not None:
+            # Incremental: upsert the new days into the local store
+            if df.empty:
+                checkpoint.clear()
+                logging.info(f"✅ {data_name}: up to date (watermark {watermark})")
+                return self._load_local(data_name)
+            logging.info(f"✅ {data_name}: {self.rows_fetched[data_name]} new rows after {watermark}")
+
+        df = self._save_collected(data_name, df, rebuild=rebuild and watermark is None)
+        if not df.empty:
+            logging.info(f"✅ {data_name}: {len(df)} rows saved ({time.monotonic() - started:.1f}s)")
+        else:
+            logging.warning(f"❌ {data_name}: No data")
+        checkpoint.clear()
+        return df
+
+    def _save_collected(self, data_name: str, df: pd.DataFrame, rebuild: bool = False) -> pd.DataFrame:
+        """
+        Write a downloaded table to its CSV, the Parquet store and the warehouse.
+
+        df is upserted into the stored copy on the natural key and only the months it
+        touches are rewritten, so a windowed pull never truncates a longer history.
+        rebuild=True replaces the stored copy with df instead. Returns the table as saved.
+        """
+        if not df.empty and 'record_date' in df.columns and df['record_date'].notna().any():
+            self._note_ingested(data_name, df['record_date'].min().strftime('%Y-%m-%d'),
+                                df['record_date'].max().strftime('%Y-%m-%d'))
+        touched = df
+        if rebuild and not df.empty:
+            self._drop_stored(data_name)
+        elif not df.empty and 'record_date' in df.columns:
+            local = self._load_local(data_name)
+            new_months = df['record_date'].dt.to_period('M').unique()
+            # Re-apply so categoricals from both sides end up with one shared category set
+            df = self._standardize_dtypes(upsert_records(local, df, data_name), data_name)
+            touched = df[df['record_date'].dt.to_period('M').isin(new_months)]
+        if df.empty:
+            return df
+
+        # Save raw
+        filepath = self.data_dir / f"{data_name}.csv"
+        df.to_csv(filepath, index=False)
+        self.catalog.register_frame(data_name, filepath, df)
+        # Rewrite only the year/month partitions this run touched
+        self.parquet_store.write(data_name, touched)
+        if 'record_date' in df.columns and df['record_date'].notna().any():
+            self.warehouse.upsert(data_name, touched)
+            self.watermarks.update(data_name, df['record_date'].max().strftime('%Y-%m-%d'))
+        return df
+
+    def _drop_stored(self, data_name: str):
+        """Discard the Parquet dataset, warehouse table and watermark of data_name"""
+        logging.info(f"🧹 {data_name}: rebuilding the stored copy from this pull")
+        self.parquet_store.drop(data_name)
+        self.warehouse.drop(data_name)
+        self.watermarks.reset(data_name)
+
+    def _stream_endpoint(self, data_name: str, endpoint: str, start_date: str, end_date: str,
+                         incremental: bool = False, resume: bool = False, rebuild: bool = False) -> int:
+        """Stream one endpoint into the Parquet store; returns rows ingested"""
+        logging.info(f"Streaming {data_name} ...")
+        started = time.monotonic()
+        checkpoint, params, watermark = self._open_checkpoint(
+            data_name, endpoint, start_date, end_date, incremental, resume, 'stream'
+        )
+        writer = self._stream_paginated_request(data_name, endpoint, params, checkpoint=checkpoint)
+        self.rows_fetched[data_name] = writer.rows
+        if writer.rows == 0:
+            writer.abort()
+            checkpoint.clear()
+            logging.info(f"✅ {data_name}: no new rows" + (f" after {watermark}" if watermark else ""))
+            return 0
+
+        if rebuild and watermark is None:
+            self._drop_stored(data_name)
+        self._commit_streams(data_name, [writer], upsert=watermark is not None)
+        checkpoint.clear()
+        logging.info(f"✅ {data_name}: {writer.rows} rows streamed ({time.monotonic() - started:.1f}s)")
+        return writer.rows
+
+    def _commit_streams(self, data_name: str, writers: List[Any], upsert: bool = False):
+        """Commit staged pages, mirror the touched months into the warehouse and rebuild the CSV"""
+        for writer in writers:
+            if writer.rows == 0:
+                writer.abort()
+                continue
+            writer.commit(upsert=upsert)
+            for month in self.parquet_store.iter_partitions(data_name, months=writer.committed_months):
+                self.warehouse.upsert(data_name, month)
+            self.watermarks.update(data_name, writer.max_record_date)
+            self._note_ingested(data_name, writer.min_record_date, writer.max_record_date)
+        # Legacy CSV is rebuilt partition by partition, never held in memory whole
+        if self.parquet_store.has(data_name):
+            filepath = self.data_dir / f"{data_name}.csv"
+            rows = self.parquet_store.export_csv(data_name, filepath)
+            first, last, _ = self.warehouse.coverage(data_name)
+            self.catalog.register(data_name, filepath, start_date=first, end_date=last, row_count=rows,
+                                  schema=schema_version(pd.read_csv(filepath, nrows=0).columns))
+
+    def _note_ingested(self, data_name: str, first: str, last: str):
+        """Widen this run's ingested record_date range for data_name"""
+        if data_name in self.ingested_ranges:
+            known_first, known_last = self.ingested_ranges[data_name]
+            first, last = min(first, known_first), max(last, known_last)
+        self.ingested_ranges[data_name] = (first, last)
+
+    def _run_endpoints(self, task: Callable[[str, str], Any], parallel: bool) -> Dict[str, Any]:
+        """Run task(data_name, endpoint) for every endpoint, isolating failures"""
+        results = {}
+        if parallel:
+            # All endpoints run at once; they share the rate limiter and request slots,
+            # so wall time tracks the slowest endpoint rather than the sum
+            with ThreadPoolExecutor(max_workers=len(self.detailed_endpoints)) as pool:
+                futures = {
+                    pool.submit(task, data_name, endpoint): data_name
+                    for data_name, endpoint in self.detailed_endpoints.items()
+                }
+                for future in as_completed(futures):
+                    data_name = futures[future]
+                    try:
+                        results[data_name] = future.result()
+                    except Exception as e:
+                        logging.error(f"❌ {data_name} data collection failed: {e}")
+                        self.collection_errors[data_name] = str(e)
+            # Keep the declared endpoint order regardless of completion order
+            return {name: results[name] for name in self.detailed_endpoints if name in results}
+
+        for data_name, endpoint in self.detailed_endpoints.items():
+            try:
+                results[data_name] = task(data_name, endpoint)
+            except Exception as e:
+                logging.error(f"❌ {data_name} data collection failed: {e}")
+                self.collection_errors[data_name] = str(e)
+        return results
+
+    def _reset_run_stats(self):
+        self.collection_errors = {}
+        self.rows_fetched = {}
+        self.ingested_ranges = {}
+        self.client.reset_stats()
+        if self.response_cache is not None:
+            self.response_cache.reset_stats()
+
+    @staticmethod
+    def _default_window(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
         if end_date is None:
             end_date = datetime.now().strftime('%Y-%m-%d')
         if start_date is None:
             start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
+        return start_date, end_date
+
+    def collect_detailed_cash_flows(self, start_date: str = None, end_date: str = None,
+                                    parallel: Optional[bool] = None, incremental: bool = False,
+                                    resume: bool = False, rebuild: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Pull every detailed endpoint and merge it into the stored copies.
+
+        rebuild=True replaces each stored table with this window instead of merging.
+        """
+        logging.info("Starting detailed Treasury cash flow data collection...")
+        start_date, end_date = self._default_window(start_date, end_date)
+        if parallel is None:
+            parallel = self.parallel_endpoints
         
-        collected_data = {}
-        for data_name, endpoint in self.detailed_endpoints.items():
-            logging.info(f"Collecting {data_name} ...")
-            try:
-                params = {}
-                if 'dts' in endpoint:  # DTS datasets have record_date
-                    params['filter'] = f'record_date:gte:{start_date},record_date:lte:{end_date}'
-                    params['sort'] = 'record_date'
-                df = self._make_paginated_request(endpoint, params)
-
-                if not df.empty:
-                    # Save raw
-                    filepath = self.data_dir / f"{data_name}.csv"
-                    df.to_csv(filepath, index=False)
-                    collected_data[data_name] = df
-                    logging.info(f"✅ {data_name}: {len(df)} rows saved")
-                else:
-                    logging.warning(f"❌ {data_name}: No data")
-            except Exception as e:
-                logging.error(f"❌ {data_name} data collection failed: {e}")
-        return collected_data
+        self._reset_run_stats()
+        results = self._run_endpoints(
+            lambda data_name, endpoint: self._collect_endpoint(data_name, endpoint, start_date, end_date,
+                                                            incremental, resume, rebuild),
+            parallel
+        )
+        return {name: df for name, df in results.items() if not df.empty}
+
+    def stream_detailed_cash_flows(self, start_date: str = None, end_date: str = None,
+                                   parallel: Optional[bool] = None, incremental: bool = False,
+                                   resume: bool = False, rebuild: bool = False) -> Dict[str, int]:
+        """Streaming variant of collect_detailed_cash_flows; returns rows ingested per endpoint"""
+        logging.info("Starting streaming Treasury data ingest...")
+        start_date, end_date = self._default_window(start_date, end_date)
+        if parallel is None:
+            parallel = self.parallel_endpoints
+
+        self._reset_run_stats()
+        return self._run_endpoints(
+            lambda data_name, endpoint: self._stream_endpoint(data_name, endpoint, start_date, end_date,
+                                                           incremental, resume, rebuild),
+            parallel
+        )
+
+    def backfill_detailed_cash_flows(self, start_date: str = None, end_date: str = None,
+                                     freq: str = 'year', resume: bool = False,
+                                     stream: Optional[bool] = None) -> Dict[str, Any]:
+        """Sharded historical pull (see backfill.BackfillPlanner); start_date defaults to the first DTS date"""
+        logging.info("Starting sharded Treasury backfill...")
+        self._reset_run_stats()
+        return BackfillPlanner(self, freq=freq).run(start_date, end_date, resume=resume, stream=stream)
+
+    def load_analysis_tables(self, data_names: List[str]) -> Dict[str, pd.DataFrame]:
+        """Read back only the tables and columns the analysis steps use"""
+        tables = {}
+        for data_name, columns in self.analysis_columns.items():
+            if data_name in data_names and self.parquet_store.has(data_name):
+                tables[data_name] = self.parquet_store.read(data_name, columns=columns)
+        return tables
 
     # ---------- Analysis ----------
     def analyze_tga_balance(self, data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
@@ -291,25 +797,18 @@ class EnhancedTreasuryCollector:
         if 'deposits_withdrawals_operating_cash' not in data:
             return result
         
-        df = data['deposits_withdrawals_operating_cash'].copy()
-        # TGA only
-        tga = df[df['account_type'] == 'Treasury General Account (TGA)'].copy()
+        df = data['deposits_withdrawals_operating_cash']
+        # TGA only, subtotal/transfer lines excluded BEFORE categorization (one selection, one copy)
+        is_tga = (df['account_type'] == 'Treasury General Account (TGA)').to_numpy()
+        tga = self.categorizer.categorize(df, row_mask=is_tga)
         if tga.empty:
             return result
 
-        # Exclude subtotal/transfer BEFORE categorization
-        tga = self._filter_detail_transactions(tga)
-
         # Split by type
-        for txn_type, name in [('Deposits', 'deposits'), ('Withdrawals', 'withdrawals')]:
-            sub = tga[tga['transaction_type'] == txn_type].copy()
-            if sub.empty:
-                continue
-            sub['transaction_group'] = sub['transaction_catg'].map(self.category_mapping).fillna('Other')
-            result[name] = sub
+        result = self.categorizer.split(tga, {'Deposits': 'deposits', 'Withdrawals': 'withdrawals'})
 
         # Diagnostics: unmapped categories (optional)
-        unmapped = sorted(set(tga['transaction_catg']) - set(self.category_mapping.keys()))
+        unmapped = self.categorizer.unmapped(tga['transaction_catg'])
         if unmapped:
             logging.info(f"ℹ️ Unmapped categories (showing up to 20): {unmapped[:20]}")
         return result
@@ -331,7 +830,7 @@ class EnhancedTreasuryCollector:
             result['subtotal_categories_found'] = found_subtotals['transaction_catg'].unique().tolist()
             result['subtotal_records_count'] = len(found_subtotals)
             if 'transaction_today_amt' in found_subtotals.columns:
-                subtotal_impact = found_subtotals.groupby(['record_date', 'transaction_type'])['transaction_today_amt'].sum()
+                subtotal_impact = found_subtotals.groupby(['record_date', 'transaction_type'], observed=True)['transaction_today_amt'].sum()
                 impact_dict = {}
                 for (date, txn_type), amount in subtotal_impact.head(10).items():
                     key = f"{pd.to_datetime(date).date()}_{txn_type}"
@@ -340,54 +839,90 @@ class EnhancedTreasuryCollector:
         result['total_records_count'] = len(df)
         return result
 
-    def generate_daily_cash_flows_file(self, raw_data: Dict[str, pd.DataFrame]) -> bool:
-        """Generate daily cash flows file for forecasting models"""
-        if 'deposits_withdrawals_operating_cash' not in raw_data:
-            logging.warning("⚠️ No deposits/withdrawals data available for daily cash flows generation")
-            return False
-        
-        df = raw_data['deposits_withdrawals_operating_cash']
-        # Filter for TGA only
-        tga_data = df[df['account_type'] == 'Treasury General Account (TGA)'].copy()
-        
-        if tga_data.empty:
-            logging.warning("⚠️ No TGA data found for daily cash flows generation")
-            return False
-        
-        # Convert and clean data
-        tga_data['record_date'] = pd.to_datetime(tga_data['record_date'])
-        tga_data['transaction_today_amt'] = pd.to_numeric(tga_data['transaction_today_amt'], errors='coerce')
-        tga_data = tga_data.dropna(subset=['transaction_today_amt'])
-        
-        # Create daily summary
-        daily_summary = tga_data.groupby(['record_date', 'transaction_type'])['transaction_today_amt'].sum().reset_index()
-        
-        # Save to file
-        output_file = self.data_dir / "daily_cash_flows_2023-06-29_to_2025-06-28.csv"
-        daily_summary.to_csv(output_file, index=False)
-        
-        logging.info(f"✅ Daily cash flows file generated: {len(daily_summary)} records saved")
+    def update_daily_cash_flows(self) -> bool:
+        """Apply this run's newly ingested deposits/withdrawals days to daily_cash_flows (see daily_flows.py)"""
+        table = DailyFlowTable(self.data_dir, self.warehouse)
+        window = self.ingested_ranges.get('deposits_withdrawals_operating_cash')
+        if window is None:
+            if self.warehouse.has(DAILY_FLOWS):
+                logging.info("ℹ️  No new deposits/withdrawals days; daily_cash_flows unchanged")
+                return True
+            return table.rebuild() > 0
+        if not self.warehouse.has(DAILY_FLOWS):
+            return table.rebuild() > 0
+        table.refresh(*window)
         return True
 
-    def collect_all_enhanced_data(self, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    def update_flow_cube(self) -> int:
+        """Apply this run's newly ingested deposits/withdrawals days to the flow cube (see flow_cube.py)"""
+        cube = FlowCube(self.data_dir, self.warehouse)
+        window = self.ingested_ranges.get('deposits_withdrawals_operating_cash')
+        if not cube.compatible(self.categorizer):
+            return cube.rebuild(self.categorizer)
+        if window is None:
+            return 0
+        return cube.refresh(self.categorizer, *window)
+
+    def collect_all_enhanced_data(self, start_date: str = None, end_date: str = None,
+                                  incremental: bool = False, stream: Optional[bool] = None,
+                                  resume: bool = False, backfill: Optional[str] = None,
+                                  rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Collect, analyze and summarize.
+
+        Pulled windows are merged into the stored tables; rebuild=True replaces them.
+
+        backfill='year' / 'quarter' replaces the single windowed pull with a sharded
+        historical backfill (start_date defaults to the first DTS date).
+        """
         logging.info("Starting enhanced Treasury data collection and analysis...")
-        raw_data = self.collect_detailed_cash_flows(start_date, end_date)
+        if stream is None:
+            stream = self.stream_to_disk
+        stream = bool(stream and self.parquet_store.available)
+        if backfill:
+            start_date = start_date or DTS_HISTORY_START
+            collected = self.backfill_detailed_cash_flows(start_date, end_date, freq=backfill,
+                                                          resume=resume, stream=stream)
+            datasets_collected = list(collected)
+            raw_data = self.load_analysis_tables(datasets_collected) if stream else collected
+        elif stream:
+            # Raw tables stay on disk; only the analysis columns are read back
+            ingested = self.stream_detailed_cash_flows(start_date, end_date, incremental=incremental,
+                                                       resume=resume, rebuild=rebuild)
+            datasets_collected = [name for name in ingested if self.parquet_store.has(name)]
+            raw_data = self.load_analysis_tables(datasets_collected)
+        else:
+            raw_data = self.collect_detailed_cash_flows(start_date, end_date, incremental=incremental,
+                                                        resume=resume, rebuild=rebuild)
+            datasets_collected = list(raw_data.keys())
         tga_balance = self.analyze_tga_balance(raw_data)
         categorized_flows = self.categorize_cash_flows(raw_data)
         subtotal_check = self.check_subtotal_presence(raw_data)
         
-        # Generate daily cash flows file for forecasting models
-        daily_flows_created = self.generate_daily_cash_flows_file(raw_data)
+        # Bring the forecasting input up to date (only the days ingested by this run)
+        daily_flows_created = self.update_daily_cash_flows()
+        flow_cube_days = self.update_flow_cube()
         
         summary = {
             'collection_timestamp': datetime.now().isoformat(),
             'date_range': {'start_date': start_date, 'end_date': end_date},
-            'datasets_collected': list(raw_data.keys()),
+            'incremental': incremental,
+            'rebuild': rebuild,
+            'backfill': backfill,
+            'rows_fetched': dict(self.rows_fetched),
+            'watermarks': self.watermarks.as_dict(),
+            'http_cache': self.response_cache.stats() if self.response_cache is not None else None,
+            'http_client': self.client.stats(),
+            'datasets_collected': datasets_collected,
+            'streamed': bool(stream),
+            'datasets_failed': dict(self.collection_errors),
+            'resumable': self.checkpoints.pending(),
             'tga_balance_records': int(len(tga_balance)) if isinstance(tga_balance, pd.DataFrame) else 0,
             'categorized_flows': list(categorized_flows.keys()),
             'category_mapping_size': len(self.category_mapping),
             'subtotal_check': subtotal_check,
-            'daily_cash_flows_generated': daily_flows_created
+            'daily_cash_flows_generated': daily_flows_created,
+            'flow_cube_days_refreshed': flow_cube_days
         }
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         summary_file = self.data_dir / f"enhanced_treasury_summary_{timestamp}.json"
@@ -410,7 +945,6 @@ class EnhancedTreasuryCollector:
 
 def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-    collector = EnhancedTreasuryCollector()
     end_date = datetime.now().strftime('%Y-%m-%d')
     start_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
     
@@ -418,7 +952,8 @@ def main():
     print(f"📅 Date range: {start_date} to {end_date}")
     print("=" * 60)
     
-    all_data = collector.collect_all_enhanced_data(start_date, end_date)
+    with EnhancedTreasuryCollector() as collector:
+        all_data = collector.collect_all_enhanced_data(start_date, end_date)
     
     print("\n✅ Data collection completed!")
     print("=" * 60)
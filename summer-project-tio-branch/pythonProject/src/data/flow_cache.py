@@ -0,0 +1,89 @@
+"""
+Flow Cache - memoized parsed daily flows keyed on source file fingerprints
+- fingerprint(*paths) = (path, size, mtime_ns) of each source file; any rewrite changes it
+- Process-wide LRU (shared by every FlowCache) so one run parses each source once
+- On-disk pickles under <cache_dir> survive across runs; entries for an older
+  fingerprint of the same source are removed when a new one is written
+- Callers always receive a copy, so mutating a result never corrupts the cache
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, Tuple
+
+import pandas as pd
+
+_MEMORY: 'OrderedDict[Hashable, pd.DataFrame]' = OrderedDict()
+_MEMORY_LOCK = threading.Lock()
+MEMORY_ENTRIES = 16
+
+
+def fingerprint(*paths) -> Tuple:
+    """(resolved path, size, mtime_ns) per file; missing files fingerprint as (path, None, None)"""
+    prints = []
+    for path in paths:
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+            prints.append((str(path), stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            prints.append((str(path), None, None))
+    return tuple(prints)
+
+
+class FlowCache:
+    """get(label, key, build): memory LRU -> pickle in cache_dir -> build()"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def _file(self, label: str, key: Hashable) -> Path:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return self.cache_dir / f"{label}-{digest}.pkl"
+
+    def get(self, label: str, key: Hashable, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """label names the source/query (one disk entry per label); key must include its fingerprint"""
+        label = re.sub(r'[^A-Za-z0-9_.]+', '_', label)  # '-' separates label and digest
+        memory_key = (str(self.cache_dir), label, key)
+        with _MEMORY_LOCK:
+            if memory_key in _MEMORY:
+                _MEMORY.move_to_end(memory_key)
+                return _MEMORY[memory_key].copy()
+
+        cache_file = self._file(label, key)
+        df = None
+        if cache_file.exists():
+            try:
+                df = pd.read_pickle(cache_file)
+            except Exception as e:  # truncated or written by an incompatible pandas
+                logging.warning(f"⚠️ Ignoring unreadable flow cache {cache_file.name}: {e}")
+        if df is None:
+            df = build()
+            self._store(label, cache_file, df)
+
+        with _MEMORY_LOCK:
+            _MEMORY[memory_key] = df
+            _MEMORY.move_to_end(memory_key)
+            while len(_MEMORY) > MEMORY_ENTRIES:
+                _MEMORY.popitem(last=False)
+        return df.copy()
+
+    def _store(self, label: str, cache_file: Path, df: pd.DataFrame):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for stale in self.cache_dir.glob(f"{label}-*.pkl"):
+                stale.unlink(missing_ok=True)
+            tmp_file = cache_file.with_suffix('.tmp')
+            df.to_pickle(tmp_file)
+            tmp_file.replace(cache_file)
+        except OSError as e:  # read-only data dir: memory cache still applies
+            logging.warning(f"⚠️ Could not write flow cache {cache_file}: {e}")
+
+
+def clear_memory_cache():
+    with _MEMORY_LOCK:
+        _MEMORY.clear()
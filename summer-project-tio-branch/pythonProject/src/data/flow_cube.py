@@ -0,0 +1,281 @@
+"""
+Flow Cube - dense business date x transaction group x direction array of TGA flows
+- values.f64 is a memory-mapped float64 array [date, group, direction] under
+  data/raw/flow_cube/; index.json holds the maps (origin date, groups, directions)
+- Date index is arithmetic: row = business days since origin (np.busday_count), so
+  lookups are O(1); DTS holidays stay zero rows with reported=0, weekend rows never exist
+- Group axis = the categorizer's transaction groups plus a trailing TOTAL slot that
+  is kept summed, so per-day totals are a view like any other group
+- refresh(start, end) re-aggregates only those days from the warehouse copy of
+  deposits_withdrawals_operating_cash (same categorization as the collector);
+  the file grows geometrically when new days arrive
+- Readers get array views: category slices and roll-ups never go through a groupby
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.daily_flows import SOURCE, TGA_ACCOUNT
+from src.data.warehouse import TreasuryWarehouse
+
+CUBE_DIR = 'flow_cube'
+DIRECTIONS = ('deposits', 'withdrawals')
+TRANSACTION_TYPES = {'Deposits': 0, 'Withdrawals': 1}
+TOTAL = 'Total'
+# Rows reserved per growth step (about one year of business days)
+GROWTH_ROWS = 261
+VERSION = 1
+
+DateLike = Union[str, pd.Timestamp, np.datetime64]
+
+
+def _day(date: DateLike) -> np.datetime64:
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+
+class FlowCube:
+    """Memory-mapped date x group x direction flow totals (see module docstring)"""
+
+    def __init__(self, data_dir="./data/raw", warehouse: Optional[TreasuryWarehouse] = None):
+        self.data_dir = Path(data_dir)
+        self.root = self.data_dir / CUBE_DIR
+        self._warehouse = warehouse
+        self._owns_warehouse = False
+        self.index_file = self.root / 'index.json'
+        self.values_file = self.root / 'values.f64'
+        self.reported_file = self.root / 'reported.u1'
+        self._index: Optional[Dict] = None
+
+    @property
+    def warehouse(self) -> TreasuryWarehouse:
+        if self._warehouse is None:
+            self._warehouse = TreasuryWarehouse.for_data_dir(self.data_dir)
+            self._owns_warehouse = True
+        return self._warehouse
+
+    def close(self):
+        """Close the warehouse if it was opened here (a shared one stays with its owner)"""
+        if self._owns_warehouse:
+            self._warehouse.close()
+            self._warehouse, self._owns_warehouse = None, False
+
+    def __enter__(self) -> 'FlowCube':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Index ----------
+    @property
+    def exists(self) -> bool:
+        return self.index_file.exists() and self.values_file.exists()
+
+    @property
+    def index(self) -> Dict:
+        if self._index is None:
+            if not self.exists:
+                raise FileNotFoundError(f"Flow cube not built yet: {self.root}")
+            self._index = json.loads(self.index_file.read_text())
+        return self._index
+
+    @property
+    def origin(self) -> np.datetime64:
+        return np.datetime64(self.index['origin'], 'D')
+
+    @property
+    def n_dates(self) -> int:
+        return self.index['n_dates']
+
+    @property
+    def groups(self) -> pd.Index:
+        """Transaction groups, TOTAL last"""
+        return pd.Index(self.index['groups'])
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        """Business dates covered, one per row"""
+        if self.n_dates == 0:
+            return pd.DatetimeIndex([])
+        return pd.bdate_range(pd.Timestamp(self.origin), periods=self.n_dates)
+
+    def date_index(self, date: DateLike) -> int:
+        """Row of a business date (a weekend date gives the following Monday's row)"""
+        return int(np.busday_count(self.origin, _day(date)))
+
+    def compatible(self, categorizer) -> bool:
+        """Built with this layout and group axis (otherwise a rebuild is needed)"""
+        return (self.exists and self.index.get('version') == VERSION
+                and self.index['groups'] == list(categorizer.groups) + [TOTAL])
+
+    def group_index(self, group: str) -> int:
+        return self.index['group_ids'][group]
+
+    def _write_index(self, index: Dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        index = dict(index, group_ids={g: i for i, g in enumerate(index['groups'])})
+        tmp_file = self.index_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(index, indent=2))
+        tmp_file.replace(self.index_file)
+        self._index = index
+
+    # ---------- Arrays ----------
+    def _open(self, mode: str = 'r') -> Tuple[np.memmap, np.memmap]:
+        shape = (self.index['capacity'], len(self.index['groups']), len(DIRECTIONS))
+        values = np.memmap(self.values_file, dtype=np.float64, mode=mode, shape=shape)
+        reported = np.memmap(self.reported_file, dtype=np.uint8, mode=mode, shape=shape[:1])
+        return values, reported
+
+    def _allocate(self, origin: np.datetime64, groups: List[str], n_dates: int, shift: int = 0):
+        """(Re)allocate the arrays for [origin, origin + n_dates) and copy existing rows down by shift"""
+        capacity = (n_dates // GROWTH_ROWS + 1) * GROWTH_ROWS
+        shape = (capacity, len(groups), len(DIRECTIONS))
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_values = self.values_file.with_suffix('.tmp')
+        tmp_reported = self.reported_file.with_suffix('.tmp')
+        values = np.memmap(tmp_values, dtype=np.float64, mode='w+', shape=shape)
+        reported = np.memmap(tmp_reported, dtype=np.uint8, mode='w+', shape=shape[:1])
+        if self.exists and self.index['groups'] == groups:
+            old_values, old_reported = self._open('r')
+            used = self.n_dates
+            values[shift:shift + used] = old_values[:used]
+            reported[shift:shift + used] = old_reported[:used]
+            del old_values, old_reported
+        values.flush()
+        reported.flush()
+        del values, reported
+        tmp_values.replace(self.values_file)
+        tmp_reported.replace(self.reported_file)
+        self._write_index({'version': VERSION, 'origin': str(origin), 'n_dates': n_dates,
+                           'capacity': capacity, 'groups': groups, 'directions': list(DIRECTIONS)})
+
+    def _cover(self, first: np.datetime64, last: np.datetime64, groups: List[str]):
+        """Make sure rows exist for [first, last] with this group axis"""
+        if not self.exists or self.index['groups'] != groups or self.index.get('version') != VERSION:
+            self._allocate(first, groups, int(np.busday_count(first, last)) + 1)
+            return
+        origin, n_dates = self.origin, self.n_dates
+        new_origin = min(origin, first)
+        shift = int(np.busday_count(new_origin, origin))
+        needed = max(shift + n_dates, int(np.busday_count(new_origin, last)) + 1)
+        if shift or needed > self.index['capacity']:
+            self._allocate(new_origin, groups, needed, shift)
+        elif needed > n_dates:
+            self._write_index(dict(self.index, n_dates=needed))
+
+    # ---------- Maintenance ----------
+    def apply(self, df: pd.DataFrame, categorizer, start_date: Optional[str] = None,
+              end_date: Optional[str] = None) -> int:
+        """
+        Replace the rows of [start_date, end_date] (default: the days present in df)
+        with the categorized TGA flows in df. Returns the number of days written.
+        """
+        groups = list(categorizer.groups) + [TOTAL]
+        df = df[df['transaction_type'].isin(list(TRANSACTION_TYPES)).to_numpy()]
+        tga = categorizer.categorize(df, row_mask=(df['account_type'] == TGA_ACCOUNT).to_numpy())
+        days = pd.to_datetime(tga['record_date']).to_numpy().astype('datetime64[D]')
+        on_business_day = np.is_busday(days)
+        if not on_business_day.all():
+            logging.warning(f"⚠️ Flow cube: skipping {int((~on_business_day).sum())} rows dated on weekends")
+            tga, days = tga[on_business_day], days[on_business_day]
+        first = _day(start_date) if start_date else (days.min() if len(days) else None)
+        last = _day(end_date) if end_date else (days.max() if len(days) else None)
+        if first is None or last is None:
+            return 0
+        first = np.busday_offset(first, 0, roll='forward')
+        last = np.busday_offset(last, 0, roll='backward')
+        if first > last:
+            return 0
+        in_window = (days >= first) & (days <= last)
+        tga, days = tga[in_window], days[in_window]
+        self._cover(first, last, groups)
+
+        values, reported = self._open('r+')
+        window = self._rows(first, last)
+        values[window] = 0.0
+        reported[window] = 0
+        rows = np.busday_count(self.origin, days)
+        group_codes = tga['transaction_group'].cat.codes.to_numpy()
+        directions = pd.Index(list(TRANSACTION_TYPES)).get_indexer(tga['transaction_type'])
+        amounts = pd.to_numeric(tga['transaction_today_amt'], errors='coerce').fillna(0).to_numpy(np.float64)
+        np.add.at(values, (rows, group_codes, directions), amounts)
+        reported[np.unique(rows)] = 1
+        # TOTAL slot = sum over the real groups for the rewritten rows
+        values[window, -1] = values[window, :-1].sum(axis=1)
+        values.flush()
+        reported.flush()
+        written = int(reported[window].sum())
+        del values, reported
+        return written
+
+    def refresh(self, categorizer, start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """Re-aggregate the days in [start_date, end_date] from the warehouse (whole history when both are None)"""
+        if not self.warehouse.has(SOURCE):
+            return 0
+        if self.exists and not self.compatible(categorizer):
+            logging.info("ℹ️  Flow cube layout or transaction groups changed, rebuilding")
+            return self.rebuild(categorizer)
+        df = self.warehouse.query(
+            SOURCE, columns=['record_date', 'account_type', 'transaction_type', 'transaction_catg',
+                             'transaction_today_amt'],
+            where={'account_type': TGA_ACCOUNT}, start_date=start_date, end_date=end_date
+        )
+        days = self.apply(df, categorizer, start_date, end_date)
+        window = f"{start_date or '…'} → {end_date or '…'}"
+        logging.info(f"✅ flow cube: {days} business days refreshed ({window})")
+        return days
+
+    def rebuild(self, categorizer) -> int:
+        """Full rebuild from the raw endpoint (first run, mapping change or repair)"""
+        if not self.warehouse.ensure_table(self.data_dir, SOURCE):
+            return 0
+        for path in (self.index_file, self.values_file, self.reported_file):
+            path.unlink(missing_ok=True)
+        self._index = None
+        return self.refresh(categorizer)
+
+    # ---------- Views ----------
+    def _rows(self, start_date: Optional[DateLike], end_date: Optional[DateLike]) -> slice:
+        lo = max(0, self.date_index(start_date)) if start_date is not None else 0
+        hi = self.n_dates
+        if end_date is not None:
+            hi = min(hi, int(np.busday_count(self.origin, np.busday_offset(_day(end_date), 0, roll='backward'))) + 1)
+        return slice(lo, max(lo, hi))
+
+    def array(self, start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None) -> np.ndarray:
+        """Read-only [date, group, direction] view of a date range (no copy)"""
+        values, _ = self._open('r')
+        return values[self._rows(start_date, end_date)]
+
+    def reported(self, start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None) -> np.ndarray:
+        """True for rows with a published DTS (False on holidays and not-yet-ingested days)"""
+        _, reported = self._open('r')
+        return reported[self._rows(start_date, end_date)].astype(bool)
+
+    def series(self, group: str = TOTAL, direction: Optional[str] = None,
+               start_date: Optional[DateLike] = None, end_date: Optional[DateLike] = None) -> np.ndarray:
+        """One group over time: [date, direction] view, or [date] view for a single direction"""
+        view = self.array(start_date, end_date)[:, self.group_index(group)]
+        return view if direction is None else view[:, DIRECTIONS.index(direction)]
+
+    def net(self, group: str = TOTAL, start_date: Optional[DateLike] = None,
+            end_date: Optional[DateLike] = None) -> np.ndarray:
+        """Deposits - withdrawals for one group"""
+        view = self.series(group, start_date=start_date, end_date=end_date)
+        return view[:, 0] - view[:, 1]
+
+    def frame(self, direction: Optional[str] = None, start_date: Optional[DateLike] = None,
+              end_date: Optional[DateLike] = None, reported_only: bool = True) -> pd.DataFrame:
+        """Dates x groups (net flow, or one direction) for pandas consumers; holidays dropped by default"""
+        rows = self._rows(start_date, end_date)
+        cube = self.array(start_date, end_date)
+        data = cube[:, :, 0] - cube[:, :, 1] if direction is None else cube[:, :, DIRECTIONS.index(direction)]
+        df = pd.DataFrame(data, index=self.dates[rows], columns=self.groups, copy=False)
+        df.index.name, df.columns.name = 'record_date', 'transaction_group'
+        if reported_only:
+            df = df[self.reported(start_date, end_date)]
+        return df
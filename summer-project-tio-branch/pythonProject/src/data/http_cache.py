@@ -0,0 +1,128 @@
+"""
+HTTP Response Cache - on-disk page cache for the fiscal-data API
+- Keyed by endpoint + normalized query params (filter, sort, page[size], page[number], ...)
+- Historical pages are immutable and never expire
+- Pages that touch the current month expire after a short TTL and are revalidated
+  with ETag / Last-Modified when the server provides them; so do page 1 (it carries
+  meta.total-pages) and the last page of a window that is still open
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """Persistent cache of decoded API pages"""
+
+    def __init__(self, cache_dir: Path, ttl_seconds: float = 900):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # ---------- Keys ----------
+    @staticmethod
+    def normalize_params(params: Dict[str, Any]) -> Dict[str, str]:
+        """Stringify and sort params so equivalent requests share one key"""
+        return {str(k): str(v) for k, v in sorted(params.items())}
+
+    def _path_for(self, endpoint: str, params: Dict[str, Any]) -> Path:
+        key = json.dumps({'endpoint': endpoint, 'params': self.normalize_params(params)}, sort_keys=True)
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    # ---------- Lookup ----------
+    def lookup(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cache entry (fresh or stale) or None; callers check entry['fresh']"""
+        path = self._path_for(endpoint, params)
+        if not path.exists():
+            self._count('misses')
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+        entry['fresh'] = entry['immutable'] or (time.time() - entry['stored_at']) < self.ttl_seconds
+        self._count('hits' if entry['fresh'] else 'stale')
+        return entry
+
+    def validators(self, entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry"""
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # ---------- Store ----------
+    def store(self, endpoint: str, params: Dict[str, Any], body: Dict[str, Any],
+              etag: str = None, last_modified: str = None):
+        entry = {
+            'endpoint': endpoint,
+            'params': self.normalize_params(params),
+            'stored_at': time.time(),
+            'immutable': self._is_immutable(params, body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+        }
+        path = self._path_for(endpoint, params)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        tmp_path.replace(path)
+        self._count('stores')
+
+    def touch(self, endpoint: str, params: Dict[str, Any], entry: Dict[str, Any]):
+        """Server confirmed a stale entry is unchanged (304): restart its TTL"""
+        self.store(endpoint, params, entry['body'], entry.get('etag'), entry.get('last_modified'))
+        self._count('revalidated')
+
+    @staticmethod
+    def _window_closed(params: Dict[str, Any], month_start: str) -> bool:
+        """The record_date filter has an upper bound before the current month"""
+        upper = None
+        for cond in str(params.get('filter', '')).split(','):
+            parts = cond.split(':')
+            if len(parts) == 3 and parts[0] == 'record_date' and parts[1] in ('lt', 'lte'):
+                upper = parts[2]
+        return upper is not None and upper < month_start
+
+    @classmethod
+    def _is_immutable(cls, params: Dict[str, Any], body: Dict[str, Any]) -> bool:
+        """A page is historical when it cannot change once Treasury publishes new days"""
+        month_start = date.today().replace(day=1).isoformat()
+        dates = [r.get('record_date') for r in body.get('data', []) if r.get('record_date')]
+        if not dates or max(dates) >= month_start:
+            return False
+        if cls._window_closed(params, month_start):
+            return True
+        # Open-ended window: page 1 carries meta.total-pages and the last page grows as new
+        # days are appended; with a descending sort every page shifts
+        first_page = str(params.get('page[number]', 1)) == '1'
+        last_page = not body.get('links', {}).get('next')
+        descending = str(params.get('sort', '')).startswith('-')
+        return not (first_page or last_page or descending)
+
+    # ---------- Stats ----------
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'stores': 0}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,330 @@
+"""
+Parquet Store - columnar storage for raw DTS tables
+- One hive-partitioned dataset per endpoint: <root>/<data_name>/year=YYYY/month=M/*.parquet
+- Writes replace the frame's record_date range inside the year/month partitions it
+  touches; days of those months outside the range are kept
+- Reads support column projection and record_date range predicates, so partitions
+  outside the requested range are never opened
+- Streaming writer: page batches go to a staging dataset as they arrive and are
+  committed partition by partition, so memory stays bounded by a few pages
+- Falls back to the legacy <data_name>.csv files when pyarrow is not installed
+- Labels are stored as plain strings (one schema across partitions); the declared
+  dtypes from schemas.py are restored on read
+"""
+
+import logging
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+
+from src.data.record_merge import upsert_records
+from src.data.schemas import apply_schema
+
+PARTITION_COLUMNS = ['year', 'month']
+
+
+class ParquetStore:
+    """Year/month partitioned Parquet datasets keyed by data_name"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def path_for(self, data_name: str) -> Path:
+        return self.root / data_name
+
+    def has(self, data_name: str) -> bool:
+        path = self.path_for(data_name)
+        return self.available and path.exists() and any(path.rglob('*.parquet'))
+
+    def partitions(self, data_name: str) -> List[Path]:
+        """Partition directories in chronological order"""
+        month_dirs = self.path_for(data_name).glob('year=*/month=*')
+        return sorted(month_dirs, key=lambda d: (int(d.parent.name.split('=')[1]), int(d.name.split('=')[1])))
+
+    # ---------- Write ----------
+    @staticmethod
+    def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """Typed frame with year/month partition columns"""
+        frame = df.copy()
+        frame['record_date'] = pd.to_datetime(frame['record_date'], errors='coerce')
+        frame = frame.dropna(subset=['record_date'])
+        for col in frame.columns:
+            dtype = frame[col].dtype
+            if dtype == object or isinstance(dtype, pd.CategoricalDtype):
+                # Object columns mix str/None across pages and category sets differ per
+                # page; pin both to string so every partition shares one schema
+                frame[col] = frame[col].astype('string')
+            elif pd.api.types.is_integer_dtype(dtype):
+                # A later page may carry NaN in the same column; Int64 is restored on read
+                frame[col] = frame[col].astype('float64')
+        frame['year'] = frame['record_date'].dt.year.astype('int16')
+        frame['month'] = frame['record_date'].dt.month.astype('int8')
+        return frame
+
+    @staticmethod
+    def _rows_outside(month_dir: Path, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Rows of an existing partition whose record_date lies outside [start, end]"""
+        existing = pq.read_table(str(month_dir)).to_pandas()
+        dates = pd.to_datetime(existing['record_date'], errors='coerce')
+        return existing[(dates < start) | (dates > end)]
+
+    def write(self, data_name: str, df: pd.DataFrame) -> bool:
+        """Replace df's record_date range in the year/month partitions it covers"""
+        if not self.available or df.empty or 'record_date' not in df.columns:
+            return False
+        frame = self._prepare_frame(df)
+        if frame.empty:
+            return False
+        start, end = frame['record_date'].min(), frame['record_date'].max()
+        kept = []
+        for year, month in frame[PARTITION_COLUMNS].drop_duplicates().itertuples(index=False):
+            month_dir = self.path_for(data_name) / f"year={year}" / f"month={month}"
+            if month_dir.exists() and any(month_dir.glob('*.parquet')):
+                kept.append(self._rows_outside(month_dir, start, end))
+        kept = [k for k in kept if not k.empty]
+        if kept:
+            frame = self._prepare_frame(pd.concat(kept + [frame.drop(columns=PARTITION_COLUMNS)], ignore_index=True))
+            frame = frame.sort_values('record_date', kind='stable')
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            root_path=str(self.path_for(data_name)),
+            partition_cols=PARTITION_COLUMNS,
+            existing_data_behavior='delete_matching',
+        )
+        return True
+
+    def drop(self, data_name: str):
+        """Remove a whole dataset (full rebuilds)"""
+        shutil.rmtree(self.path_for(data_name), ignore_errors=True)
+
+    def open_stream(self, data_name: str, staging_dir: Optional[Path] = None) -> 'ParquetStreamWriter':
+        """New stream, or reopen an interrupted one's staging_dir to keep its pages"""
+        return ParquetStreamWriter(self, data_name, staging_dir)
+
+    # ---------- Read ----------
+    @staticmethod
+    def _date_filter(start_date: Optional[str], end_date: Optional[str]):
+        """record_date predicate plus the matching year/month partition predicate"""
+        expr = None
+        year, month = ds.field('year'), ds.field('month')
+        if start_date is not None:
+            start = pd.Timestamp(start_date)
+            expr = ((year > start.year) | ((year == start.year) & (month >= start.month))) \
+                & (ds.field('record_date') >= pa.scalar(start.to_datetime64()))
+        if end_date is not None:
+            end = pd.Timestamp(end_date)
+            end_expr = ((year < end.year) | ((year == end.year) & (month <= end.month))) \
+                & (ds.field('record_date') <= pa.scalar(end.to_datetime64()))
+            expr = end_expr if expr is None else expr & end_expr
+        return expr
+
+    def read(self, data_name: str, columns: Optional[List[str]] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Read only the requested columns and record_date range"""
+        dataset = ds.dataset(str(self.path_for(data_name)), format='parquet', partitioning='hive')
+        if columns is not None:
+            columns = [c for c in columns if c in dataset.schema.names]
+        else:
+            columns = [c for c in dataset.schema.names if c not in PARTITION_COLUMNS]
+        table = dataset.to_table(columns=columns, filter=self._date_filter(start_date, end_date))
+        df = apply_schema(table.to_pandas(), data_name)
+        if 'record_date' in df.columns:
+            df = df.sort_values('record_date', kind='stable').reset_index(drop=True)
+        return df
+
+    def iter_partitions(self, data_name: str, columns: Optional[List[str]] = None,
+                        months: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield one month at a time in record_date order (bounded memory); months limits to 'year=Y/month=M' dirs"""
+        for month_dir in self.partitions(data_name):
+            if months is not None and f"{month_dir.parent.name}/{month_dir.name}" not in months:
+                continue
+            df = apply_schema(pq.read_table(str(month_dir), columns=columns).to_pandas(), data_name)
+            if 'record_date' in df.columns:
+                df = df.sort_values('record_date', kind='stable')
+            yield df
+
+    def export_csv(self, data_name: str, csv_file: Path) -> int:
+        """Rewrite the legacy CSV from the store one partition at a time"""
+        rows = 0
+        tmp_file = Path(csv_file).with_suffix('.csv.tmp')
+        with open(tmp_file, 'w', newline='') as f:
+            for df in self.iter_partitions(data_name):
+                df.to_csv(f, header=(rows == 0), index=False)
+                rows += len(df)
+        tmp_file.replace(csv_file)
+        return rows
+
+
+class ParquetStreamWriter:
+    """
+    Appends typed page batches to a staging dataset, then commits them into the store.
+
+    Nothing is visible to readers until commit(); abort() discards the staged pages.
+    Passing the staging_dir of an interrupted stream reopens it (see resume()).
+    """
+
+    def __init__(self, store: ParquetStore, data_name: str, staging_dir: Optional[Path] = None):
+        self.store = store
+        self.data_name = data_name
+        self.staging_dir = Path(staging_dir) if staging_dir else store.root / '.staging' / f"{data_name}-{uuid.uuid4().hex[:8]}"
+        self.schema = None
+        staged = sorted(self.staging_dir.rglob('*.parquet')) if self.staging_dir.exists() else []
+        if staged:
+            # Later pages must match the schema the staged pages were written with
+            schema = pq.read_schema(str(staged[0])).remove_metadata()
+            # Partition columns live in the directory names, not in the files
+            self.schema = schema.append(pa.field('year', pa.int16())).append(pa.field('month', pa.int8()))
+        self.rows = 0
+        self.min_record_date: Optional[str] = None
+        self.max_record_date: Optional[str] = None
+        self.committed_months: List[str] = []
+
+    def resume(self, rows: int, max_record_date: Optional[str], min_record_date: Optional[str] = None):
+        """Restore the counters of the pages already staged by an interrupted run"""
+        self.rows = rows
+        self.min_record_date = min_record_date
+        self.max_record_date = max_record_date
+
+    def write_batch(self, df: pd.DataFrame, seq: int):
+        """Write one page; seq keeps file names in page order"""
+        if df.empty or 'record_date' not in df.columns:
+            return
+        frame = self.store._prepare_frame(df)
+        if frame.empty:
+            return
+        if self.schema is None:
+            self.schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        table = pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        pq.write_to_dataset(
+            table,
+            root_path=str(self.staging_dir),
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"part-{seq:06d}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        self.rows += len(frame)
+        batch_min = frame['record_date'].min().strftime('%Y-%m-%d')
+        batch_max = frame['record_date'].max().strftime('%Y-%m-%d')
+        if self.min_record_date is None or batch_min < self.min_record_date:
+            self.min_record_date = batch_min
+        if self.max_record_date is None or batch_max > self.max_record_date:
+            self.max_record_date = batch_max
+
+    def commit(self, upsert: bool = False):
+        """
+        Move staged partitions into the live dataset.
+
+        upsert=False replaces the streamed record_date range inside each touched month
+        (full-window pulls); days of the month outside that range are kept.
+        upsert=True merges into existing months on the natural key (see record_merge.py).
+        """
+        live_root = self.store.path_for(self.data_name)
+        for staged in sorted(self.staging_dir.glob('year=*/month=*')):
+            target = live_root / staged.parent.name / staged.name
+            merged = None
+            if target.exists() and any(target.glob('*.parquet')):
+                incoming = pq.read_table(str(staged)).to_pandas()
+                if upsert:
+                    existing = pq.read_table(str(target)).to_pandas()
+                    merged = upsert_records(existing, incoming, self.data_name)
+                else:
+                    kept = self.store._rows_outside(target, pd.Timestamp(self.min_record_date),
+                                                    pd.Timestamp(self.max_record_date))
+                    if not kept.empty:
+                        merged = pd.concat([kept, incoming], ignore_index=True)
+                        merged = merged.sort_values('record_date', kind='stable').reset_index(drop=True)
+            if merged is not None:
+                shutil.rmtree(staged)
+                staged.mkdir(parents=True)
+                pq.write_table(pa.Table.from_pandas(merged, preserve_index=False), str(staged / 'part-000000-0.parquet'))
+            if target.exists():
+                shutil.rmtree(target)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            staged.rename(target)
+            self.committed_months.append(f"{staged.parent.name}/{staged.name}")
+        self.abort()
+
+    def abort(self):
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        try:
+            self.staging_dir.parent.rmdir()  # only succeeds once no other stream is staging
+        except OSError:
+            pass
+
+
+def load_dataset(data_dir, data_name: str, columns: Optional[List[str]] = None,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None,
+                 csv_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load a raw table from <data_dir>/parquet when available, else from its CSV.
+
+    csv_name overrides the legacy file name (defaults to <data_name>.csv).
+    Raises FileNotFoundError when neither source exists.
+    """
+    data_dir = Path(data_dir)
+    store = ParquetStore(data_dir / 'parquet')
+    if store.has(data_name):
+        return store.read(data_name, columns=columns, start_date=start_date, end_date=end_date)
+
+    csv_file = data_dir / (csv_name or f"{data_name}.csv")
+    if not csv_file.exists():
+        raise FileNotFoundError(f"Dataset not found: {data_name} ({csv_file})")
+    logging.debug(f"Parquet store missing {data_name}, reading {csv_file}")
+    usecols = (lambda c: c in columns) if columns is not None else None
+    df = apply_schema(pd.read_csv(csv_file, usecols=usecols), data_name)
+    if 'record_date' in df.columns:
+        if start_date is not None:
+            df = df[df['record_date'] >= pd.Timestamp(start_date)]
+        if end_date is not None:
+            df = df[df['record_date'] <= pd.Timestamp(end_date)]
+    return df.reset_index(drop=True)
+
+
+def migrate_csv_files(data_dir) -> List[str]:
+    """
+    Import existing raw CSVs into the Parquet store.
+
+    Date-stamped legacy names such as debt_outstanding_2023-06-29_to_2025-06-28.csv
+    are stored under their base name (debt_outstanding).
+    """
+    data_dir = Path(data_dir)
+    store = ParquetStore(data_dir / 'parquet')
+    if not store.available:
+        logging.warning("pyarrow is not installed; Parquet migration skipped")
+        return []
+    migrated = []
+    for csv_file in sorted(data_dir.glob('*.csv')):
+        data_name = re.sub(r'_\d{4}-\d{2}-\d{2}_to_\d{4}-\d{2}-\d{2}$', '', csv_file.stem)
+        df = pd.read_csv(csv_file)
+        if 'record_date' not in df.columns:
+            continue
+        if store.write(data_name, df):
+            migrated.append(data_name)
+            logging.info(f"✅ {csv_file.name} -> parquet/{data_name} ({len(df)} rows)")
+    return migrated
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    migrated = migrate_csv_files("./data/raw")
+    print(f"📦 Migrated {len(migrated)} datasets to ./data/raw/parquet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Record Merge - keyed upsert / de-duplication of DTS batches
+- Rows are identified by schemas.natural_key(): (record_date, account_type, transaction_type,
+  transaction_catg, src_line_nbr), limited to the columns a table has
+- upsert_records() merges an incoming batch in one vectorized pass: concat, drop every
+  key seen again later (incoming wins), stable sort by record_date
+- Tables without src_line_nbr fall back to replacing whole record_dates
+- Re-applying the same batch is a no-op, so overlapping incremental / sharded pulls are idempotent
+"""
+
+from typing import Optional
+
+import pandas as pd
+
+from src.data.schemas import natural_key
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    if 'record_date' in df.columns:
+        df = df.sort_values('record_date', kind='stable')
+    return df.reset_index(drop=True)
+
+
+def dedupe_records(df: pd.DataFrame, data_name: Optional[str] = None) -> pd.DataFrame:
+    """Keep the last row per natural key (df unchanged when the table has no usable key)"""
+    key = natural_key(df.columns, data_name)
+    if key is None or df.empty:
+        return df
+    duplicated = df.duplicated(subset=key, keep='last')
+    return df[~duplicated].reset_index(drop=True) if duplicated.any() else df
+
+
+def upsert_records(existing: pd.DataFrame, incoming: pd.DataFrame,
+                   data_name: Optional[str] = None) -> pd.DataFrame:
+    """Merge incoming into existing; incoming rows replace existing rows with the same key"""
+    if existing.empty:
+        return _sorted(dedupe_records(incoming, data_name))
+    if incoming.empty:
+        return existing
+    key = natural_key(set(existing.columns) & set(incoming.columns), data_name)
+    if key is None:
+        # No line identity: replace every record_date present in incoming
+        existing = existing[~existing['record_date'].isin(incoming['record_date'].unique())]
+        return _sorted(pd.concat([existing, incoming], ignore_index=True))
+    combined = pd.concat([existing, incoming], ignore_index=True)
+    return _sorted(combined[~combined.duplicated(subset=key, keep='last')])
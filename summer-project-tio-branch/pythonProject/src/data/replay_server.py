@@ -0,0 +1,271 @@
+"""
+Replay Server - local stand-in for api.fiscaldata.treasury.gov
+- Serves paginated JSON for every endpoint in EnhancedTreasuryCollector.detailed_endpoints
+- Records come from <data_dir>/<data_name>.csv when recorded, otherwise they are synthetic
+- Honours filter (gt/gte/lt/lte/eq), sort (record_date / -record_date), fields and page[size]/page[number]
+- Configurable latency, page size cap, 429 injection (with Retry-After) and 5xx injection
+- gzip when requested, ETag / If-None-Match revalidation
+"""
+
+import argparse
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.data.schemas import CATEGORY, ENDPOINT_SCHEMAS
+
+API_PREFIX = '/services/api/fiscal_service/'
+
+# Labels the analysis steps look for, so synthetic data exercises the same paths.
+# Each column cycles at the stride of the columns before it, so every combination
+# (TGA deposits, TGA withdrawals, ...) occurs
+SYNTHETIC_LABELS = {
+    'account_type': ['Treasury General Account (TGA)', 'Treasury General Account (TGA) Closing Balance'],
+    'transaction_type': ['Deposits', 'Withdrawals'],
+}
+
+
+@dataclass
+class ReplayConfig:
+    """Knobs for the replay server"""
+    latency: float = 0.05            # seconds added to every response
+    latency_jitter: float = 0.0      # extra uniform(0, jitter) seconds
+    max_page_size: Optional[int] = None  # cap on page[size] (None = honour the client)
+    rate_429: float = 0.0            # probability of answering 429
+    retry_after: float = 1.0         # Retry-After sent with injected 429s
+    error_rate: float = 0.0          # probability of answering 503
+    data_dir: Optional[str] = None   # recorded CSVs (<data_name>.csv)
+    synthetic_days: int = 500        # business days generated when nothing is recorded
+    rows_per_day: int = 40
+    seed: int = 0
+
+
+class ReplayDataset:
+    """Records for one endpoint, sorted by record_date for bisect filtering"""
+
+    def __init__(self, records: List[Dict[str, str]]):
+        self.records = sorted(records, key=lambda r: r.get('record_date', ''))
+        self.dates = [r.get('record_date', '') for r in self.records]
+
+    @classmethod
+    def from_csv(cls, csv_file: Path) -> 'ReplayDataset':
+        df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        df = df.replace('', 'null')  # the API sends the literal string "null"
+        return cls(df.to_dict('records'))
+
+    @classmethod
+    def synthetic(cls, data_name: str, config: ReplayConfig) -> 'ReplayDataset':
+        rng = random.Random(f"{config.seed}-{data_name}")
+        schema = ENDPOINT_SCHEMAS.get(data_name) or {'today_amt': 'Int64'}
+        end = datetime(2025, 6, 30)
+        days = pd.bdate_range(end=end, periods=config.synthetic_days).strftime('%Y-%m-%d')
+        strides, stride = {}, 1
+        for col, labels in SYNTHETIC_LABELS.items():
+            strides[col] = stride
+            stride *= len(labels)
+        records = []
+        for day in days:
+            for line in range(config.rows_per_day):
+                record = {'record_date': day}
+                for col, dtype in schema.items():
+                    if dtype == CATEGORY:
+                        labels = SYNTHETIC_LABELS.get(col)
+                        record[col] = (labels[line // strides[col] % len(labels)] if labels
+                                       else f"{col} {line % 25}")
+                    else:
+                        record[col] = str(rng.randint(0, 50000))
+                record['src_line_nbr'] = str(line + 1)
+                records.append(record)
+        return cls(records)
+
+    def query(self, filters: List[tuple], descending: bool) -> List[Dict[str, str]]:
+        lo, hi = 0, len(self.records)
+        others = []
+        for field, op, value in filters:
+            if field != 'record_date':
+                others.append((field, op, value))
+            elif op == 'gt':
+                lo = max(lo, bisect.bisect_right(self.dates, value))
+            elif op == 'gte':
+                lo = max(lo, bisect.bisect_left(self.dates, value))
+            elif op == 'lt':
+                hi = min(hi, bisect.bisect_left(self.dates, value))
+            elif op == 'lte':
+                hi = min(hi, bisect.bisect_right(self.dates, value))
+            elif op == 'eq':
+                lo = max(lo, bisect.bisect_left(self.dates, value))
+                hi = min(hi, bisect.bisect_right(self.dates, value))
+        rows = self.records[lo:hi] if lo < hi else []
+        for field, op, value in others:
+            rows = [r for r in rows if op == 'eq' and r.get(field) == value]
+        return rows[::-1] if descending else rows
+
+
+class ReplayServer:
+    """Threaded HTTP server; use as a context manager or start()/stop()"""
+
+    def __init__(self, endpoints: Dict[str, str], config: ReplayConfig = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.config = config or ReplayConfig()
+        self.datasets: Dict[str, ReplayDataset] = {}
+        data_dir = Path(self.config.data_dir) if self.config.data_dir else None
+        for data_name, endpoint in endpoints.items():
+            csv_file = data_dir / f"{data_name}.csv" if data_dir else None
+            if csv_file is not None and csv_file.exists():
+                self.datasets[endpoint] = ReplayDataset.from_csv(csv_file)
+            else:
+                self.datasets[endpoint] = ReplayDataset.synthetic(data_name, self.config)
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'bytes_sent': 0, 'injected_429': 0, 'injected_errors': 0, 'not_modified': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX.rstrip('/')}"
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"Replay server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _roll(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < probability
+
+    # ---------- Responses ----------
+    def build_page(self, endpoint: str, query: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        dataset = self.datasets.get(endpoint)
+        if dataset is None:
+            return None
+        filters = [tuple(cond.split(':', 2)) for cond in query.get('filter', '').split(',') if cond.count(':') >= 2]
+        rows = dataset.query(filters, descending=query.get('sort', '').startswith('-'))
+        page_size = int(query.get('page[size]', 100))
+        if self.config.max_page_size:
+            page_size = min(page_size, self.config.max_page_size)
+        page_number = max(1, int(query.get('page[number]', 1)))
+        total_pages = max(1, math.ceil(len(rows) / page_size))
+        page = rows[(page_number - 1) * page_size:page_number * page_size]
+        if query.get('fields'):
+            fields = query['fields'].split(',')
+            page = [{f: r.get(f, 'null') for f in fields} for r in page]
+        return {
+            'data': page,
+            'meta': {'count': len(page), 'total-count': len(rows), 'total-pages': total_pages},
+            'links': {'next': f"&page%5Bnumber%5D={page_number + 1}" if page_number < total_pages else None},
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):  # keep benchmark output clean
+                pass
+
+            def _send(self, status: int, payload: bytes = b'', headers: Dict[str, str] = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if payload:
+                    self.wfile.write(payload)
+                server._count('bytes_sent', len(payload))
+
+            def do_GET(self):
+                server._count('requests')
+                config = server.config
+                delay = config.latency + (random.uniform(0, config.latency_jitter) if config.latency_jitter else 0)
+                if delay > 0:
+                    threading.Event().wait(delay)
+
+                if server._roll(config.rate_429):
+                    server._count('injected_429')
+                    return self._send(429, b'{}', {'Retry-After': str(config.retry_after)})
+                if server._roll(config.error_rate):
+                    server._count('injected_errors')
+                    return self._send(503, b'{}')
+
+                url = urlparse(self.path)
+                if not url.path.startswith(API_PREFIX):
+                    return self._send(404, b'{}')
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                body = server.build_page(url.path[len(API_PREFIX):], query)
+                if body is None:
+                    return self._send(404, b'{}')
+
+                payload = json.dumps(body).encode()
+                etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    server._count('not_modified')
+                    return self._send(304, headers={'ETag': etag})
+                headers = {'Content-Type': 'application/json', 'ETag': etag}
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    payload = gzip.compress(payload, compresslevel=5)
+                    headers['Content-Encoding'] = 'gzip'
+                self._send(200, payload, headers)
+
+        return Handler
+
+
+def main():
+    # Only the CLI needs the collector's endpoint table; importing the server stays light
+    from src.data.data_collector import EnhancedTreasuryCollector
+
+    parser = argparse.ArgumentParser(description='Local replay server for the fiscal-data API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data-dir', default=None, help='recorded <data_name>.csv files to serve')
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    endpoints = EnhancedTreasuryCollector.DETAILED_ENDPOINTS
+    config = ReplayConfig(latency=args.latency, rate_429=args.rate_429,
+                          error_rate=args.error_rate, data_dir=args.data_dir)
+    server = ReplayServer(endpoints, config, port=args.port)
+    print(f"🛰️  Replay server: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
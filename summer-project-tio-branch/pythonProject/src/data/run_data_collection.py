@@ -8,11 +8,10 @@ import sys
 import os
 from pathlib import Path
 
-# Add current src path
-current_src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(current_src_path))
+# Add the project root (src/data/ -> project) so the src package resolves
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-from data.data_collector import EnhancedTreasuryCollector
+from src.data.data_collector import EnhancedTreasuryCollector
 import logging
 from datetime import datetime, timedelta
 
@@ -104,6 +103,8 @@ def main():
         logging.error(f"Data collection failed: {e}", exc_info=True)
         print('🔧 Please check your internet connection and API access.')
         sys.exit(1)
+    finally:
+        collector.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+DTS Schemas - per-endpoint column manifests for the fiscal-data API
+- ENDPOINT_FIELDS lists the columns requested with fields= for each endpoint
+- Only what the categorization, daily cash flows, forecasters and XDatePredictor read
+  is kept; table_nbr / table_nm / sub_table_name and record_calendar_* / record_fiscal_*
+  are dropped server-side
+- None means "request every field" (endpoints whose field list is not pinned yet)
+- ENDPOINT_SCHEMAS declares compact dtypes per table: category for repeated labels,
+  nullable Int64 for DTS amounts (whole millions), datetime64 for dates
+- apply_schema() is run once at ingest and again when tables are read back
+- NATURAL_KEY / natural_key() identify a DTS line across pulls (see record_merge.py)
+"""
+
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# src_line_nbr keeps repeated categories on the same day distinguishable and is part
+# of the natural key, so every pinned manifest requests it
+ENDPOINT_FIELDS: Dict[str, Optional[List[str]]] = {
+    'operating_cash_balance': [
+        'record_date', 'account_type', 'close_today_bal', 'open_today_bal', 'src_line_nbr',
+    ],
+    'deposits_withdrawals_operating_cash': [
+        'record_date', 'account_type', 'transaction_type', 'transaction_catg',
+        'transaction_today_amt', 'src_line_nbr',
+    ],
+    'public_debt_transactions': [
+        'record_date', 'transaction_type', 'security_market', 'security_type',
+        'security_type_desc', 'transaction_today_amt', 'src_line_nbr',
+    ],
+    'adjustment_public_debt_transactions_cash_basis': [
+        'record_date', 'transaction_type', 'adj_type', 'adj_type_desc', 'adj_today_amt', 'src_line_nbr',
+    ],
+    'debt_subject_to_limit': [
+        'record_date', 'debt_catg', 'debt_catg_desc', 'close_today_bal', 'open_today_bal', 'src_line_nbr',
+    ],
+    'inter_agency_tax_transfers': [
+        'record_date', 'classification', 'today_amt', 'src_line_nbr',
+    ],
+    'income_tax_refunds_issued': [
+        'record_date', 'tax_refund_type', 'tax_refund_type_desc', 'tax_refund_today_amt', 'src_line_nbr',
+    ],
+    'federal_tax_deposits': None,
+    'short_term_cash_investments': None,
+}
+
+
+def fields_for(data_name: str, full_fields: bool = False) -> Optional[str]:
+    """Value for the fields= query parameter, or None to request every column"""
+    if full_fields:
+        return None
+    fields = ENDPOINT_FIELDS.get(data_name)
+    return ','.join(fields) if fields else None
+
+
+# ---------- Dtypes ----------
+DATE = 'datetime64[ns]'
+CATEGORY = 'category'
+INT = 'Int64'      # DTS amounts/balances are whole millions; "null" becomes <NA>
+FLOAT = 'float64'
+
+# Bookkeeping columns that only appear in full-fields pulls
+COMMON_COLUMNS: Dict[str, str] = {
+    'record_date': DATE,
+    'table_nbr': CATEGORY,
+    'table_nm': CATEGORY,
+    'sub_table_name': CATEGORY,
+    'src_line_nbr': INT,
+    'record_fiscal_year': INT,
+    'record_fiscal_quarter': INT,
+    'record_calendar_year': INT,
+    'record_calendar_quarter': INT,
+    'record_calendar_month': INT,
+    'record_calendar_day': INT,
+}
+
+ENDPOINT_SCHEMAS: Dict[str, Dict[str, str]] = {
+    'operating_cash_balance': {
+        'account_type': CATEGORY,
+        'close_today_bal': INT, 'open_today_bal': INT, 'open_month_bal': INT, 'open_fiscal_year_bal': INT,
+    },
+    'deposits_withdrawals_operating_cash': {
+        'account_type': CATEGORY, 'transaction_type': CATEGORY,
+        'transaction_catg': CATEGORY, 'transaction_catg_desc': CATEGORY,
+        'transaction_today_amt': INT, 'transaction_mtd_amt': INT, 'transaction_fytd_amt': INT,
+    },
+    'public_debt_transactions': {
+        'transaction_type': CATEGORY, 'security_market': CATEGORY,
+        'security_type': CATEGORY, 'security_type_desc': CATEGORY,
+        'transaction_today_amt': INT, 'transaction_mtd_amt': INT, 'transaction_fytd_amt': INT,
+    },
+    'adjustment_public_debt_transactions_cash_basis': {
+        'transaction_type': CATEGORY, 'adj_type': CATEGORY, 'adj_type_desc': CATEGORY,
+        'adj_today_amt': INT, 'adj_mtd_amt': INT, 'adj_fytd_amt': INT,
+    },
+    'debt_subject_to_limit': {
+        'debt_catg': CATEGORY, 'debt_catg_desc': CATEGORY,
+        'close_today_bal': INT, 'open_today_bal': INT, 'open_month_bal': INT, 'open_fiscal_year_bal': INT,
+    },
+    'inter_agency_tax_transfers': {
+        'classification': CATEGORY,
+        'today_amt': INT, 'mtd_amt': INT, 'fytd_amt': INT,
+    },
+    'income_tax_refunds_issued': {
+        'tax_refund_type': CATEGORY, 'tax_refund_type_desc': CATEGORY,
+        'tax_refund_today_amt': INT, 'tax_refund_mtd_amt': INT, 'tax_refund_fytd_amt': INT,
+    },
+    # Tables read by the models
+    'debt_outstanding': {  # dollars and cents, not millions
+        'debt_held_public_amt': FLOAT, 'intragov_hold_amt': FLOAT, 'tot_pub_debt_out_amt': FLOAT,
+    },
+    'treasury_cash_balance': {
+        'open_today_bal': INT, 'close_today_bal': INT,
+    },
+    'daily_cash_flows': {  # model input, kept as plain float64
+        'transaction_type': CATEGORY, 'transaction_today_amt': FLOAT,
+    },
+}
+
+
+# ---------- Keys ----------
+# One DTS line per value; columns an endpoint does not have are left out
+NATURAL_KEY = ['record_date', 'account_type', 'transaction_type', 'transaction_catg', 'src_line_nbr']
+
+# Derived tables with their own grain
+TABLE_KEYS: Dict[str, List[str]] = {
+    'daily_cash_flows': ['record_date', 'transaction_type'],
+}
+
+
+def natural_key(columns, data_name: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Key columns for a table with the given columns, or None when rows cannot be told apart.
+
+    Raw DTS rows need src_line_nbr: without it the same category can legitimately
+    appear twice on one day, so only whole-day replacement is safe.
+    """
+    columns = set(columns)
+    if data_name in TABLE_KEYS:
+        key = TABLE_KEYS[data_name]
+        return key if columns.issuperset(key) else None
+    if 'record_date' not in columns or 'src_line_nbr' not in columns:
+        return None
+    return [c for c in NATURAL_KEY if c in columns]
+
+
+def _to_int(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.Int64Dtype):
+        return series
+    values = pd.to_numeric(series, errors='coerce')
+    if (values.dropna() % 1 != 0).any():
+        return values.astype(FLOAT)  # not whole units after all; keep the fractions
+    return values.astype(INT)
+
+
+def _to_category(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.mask(series == 'null').astype(CATEGORY)
+
+
+def apply_schema(df: pd.DataFrame, data_name: Optional[str] = None) -> pd.DataFrame:
+    """
+    Cast df in place to the declared dtypes for data_name.
+
+    Columns without a declaration fall back to numeric coercion when their name
+    contains 'amt' or 'bal' (endpoints whose schema is not pinned yet).
+    """
+    schema = {**COMMON_COLUMNS, **ENDPOINT_SCHEMAS.get(data_name, {})}
+    for col in df.columns:
+        dtype = schema.get(col)
+        if dtype == DATE:
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif dtype == CATEGORY:
+            df[col] = _to_category(df[col])
+        elif dtype == INT:
+            df[col] = _to_int(df[col])
+        elif dtype == FLOAT or (dtype is None and ('amt' in col or 'bal' in col)):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(FLOAT)
+    return df
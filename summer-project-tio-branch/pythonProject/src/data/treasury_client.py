@@ -0,0 +1,188 @@
+"""
+Treasury Client - HTTP layer for the fiscal-data API
+- One pooled keep-alive requests.Session shared by all workers (gzip Accept-Encoding)
+- Adaptive token bucket: halves its rate on 429 and honours Retry-After, then recovers gradually
+- Jittered exponential backoff on connection errors, timeouts, 429 and 5xx
+- Raises TreasuryAPIError once retries are exhausted, so callers never mistake a
+  partial download for a complete one
+"""
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TreasuryAPIError(Exception):
+    """A request failed after all retries"""
+
+
+class IncompleteDownloadError(TreasuryAPIError):
+    """Some pages of a paginated result could not be fetched"""
+
+
+class AdaptiveTokenBucket:
+    """Token bucket shared by all workers; slows down on 429 and recovers on success"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: float = 0.25,
+                 recovery_step: float = 0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate) if rate > 0 else 0.0
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.recovery_step = recovery_step
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may start"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self.rate <= 0:  # unlimited
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """Server pushed back (429): halve the rate and pause everyone for Retry-After"""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._updated = now
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def recover(self):
+        """Additive increase back towards the configured rate"""
+        with self._lock:
+            if 0 < self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery_step)
+
+
+class TreasuryClient:
+    """Pooled, rate-limited, retrying GET client for the fiscal-data API"""
+
+    def __init__(self, base_url: str, headers: Dict[str, str] = None,
+                 max_requests_per_second: float = 4.0, max_in_flight: int = 4,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 timeout: float = 60):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = AdaptiveTokenBucket(max_requests_per_second)
+        # Shared request budget: caps in-flight requests across all endpoints
+        self.request_slots = threading.BoundedSemaphore(max_in_flight)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        if headers:
+            self.session.headers.update(headers)
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    # ---------- Requests ----------
+    def get(self, endpoint: str, params: Dict[str, Any] = None,
+            headers: Dict[str, str] = None) -> requests.Response:
+        """GET base_url/endpoint; returns 2xx/304 responses, raises TreasuryAPIError otherwise"""
+        url = f"{self.base_url}/{endpoint}"
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count('retries')
+            retry_after = None
+            try:
+                with self.request_slots:
+                    self.bucket.acquire()
+                    self._count('requests')
+                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        raise TreasuryAPIError(f"{endpoint}: {e}") from e
+                    self.bucket.recover()
+                    self._count('bytes', len(response.content))
+                    return response
+                last_error = requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+                retry_after = self._retry_after(response)
+                if response.status_code == 429:
+                    self._count('throttled')
+                    self.bucket.throttle(retry_after)
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logging.warning(f"⚠️ {endpoint} attempt {attempt + 1} failed ({last_error}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        raise TreasuryAPIError(f"{endpoint}: giving up after {self.max_retries + 1} attempts ({last_error})")
+
+    def decode(self, response: requests.Response) -> Dict[str, Any]:
+        """Parse a JSON body, timing the parse for throughput stats"""
+        started = time.perf_counter()
+        body = response.json()
+        self._count('parse_seconds', time.perf_counter() - started)
+        return body
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Retry-After as seconds (delta-seconds or HTTP-date form)"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    # ---------- Stats ----------
+    def _count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'bytes': 0, 'parse_seconds': 0.0}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, current_rate=self.bucket.rate)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,289 @@
+"""
+Treasury Warehouse - embedded SQLite database for collected and derived Treasury data
+- One table per dataset (raw DTS endpoints, daily_cash_flows, debt_outstanding, ...)
+- Indexes on record_date, account_type and transaction_type wherever those columns exist
+- Raw tables are upserted by record_date; model outputs are appended as runs (run_id)
+- Derived aggregates are refreshed in place for a record_date range (replace_sums)
+- ensure_table() imports a dataset from the Parquet store / CSV on first use and
+  re-imports it when the source file changes, so readers can always fall back to files
+- Small query API used by the forecaster, XDatePredictor and the visualizations
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.parquet_store import ParquetStore, load_dataset
+from src.data.record_merge import dedupe_records
+from src.data.schemas import apply_schema
+
+WAREHOUSE_FILE = "treasury.db"
+INDEXED_COLUMNS = ('record_date', 'account_type', 'transaction_type', 'run_id')
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _ident(name: str) -> str:
+    """Quote a table/column name after validating it (names are never user SQL)"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return f'"{name}"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+class TreasuryWarehouse:
+    """SQLite warehouse; one connection shared by all threads behind a lock"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS _sources (table_name TEXT PRIMARY KEY, source TEXT, signature TEXT)'
+        )
+
+    @classmethod
+    def for_data_dir(cls, data_dir) -> 'TreasuryWarehouse':
+        return cls(Path(data_dir) / WAREHOUSE_FILE)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'TreasuryWarehouse':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Schema ----------
+    def has(self, table: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+        return row is not None
+
+    def columns(self, table: str) -> List[str]:
+        with self._lock:
+            return [row[1] for row in self._conn.execute(f'PRAGMA table_info({_ident(table)})')]
+
+    def _ensure_schema(self, table: str, df: pd.DataFrame):
+        """Create the table / add new columns, then index the lookup columns"""
+        existing = self.columns(table)
+        if not existing:
+            cols = ', '.join(f'{_ident(c)} {_sql_type(df[c].dtype)}' for c in df.columns)
+            self._conn.execute(f'CREATE TABLE {_ident(table)} ({cols})')
+        else:
+            for col in df.columns:
+                if col not in existing:
+                    self._conn.execute(f'ALTER TABLE {_ident(table)} ADD COLUMN {_ident(col)} {_sql_type(df[col].dtype)}')
+        for col in INDEXED_COLUMNS:
+            if col in df.columns or col in existing:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {_ident(f"idx_{table}_{col}")} ON {_ident(table)} ({_ident(col)})'
+                )
+
+    @staticmethod
+    def _rows(df: pd.DataFrame) -> List[tuple]:
+        """DataFrame -> plain Python tuples (ISO dates, None for missing values)"""
+        frame = df.copy()
+        for col in frame.columns:
+            if pd.api.types.is_datetime64_any_dtype(frame[col]):
+                frame[col] = frame[col].dt.strftime('%Y-%m-%d')
+        frame = frame.astype(object).where(frame.notna(), None)
+        return list(frame.itertuples(index=False, name=None))
+
+    def _insert(self, table: str, df: pd.DataFrame):
+        cols = ', '.join(_ident(c) for c in df.columns)
+        marks = ', '.join('?' for _ in df.columns)
+        self._conn.executemany(f'INSERT INTO {_ident(table)} ({cols}) VALUES ({marks})', self._rows(df))
+
+    # ---------- Write ----------
+    def upsert(self, table: str, df: pd.DataFrame) -> int:
+        """Replace every record_date present in df, append the rest (df de-duplicated on its natural key)"""
+        if df.empty:
+            return 0
+        df = dedupe_records(df, table)
+        dates = sorted(set(pd.to_datetime(df['record_date']).dt.strftime('%Y-%m-%d')))
+        with self._lock, self._conn:
+            self._ensure_schema(table, df)
+            self._conn.executemany(f'DELETE FROM {_ident(table)} WHERE record_date = ?', [(d,) for d in dates])
+            self._insert(table, df)
+        return len(df)
+
+    def drop(self, table: str):
+        """Remove a table and its recorded source (full rebuilds)"""
+        with self._lock, self._conn:
+            self._conn.execute(f'DROP TABLE IF EXISTS {_ident(table)}')
+            self._conn.execute('DELETE FROM _sources WHERE table_name = ?', (table,))
+
+    def append_run(self, table: str, df: pd.DataFrame, run_id: str) -> int:
+        """Store one model run (e.g. a forecast or simulation) under run_id"""
+        frame = df.copy()
+        frame.insert(0, 'run_id', run_id)
+        with self._lock, self._conn:
+            self._ensure_schema(table, frame)
+            self._conn.execute(f'DELETE FROM {_ident(table)} WHERE run_id = ?', (run_id,))
+            self._insert(table, frame)
+        return len(frame)
+
+    def replace_sums(self, target: str, source: str, group_columns: List[str], value_column: str,
+                     where: Optional[Dict[str, Any]] = None, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> int:
+        """
+        Recompute target = SUM(value_column) GROUP BY group_columns over source, for
+        the record_date range only; days outside the range are left untouched.
+
+        group_columns must start with record_date. Returns the rows written.
+        """
+        if not self.has(source):
+            return 0
+        groups = ', '.join(_ident(c) for c in group_columns)
+        clause, params = self._where(where, start_date, end_date, not_null=value_column)
+        target_clause, target_params = self._where(None, start_date, end_date)
+        with self._lock, self._conn:
+            if not self.has(target):
+                types = {c: 'TEXT' for c in group_columns}
+                cols = ', '.join(f'{_ident(c)} {types[c]}' for c in group_columns)
+                self._conn.execute(f'CREATE TABLE {_ident(target)} ({cols}, {_ident(value_column)} REAL)')
+                for col in group_columns:
+                    if col in INDEXED_COLUMNS:
+                        self._conn.execute(
+                            f'CREATE INDEX IF NOT EXISTS {_ident(f"idx_{target}_{col}")} ON {_ident(target)} ({_ident(col)})'
+                        )
+            self._conn.execute(f'DELETE FROM {_ident(target)}{target_clause}', target_params)
+            cursor = self._conn.execute(
+                f'INSERT INTO {_ident(target)} ({groups}, {_ident(value_column)}) '
+                f'SELECT {groups}, SUM({_ident(value_column)}) FROM {_ident(source)}{clause} '
+                f'GROUP BY {groups} ORDER BY {groups}',
+                params
+            )
+            return cursor.rowcount
+
+    def ensure_table(self, data_dir, data_name: str, csv_name: Optional[str] = None) -> bool:
+        """Import data_name from the Parquet store / CSV when missing or when the source changed"""
+        data_dir = Path(data_dir)
+        store = ParquetStore(data_dir / 'parquet')
+        if store.has(data_name):
+            source = store.path_for(data_name)
+            files = sorted(source.rglob('*.parquet'))
+            signature = f"{len(files)}:{max(f.stat().st_mtime_ns for f in files)}:{sum(f.stat().st_size for f in files)}"
+        else:
+            source = data_dir / (csv_name or f"{data_name}.csv")
+            if not source.exists():
+                return self.has(data_name)
+            stat = source.stat()
+            signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT source, signature FROM _sources WHERE table_name = ?', (data_name,)
+            ).fetchone()
+        if self.has(data_name) and row == (str(source), signature):
+            return True
+
+        df = dedupe_records(load_dataset(data_dir, data_name, csv_name=csv_name), data_name)
+        with self._lock, self._conn:
+            self._conn.execute(f'DROP TABLE IF EXISTS {_ident(data_name)}')
+            if not df.empty:
+                self._ensure_schema(data_name, df)
+                self._insert(data_name, df)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO _sources (table_name, source, signature) VALUES (?, ?, ?)',
+                (data_name, str(source), signature)
+            )
+        logging.info(f"✅ Warehouse: imported {data_name} ({len(df)} rows) from {source.name}")
+        return not df.empty
+
+    # ---------- Query ----------
+    def _where(self, where: Optional[Dict[str, Any]], start_date: Optional[str],
+               end_date: Optional[str], not_null: Optional[str] = None) -> Tuple[str, list]:
+        clauses, params = [], []
+        for col, value in (where or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{_ident(col)} IN ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            else:
+                clauses.append(f'{_ident(col)} = ?')
+                params.append(value)
+        if start_date is not None:
+            clauses.append('record_date >= ?')
+            params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+        if end_date is not None:
+            clauses.append('record_date <= ?')
+            params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+        if not_null is not None:
+            clauses.append(f'{_ident(not_null)} IS NOT NULL')
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _read(self, sql: str, params: list, table: str) -> pd.DataFrame:
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        return apply_schema(df, table)
+
+    def query(self, table: str, columns: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+              start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """Indexed selection ordered by record_date (insertion order within a day)"""
+        cols = ', '.join(_ident(c) for c in columns) if columns else '*'
+        clause, params = self._where(where, start_date, end_date)
+        sql = f'SELECT {cols} FROM {_ident(table)}{clause} ORDER BY record_date, rowid'
+        return self._read(sql, params, table)
+
+    def latest(self, table: str, column: str, where: Optional[Dict[str, Any]] = None) -> Optional[pd.Series]:
+        """Last row (by record_date, then insertion order) where column is not null"""
+        clause, params = self._where(where, None, None, not_null=column)
+        sql = f'SELECT record_date, {_ident(column)} FROM {_ident(table)}{clause} ORDER BY record_date DESC, rowid DESC LIMIT 1'
+        df = self._read(sql, params, table)
+        return None if df.empty else df.iloc[0]
+
+    def coverage(self, table: str) -> Tuple[Optional[str], Optional[str], int]:
+        """(first record_date, last record_date, rows) from the record_date index"""
+        if not self.has(table):
+            return None, None, 0
+        with self._lock:
+            first, last, rows = self._conn.execute(
+                f'SELECT MIN(record_date), MAX(record_date), COUNT(*) FROM {_ident(table)}'
+            ).fetchone()
+        return first, last, rows
+
+    def daily_totals(self, table: str, value_column: str, pivot_column: str, labels: List[str],
+                     start_date: Optional[str] = None, end_date: Optional[str] = None) -> pd.DataFrame:
+        """SUM(value_column) per record_date, one output column per label (missing -> 0)"""
+        sums = ', '.join(
+            f'SUM(CASE WHEN {_ident(pivot_column)} = ? THEN {_ident(value_column)} ELSE 0 END) AS {_ident(label)}'
+            for label in labels
+        )
+        clause, params = self._where({pivot_column: list(labels)}, start_date, end_date)
+        sql = f'SELECT record_date, {sums} FROM {_ident(table)}{clause} GROUP BY record_date ORDER BY record_date'
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=list(labels) + params)
+        df['record_date'] = pd.to_datetime(df['record_date'])
+        return df.set_index('record_date').astype('float64')
+
+    def latest_run(self, table: str) -> Tuple[Optional[str], pd.DataFrame]:
+        """(run_id, rows) of the newest run in an append_run table"""
+        if not self.has(table):
+            return None, pd.DataFrame()
+        with self._lock:
+            row = self._conn.execute(f'SELECT MAX(run_id) FROM {_ident(table)}').fetchone()
+        if row is None or row[0] is None:
+            return None, pd.DataFrame()
+        with self._lock:
+            df = pd.read_sql_query(
+                f'SELECT * FROM {_ident(table)} WHERE run_id = ? ORDER BY rowid', self._conn, params=[row[0]]
+            )
+        return row[0], df.drop(columns=['run_id'])
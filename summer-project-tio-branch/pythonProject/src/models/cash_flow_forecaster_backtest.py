@@ -29,6 +29,12 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.model_selection import train_test_split
 
+from src.data.catalog import ARTIFACT, DataCatalog
+from src.data.daily_flows import load_daily_flows_csv
+from src.models.feature_engine import CAUSAL_SPEC, FeatureEngine
+from src.models.order_search import ArimaOrderSearch, order_grid
+from src.models.recursive_forecast import RecursiveForecaster
+
 # Set Chinese font to avoid display issues
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS', 'Arial']
 plt.rcParams['axes.unicode_minus'] = False
@@ -37,13 +43,16 @@ plt.rcParams['axes.unicode_minus'] = False
 class CashFlowForecasterV2:
     """Fixed Cash Flow Forecaster"""
     
-    def __init__(self, data_dir="./data/backtest"):
+    def __init__(self, data_dir="./data/backtest", feature_spec=None):
         self.data_dir = Path(data_dir)
         self.daily_flows = None
         self.models = {}
         self.forecasts = {}
         self.feature_columns = []
+        self.feature_engine = FeatureEngine(feature_spec or CAUSAL_SPEC)
         self.scaler = None
+        self.rf_residuals = None
+        self.rf_paths = None
         
     def load_and_prepare_data(self):
         """Load and prepare cash flow data"""
@@ -52,27 +61,11 @@ class CashFlowForecasterV2:
         # Load cash flow data
         cash_flow_file = self.data_dir / "daily_cash_flows_backtest_2023.csv"
         
-        if not cash_flow_file.exists():
-            raise FileNotFoundError(f"Cash flow data file not found: {cash_flow_file}")
-        
-        cash_flows_raw = pd.read_csv(cash_flow_file)
-        cash_flows_raw['record_date'] = pd.to_datetime(cash_flows_raw['record_date'])
-        cash_flows_raw['transaction_today_amt'] = pd.to_numeric(
-            cash_flows_raw['transaction_today_amt'], errors='coerce'
-        )
+        # 转换为每日净现金流 (解析结果按文件指纹缓存)
+        daily_flows = load_daily_flows_csv(cash_flow_file)
         
-        # 转换为每日净现金流
-        daily_flows = cash_flows_raw.pivot_table(
-            index='record_date',
-            columns='transaction_type',
-            values='transaction_today_amt',
-            aggfunc='sum'
-        ).fillna(0)
-        
-        # 计算净现金流 (收入 - 支出)
-        if 'Deposits' in daily_flows.columns and 'Withdrawals' in daily_flows.columns:
-            daily_flows['net_flow'] = daily_flows['Deposits'] - daily_flows['Withdrawals']
-        else:
+        # 净现金流 (收入 - 支出)
+        if 'net_flow' not in daily_flows.columns:
             raise ValueError("数据中未找到 Deposits 和 Withdrawals 列")
         
         # 确保数据按日期排序
@@ -94,53 +87,24 @@ class CashFlowForecasterV2:
         return daily_flows
     
     def create_features(self):
-        """Create feature engineering"""
+        """Create feature engineering (one vectorized pass, see FeatureEngine)"""
         print("\n=== Feature Engineering ===")
         
-        df = self.daily_flows.copy()
-        
-        # Basic time features
-        df['day_of_week'] = df.index.dayofweek
-        df['day_of_month'] = df.index.day
-        df['month'] = df.index.month
-        df['quarter'] = df.index.quarter
-        
-        # Seasonal features
-        df['is_month_end'] = (df.index == df.index.to_period('M').end_time).astype(int)
-        df['is_quarter_end'] = (df.index == df.index.to_period('Q').end_time).astype(int)
-        
-        # Special dates
-        df['is_friday'] = (df.index.dayofweek == 4).astype(int)
-        df['is_monday'] = (df.index.dayofweek == 0).astype(int)
-        
-        # Simplified lag features
-        for lag in [1, 2, 3, 7]:
-            df[f'lag_{lag}'] = df['net_flow'].shift(lag)
-        
-        # Simplified rolling features
-        for window in [7, 30]:
-            df[f'rolling_mean_{window}'] = df['net_flow'].rolling(window).mean()
-            df[f'rolling_std_{window}'] = df['net_flow'].rolling(window).std()
-        
-        # Feature list
-        self.feature_columns = [
-            'day_of_week', 'day_of_month', 'month', 'quarter',
-            'is_month_end', 'is_quarter_end', 'is_friday', 'is_monday',
-            'lag_1', 'lag_2', 'lag_3', 'lag_7',
-            'rolling_mean_7', 'rolling_mean_30', 'rolling_std_7', 'rolling_std_30'
-        ]
+        features = self.feature_engine.frame(self.daily_flows['net_flow'])
+        self.feature_columns = list(features.columns)
+        df = pd.concat([self.daily_flows, features], axis=1)
         
         print(f"Created {len(self.feature_columns)} features")
         
-        # Remove NaN values
+        # Remove NaN values (warm-up rows of the longest lag / window)
         df_clean = df.dropna()
         print(f"Data after cleaning: {len(df_clean)} rows")
         
         self.daily_flows_with_features = df_clean
         return df_clean
     
-    def fit_arima_model(self):
-        """Fit ARIMA model using auto_arima for automatic parameter selection"""
+    def fit_arima_model(self, time_budget=60.0, n_jobs=None):
+        """Fit ARIMA model - parallel order search by AIC (same space as the former auto_arima call)"""
         print("\n=== ARIMA Model Training ===")
         
         net_flow = self.daily_flows['net_flow'].dropna()
@@ -152,70 +116,29 @@ class CashFlowForecasterV2:
             return None
         
         try:
-            # Use auto_arima for automatic parameter selection
-            from pmdarima import auto_arima
-            print("🔍 Using auto_arima to find optimal parameters...")
-            
-            auto_model = auto_arima(
-                net_flow,
-                start_p=0, start_q=0,
-                max_p=3, max_q=3, max_d=2,
-                seasonal=False,  # Set to True if you want seasonal ARIMA
-                stepwise=True,
-                suppress_warnings=True,
-                error_action='ignore',
-                trace=True
-            )
+            # Exhaustive p,q <= 3, d <= 2 (non-seasonal) across all cores instead of a stepwise single-core walk
+            print("🔍 Searching ARIMA orders in parallel...")
+            search = ArimaOrderSearch(order_grid(max_p=3, max_d=2, max_q=3), time_budget=time_budget, n_jobs=n_jobs)
+            result = search.search(net_flow)
+            print(f"Searched {len(result.candidates)}/{len(search.grid)} candidates in {result.elapsed:.1f}s "
+                  f"({search.n_jobs} workers, {result.skipped} skipped by the time budget)")
             
-            print(f"Auto ARIMA selected: {auto_model.order}")
-            print(f"   AIC: {auto_model.aic():.2f}")
-            
-            # Test forecast to ensure no NaN
-            test_forecast = auto_model.predict(n_periods=5)
-            if not np.isnan(test_forecast).any():
-                self.models['ARIMA'] = auto_model
-                print(f"ARIMA model ready for forecasting")
-                return auto_model
-            else:
-                print("Auto ARIMA forecast contains NaN values")
+            if result.best is None:
+                print("All ARIMA configurations failed")
                 self.models['ARIMA'] = None
                 return None
+            
+            best_model = ArimaOrderSearch.refit(net_flow, result.best)
+            print(f"Selected ARIMA{result.best['order']}")
+            print(f"   AIC: {best_model.aic:.2f}")
+            self.models['ARIMA'] = best_model
+            print(f"ARIMA model ready for forecasting")
+            return best_model
                 
         except Exception as e:
-            print(f"Auto ARIMA failed, falling back to manual selection: {e}")
-            
-            # Fallback to original simple approach
-            arima_configs = [(1,0,1), (1,1,1), (2,0,1), (1,0,2)]
-            
-            best_model = None
-            best_aic = float('inf')
-            
-            for order in arima_configs:
-                try:
-                    model = ARIMA(net_flow, order=order)
-                    fitted_arima = model.fit()
-                    
-                    # Test forecast to ensure no NaN
-                    test_forecast = fitted_arima.forecast(steps=5)
-                    if not np.isnan(test_forecast).any() and fitted_arima.aic < best_aic:
-                        best_model = fitted_arima
-                        best_aic = fitted_arima.aic
-                        print(f"ARIMA{order} AIC: {fitted_arima.aic:.2f} - Valid")
-                    else:
-                        print(f"ARIMA{order} - Invalid (NaN forecast)")
-                        
-                except Exception as e:
-                    print(f"ARIMA{order} failed: {e}")
-                    continue
-            
-            if best_model is not None:
-                self.models['ARIMA'] = best_model
-                print(f"Best ARIMA model selected with AIC: {best_aic:.2f}")
-                return best_model
-            else:
-                print("All ARIMA configurations failed")
-                self.models['ARIMA'] = None
-                return None
+            print(f"ARIMA training failed: {e}")
+            self.models['ARIMA'] = None
+            return None
     
     def fit_seasonal_model(self):
         """Fit seasonal pattern model - based on user's enhanced algorithm"""
@@ -340,10 +263,17 @@ class CashFlowForecasterV2:
         print(f"  Prediction range: ${y_pred.min():,.0f} to ${y_pred.max():,.0f}")
         
         self.models['RandomForest'] = model
+        self.rf_residuals = (y_test - y_pred).to_numpy()
         return {'rf_mae': mae, 'rf_rmse': rmse}
     
-    def generate_forecasts(self, forecast_days=120):
-        """Generate predictions"""
+    def generate_forecasts(self, forecast_days=120, rf_mode='recursive', rf_paths=200):
+        """
+        Generate predictions.
+        
+        rf_mode='recursive' rolls Random Forest predictions back into its lag/rolling
+        features (rf_paths bootstrap sample paths, one batched predict per day);
+        rf_mode='placeholder' keeps the recent-mean lag features of earlier versions.
+        """
         print(f"\n=== Generate Future {forecast_days} Days Forecast ===")
         
         last_date = self.daily_flows.index.max()
@@ -358,15 +288,7 @@ class CashFlowForecasterV2:
         # ARIMA forecast
         if 'ARIMA' in self.models and self.models['ARIMA'] is not None:
             try:
-                arima_model = self.models['ARIMA']
-                
-                # Check if it's auto_arima model or statsmodels ARIMA
-                if hasattr(arima_model, 'predict'):
-                    # auto_arima model
-                    arima_forecast = arima_model.predict(n_periods=len(future_dates))
-                else:
-                    # statsmodels ARIMA model
-                    arima_forecast = arima_model.forecast(steps=len(future_dates))
+                arima_forecast = self.models['ARIMA'].forecast(steps=len(future_dates))
                 
                 # Debug information
                 print(f"ARIMA forecast shape: {arima_forecast.shape}")
@@ -431,12 +353,23 @@ class CashFlowForecasterV2:
         # Random Forest forecast
         if 'RandomForest' in self.models and self.models['RandomForest'] is not None:
             try:
-                # Create future features
-                future_features = self._create_future_features(future_dates)
-                if future_features is not None:
-                    rf_forecast = self.models['RandomForest'].predict(future_features)
+                if rf_mode == 'recursive':
+                    recursive = RecursiveForecaster(self.models['RandomForest'], self.feature_engine, self.rf_residuals)
+                    paths = recursive.forecast(self.daily_flows['net_flow'].to_numpy(), future_dates,
+                                               n_paths=max(1, rf_paths), random_state=42)
+                    self.rf_paths = pd.DataFrame(paths.T, index=future_dates)
+                    rf_forecast = paths.mean(axis=0)
                     forecasts['RandomForest'] = pd.Series(rf_forecast, index=future_dates)
-                    print(f"✅ Random Forest forecast completed: mean ${rf_forecast.mean():,.0f}")
+                    print(f"✅ Random Forest forecast completed (recursive, {len(paths)} paths): mean ${rf_forecast.mean():,.0f}")
+                    p10, p90 = np.percentile(paths[:, -1], [10, 90])
+                    print(f"   Day {len(future_dates)} path range (p10-p90): ${p10:,.0f} to ${p90:,.0f}")
+                else:
+                    # Create future features
+                    future_features = self._create_future_features(future_dates)
+                    if future_features is not None:
+                        rf_forecast = self.models['RandomForest'].predict(future_features)
+                        forecasts['RandomForest'] = pd.Series(rf_forecast, index=future_dates)
+                        print(f"✅ Random Forest forecast completed: mean ${rf_forecast.mean():,.0f}")
             except Exception as e:
                 print(f"❌ Random Forest forecast failed: {e}")
         
@@ -473,38 +406,13 @@ class CashFlowForecasterV2:
         return forecasts
     
     def _create_future_features(self, future_dates):
-        """Create simplified future features"""
+        """Create simplified future features (calendar from the dates, lags/rolling from recent history)"""
         
-        # Use recent historical average for features that require lag data
+        # Use recent historical statistics for features that require lag data
         recent_data = self.daily_flows['net_flow'].tail(30)
-        recent_mean = recent_data.mean()
-        
-        future_features = []
+        matrix, columns = self.feature_engine.future(pd.DatetimeIndex(future_dates), recent_data.to_numpy())
         
-        for date in future_dates:
-            features = {}
-            
-            # Time-based features
-            features['day_of_week'] = date.dayofweek
-            features['day_of_month'] = date.day
-            features['month'] = date.month
-            features['quarter'] = date.quarter
-            features['is_month_end'] = 1 if date == pd.Period(date, 'M').end_time else 0
-            features['is_quarter_end'] = 1 if date == pd.Period(date, 'Q').end_time else 0
-            features['is_friday'] = 1 if date.dayofweek == 4 else 0
-            features['is_monday'] = 1 if date.dayofweek == 0 else 0
-            
-            # Use historical averages for lag and rolling features
-            for lag in [1, 2, 3, 7]:
-                features[f'lag_{lag}'] = recent_mean
-            
-            for window in [7, 30]:
-                features[f'rolling_mean_{window}'] = recent_mean
-                features[f'rolling_std_{window}'] = recent_data.std()
-            
-            future_features.append(features)
-        
-        future_df = pd.DataFrame(future_features)
+        future_df = pd.DataFrame(matrix, columns=columns)
         future_df = future_df[self.feature_columns]
         
         return future_df
@@ -571,21 +479,10 @@ class CashFlowForecasterV2:
         try:
             actual_file = self.data_dir / "daily_cash_flows_backtest_2024.csv"
             if actual_file.exists():
-                actual_df = pd.read_csv(actual_file)
-                actual_df['record_date'] = pd.to_datetime(actual_df['record_date'])
-                actual_df['transaction_today_amt'] = pd.to_numeric(actual_df['transaction_today_amt'], errors='coerce')
+                # Pivoted to net flow once per run (shared cache)
+                actual_pivot = load_daily_flows_csv(actual_file)
                 
-                # Pivot to net flow
-                actual_pivot = actual_df.pivot_table(
-                    index='record_date',
-                    columns='transaction_type',
-                    values='transaction_today_amt',
-                    aggfunc='sum'
-                ).fillna(0)
-                
-                if 'Deposits' in actual_pivot.columns and 'Withdrawals' in actual_pivot.columns:
-                    actual_pivot['net_flow'] = actual_pivot['Deposits'] - actual_pivot['Withdrawals']
-                    
+                if 'net_flow' in actual_pivot.columns:
                     # Filter to 2024 only
                     actual_2024 = actual_pivot.loc[(actual_pivot.index >= '2024-01-01') & (actual_pivot.index <= '2024-12-31')]
                     
@@ -604,21 +501,11 @@ class CashFlowForecasterV2:
         try:
             actual_file = self.data_dir / "daily_cash_flows_backtest_2024.csv"
             if actual_file.exists():
-                actual_df = pd.read_csv(actual_file)
-                actual_df['record_date'] = pd.to_datetime(actual_df['record_date'])
-                actual_df['transaction_today_amt'] = pd.to_numeric(actual_df['transaction_today_amt'], errors='coerce')
-                
-                # Compute daily net flow
-                actual_pivot = actual_df.pivot_table(
-                    index='record_date',
-                    columns='transaction_type',
-                    values='transaction_today_amt',
-                    aggfunc='sum'
-                ).fillna(0)
-                if 'Deposits' not in actual_pivot.columns or 'Withdrawals' not in actual_pivot.columns:
+                # Daily net flow (shared cache)
+                actual_pivot = load_daily_flows_csv(actual_file)
+                if 'net_flow' not in actual_pivot.columns:
                     print("❌ Missing required columns in actual data.")
                     return
-                actual_pivot['net_flow'] = actual_pivot['Deposits'] - actual_pivot['Withdrawals']
                 
                 # Filter actual from July 1 onward
                 forecast_start = pd.Timestamp("2024-07-01")
@@ -675,8 +562,8 @@ class CashFlowForecasterV2:
         output_dir = Path("output/figures")
         output_dir.mkdir(parents=True, exist_ok=True)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        plt.savefig(output_dir / f"cash_flow_forecasts_v2_{timestamp}.png", dpi=300, bbox_inches='tight')
-        print(f"Forecast chart saved: {output_dir / f'cash_flow_forecasts_v2_{timestamp}.png'}")
+        plt.savefig(output_dir / f"cash_flow_backtest_v2_{timestamp}.png", dpi=300, bbox_inches='tight')
+        print(f"Forecast chart saved: {output_dir / f'cash_flow_backtest_v2_{timestamp}.png'}")
         
         plt.show()
         # plt.close('all')
@@ -689,22 +576,10 @@ class CashFlowForecasterV2:
             # Load actual 2024 data
             actual_file = self.data_dir / "daily_cash_flows_backtest_2024.csv"
             if actual_file.exists():
-                actual_df = pd.read_csv(actual_file)
-                actual_df['record_date'] = pd.to_datetime(actual_df['record_date'])
-                actual_df['transaction_today_amt'] = pd.to_numeric(actual_df['transaction_today_amt'], errors='coerce')
-                
-                # Pivot to daily format
-                actual_pivot = actual_df.pivot_table(
-                    index='record_date',
-                    columns='transaction_type',
-                    values='transaction_today_amt',
-                    aggfunc='sum'
-                ).fillna(0)
+                # Daily format with net flow (shared cache)
+                actual_pivot = load_daily_flows_csv(actual_file)
 
-                # Compute net flow
-                if 'Deposits' in actual_pivot.columns and 'Withdrawals' in actual_pivot.columns:
-                    actual_pivot['net_flow'] = actual_pivot['Deposits'] - actual_pivot['Withdrawals']
-                    
+                if 'net_flow' in actual_pivot.columns:
                     # Determine forecast range
                     forecast_start = pd.Timestamp("2024-07-01")
                     # forecast_end = min(
@@ -752,8 +627,11 @@ class CashFlowForecasterV2:
         # Save to CSV
         forecast_df = pd.DataFrame(self.forecasts)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        csv_file = output_dir / f"cash_flow_forecasts_v2_{timestamp}.csv"
+        csv_file = output_dir / f"cash_flow_backtest_v2_{timestamp}.csv"
         forecast_df.to_csv(csv_file)
+        # Own file prefix, so the legacy cash_flow_forecasts_v2_* import never picks it up
+        with DataCatalog.for_data_dir(self.data_dir) as catalog:
+            catalog.register_frame('cash_flow_forecasts_backtest', csv_file, forecast_df, kind=ARTIFACT)
         print(f"Forecasts saved to: {csv_file}")
         
         # Save summary
@@ -782,7 +660,7 @@ class CashFlowForecasterV2:
                 }
         
         import json
-        json_file = output_dir / f"forecast_summary_v2_{timestamp}.json"
+        json_file = output_dir / f"backtest_summary_v2_{timestamp}.json"
         with open(json_file, 'w') as f:
             json.dump(summary, f, indent=2)
         
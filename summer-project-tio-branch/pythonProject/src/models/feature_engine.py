@@ -0,0 +1,160 @@
+"""
+Feature Engine - lag / rolling-window / calendar features as one dense float32 matrix
+- FeatureSpec lists the lags, rolling windows, rolling statistics and calendar columns;
+  DEFAULT_SPEC reproduces the 16 features the forecasters have always used
+- The series is held once as a contiguous float32 array; every window gets a single
+  sliding_window_view (no copy) from which all of its statistics are reduced
+- Rolling statistics follow pandas semantics (std with ddof=1, NaN until the window is
+  full); lags are shifted slices. The window ends at the current row by default;
+  CAUSAL_SPEC ends it at the previous row so no feature contains the target itself
+- Calendar columns come straight from the DatetimeIndex fields; month/quarter ends are
+  the last business day of the period
+- future() builds rows for unobserved dates in bulk: calendar block from the index,
+  lag/rolling placeholders broadcast per scenario ([scenarios, horizon, features])
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _period_end(index: pd.DatetimeIndex, offset) -> np.ndarray:
+    return (index.normalize() + offset) == index.normalize()
+
+
+CALENDAR: Dict[str, Callable[[pd.DatetimeIndex], np.ndarray]] = {
+    'day_of_week': lambda idx: idx.dayofweek,
+    'day_of_month': lambda idx: idx.day,
+    'day_of_year': lambda idx: idx.dayofyear,
+    'week_of_year': lambda idx: idx.isocalendar().week.to_numpy(),
+    'month': lambda idx: idx.month,
+    'quarter': lambda idx: idx.quarter,
+    'is_month_start': lambda idx: _period_end(idx, pd.offsets.BMonthBegin(0)),
+    'is_month_end': lambda idx: _period_end(idx, pd.offsets.BMonthEnd(0)),
+    'is_quarter_end': lambda idx: _period_end(idx, pd.offsets.BQuarterEnd(0, startingMonth=3)),
+    'is_friday': lambda idx: idx.dayofweek == 4,
+    'is_monday': lambda idx: idx.dayofweek == 0,
+}
+
+
+def _quantile(q: float):
+    return lambda view: np.quantile(view, q, axis=1)
+
+
+# Reductions over a [rows, window] view
+STATISTICS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'mean': lambda view: view.mean(axis=1, dtype=np.float64),
+    'std': lambda view: view.std(axis=1, ddof=1, dtype=np.float64),
+    'min': lambda view: view.min(axis=1),
+    'max': lambda view: view.max(axis=1),
+    'median': lambda view: np.median(view, axis=1),
+    **{f'q{int(q * 100):02d}': _quantile(q) for q in (0.1, 0.25, 0.75, 0.9)},
+}
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    lags: Tuple[int, ...] = (1, 2, 3, 7)
+    windows: Tuple[int, ...] = (7, 30)
+    statistics: Tuple[str, ...] = ('mean', 'std')
+    calendar: Tuple[str, ...] = ('day_of_week', 'day_of_month', 'month', 'quarter',
+                                 'is_month_end', 'is_quarter_end', 'is_friday', 'is_monday')
+    include_current: bool = True    # rolling window ends at t (True) or t-1 (False)
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names in matrix order: calendar, lags, then rolling (statistic-major)"""
+        return (list(self.calendar)
+                + [f'lag_{lag}' for lag in self.lags]
+                + [f'rolling_{stat}_{window}' for stat in self.statistics for window in self.windows])
+
+    @property
+    def warmup(self) -> int:
+        """Leading rows with at least one NaN feature"""
+        shift = 1 if self.include_current else 0
+        return max([*self.lags, *(w - shift for w in self.windows), 0])
+
+
+DEFAULT_SPEC = FeatureSpec()
+CAUSAL_SPEC = FeatureSpec(include_current=False)
+
+
+class FeatureEngine:
+    """Builds the feature matrix for a FeatureSpec"""
+
+    def __init__(self, spec: FeatureSpec = DEFAULT_SPEC, dtype=np.float32):
+        unknown = [c for c in spec.calendar if c not in CALENDAR] + [s for s in spec.statistics if s not in STATISTICS]
+        if unknown:
+            raise ValueError(f"Unknown calendar columns / statistics: {unknown}")
+        self.spec = spec
+        self.dtype = dtype
+
+    @property
+    def columns(self) -> List[str]:
+        return self.spec.columns
+
+    def calendar(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """[len(index), len(spec.calendar)] calendar block"""
+        out = np.empty((len(index), len(self.spec.calendar)), dtype=self.dtype)
+        for j, name in enumerate(self.spec.calendar):
+            out[:, j] = CALENDAR[name](index)
+        return out
+
+    def transform(self, values: Sequence[float], index: pd.DatetimeIndex) -> Tuple[np.ndarray, List[str]]:
+        """(features [n, n_features], column names) for a series and its dates"""
+        x = np.ascontiguousarray(values, dtype=self.dtype)
+        n = len(x)
+        spec = self.spec
+        out = np.full((n, len(spec.columns)), np.nan, dtype=self.dtype)
+        n_calendar = len(spec.calendar)
+        out[:, :n_calendar] = self.calendar(pd.DatetimeIndex(index))
+
+        col = n_calendar
+        for lag in spec.lags:
+            if lag < n:
+                out[lag:, col] = x[:n - lag]
+            col += 1
+
+        n_windows = len(spec.windows)
+        shift = 0 if spec.include_current else 1
+        for w_pos, window in enumerate(spec.windows):
+            if window + shift > n:
+                continue
+            view = sliding_window_view(x[:n - shift], window)   # row i covers x[i : i + window]
+            for s_pos, stat in enumerate(spec.statistics):
+                out[window - 1 + shift:, col + s_pos * n_windows + w_pos] = STATISTICS[stat](view)
+        return out, spec.columns
+
+    def future(self, index: pd.DatetimeIndex, recent) -> Tuple[np.ndarray, List[str]]:
+        """
+        Feature rows for future dates whose lags are not observed yet.
+
+        Calendar columns come from index; every lag is the mean of recent and every rolling
+        statistic is that statistic over recent. recent is [window] or [scenarios, window];
+        the result is [horizon, n_features] or [scenarios, horizon, n_features].
+        """
+        recent = np.asarray(recent, dtype=self.dtype)
+        batch = np.atleast_2d(recent)
+        spec = self.spec
+        n_calendar, n_lags = len(spec.calendar), len(spec.lags)
+
+        # One placeholder row per scenario, broadcast over the horizon
+        placeholders = np.empty((len(batch), len(spec.columns) - n_calendar), dtype=self.dtype)
+        placeholders[:, :n_lags] = batch.mean(axis=1, dtype=np.float64)[:, None]
+        n_windows = len(spec.windows)
+        for s_pos, stat in enumerate(spec.statistics):
+            start = n_lags + s_pos * n_windows
+            placeholders[:, start:start + n_windows] = STATISTICS[stat](batch)[:, None]
+
+        out = np.empty((len(batch), len(index), len(spec.columns)), dtype=self.dtype)
+        out[:, :, :n_calendar] = self.calendar(pd.DatetimeIndex(index))
+        out[:, :, n_calendar:] = placeholders[:, None, :]
+        return (out[0] if recent.ndim == 1 else out), spec.columns
+
+    def frame(self, series: pd.Series) -> pd.DataFrame:
+        """transform() wrapped as a DataFrame on the series index"""
+        matrix, columns = self.transform(series.to_numpy(), series.index)
+        return pd.DataFrame(matrix, index=series.index, columns=columns, copy=False)
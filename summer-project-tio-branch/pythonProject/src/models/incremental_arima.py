@@ -0,0 +1,205 @@
+"""
+Incremental ARIMA - daily state update instead of a full refit
+- The selected order and fitted parameters are kept in <data_dir>/.models/arima_state.json
+  together with a checksum of the observations they were fitted on
+- The Kalman filter state predicted for the last seen observation is stored as well; when
+  the series only grew, that observation and the new days are filtered from the stored
+  state with the fixed parameters: O(new days) per update, no MLE and no pass over history
+- Between refits update() returns a FixedParameterForecast: forecast() plus aic / llf /
+  nobs over the full series; in-sample results (fittedvalues, resid, summary()) are only
+  available from a refit
+- The log-likelihood and drift statistics of the days already filtered are carried in the
+  state, so the checks below still cover every observation since the last fit
+- A full refit (parallel order search) is scheduled when:
+  * there is no usable state, or earlier observations were revised
+  * drift: the standardized one-step errors of the appended days are biased (|mean z|·√k)
+  * AIC check: AIC per observation degraded by more than aic_tolerance since the fit
+  * more than max_appended days were appended since the last fit
+"""
+
+import hashlib
+import json
+import time
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+
+from src.models.order_search import ArimaOrderSearch, OrderSearchResult
+
+STATE_VERSION = 2
+
+
+def _checksum(values: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
+
+
+@dataclass
+class ArimaUpdate:
+    """Outcome of IncrementalArima.update: results plus what was done and why"""
+    results: Any         # ARIMAResults after a refit, else a FixedParameterForecast
+    action: str          # 'refit' | 'append' | 'unchanged' | 'failed'
+    reason: str
+    appended: int = 0
+    seconds: float = 0.0
+    search: Optional[OrderSearchResult] = None   # set when a refit ran the order search
+
+
+class FixedParameterForecast:
+    """
+    Forecast-only view of an ARIMA updated with fixed parameters.
+
+    Only the last seen days were filtered, so in-sample attributes are not exposed;
+    aic and llf cover the whole series through the log-likelihood carried in the state.
+    """
+
+    def __init__(self, results, llf: float, nobs: int):
+        self._results = results
+        self.params = results.params
+        self.llf = llf
+        self.nobs = nobs
+        self.aic = 2 * len(results.params) - 2 * llf
+
+    def forecast(self, steps: int = 1):
+        return self._results.forecast(steps=steps)
+
+    def __getattr__(self, name):
+        raise AttributeError(f"{name} is not available between ARIMA refits (forecast only); "
+                             f"use force_refit=True for full in-sample results")
+
+
+class IncrementalArima:
+    """Keeps one ARIMA model current across runs (see module docstring)"""
+
+    def __init__(self, state_file: Path, search: Optional[ArimaOrderSearch] = None,
+                 max_appended: int = 21, aic_tolerance: float = 0.05, drift_z: float = 3.0):
+        self.state_file = Path(state_file)
+        self.search = search or ArimaOrderSearch()
+        self.max_appended = max_appended
+        self.aic_tolerance = aic_tolerance
+        self.drift_z = drift_z
+
+    # ---------- State ----------
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        if not self.state_file.exists():
+            return None
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get('version') == STATE_VERSION else None
+
+    def _save_state(self, state: Dict[str, Any]):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    @staticmethod
+    def _model(values: np.ndarray, state: Dict[str, Any]) -> ARIMA:
+        return ARIMA(values, order=tuple(state['order']), seasonal_order=tuple(state['seasonal_order']))
+
+    @staticmethod
+    def _anchor(results, index: int) -> Dict[str, Any]:
+        """Filter state predicted for observation index of results (what the next update starts from)"""
+        return {
+            'state': results.predicted_state[:, index].tolist(),
+            'state_cov': results.predicted_state_cov[:, :, index].tolist(),
+        }
+
+    # ---------- Update ----------
+    def update(self, series, force_refit: bool = False) -> ArimaUpdate:
+        """Bring the model up to date with series (full history, oldest first)"""
+        started = time.perf_counter()
+        y = np.asarray(series, dtype=float)
+        state = None if force_refit else self.load_state()
+        if state is None:
+            return self._refit(y, 'forced' if force_refit else 'no saved state', started)
+
+        n_fit, n_seen = state['n_fit'], state['n_seen']
+        if len(y) < n_seen or _checksum(y[:n_seen]) != state['checksum']:
+            return self._refit(y, 'history revised', started)
+
+        # Re-filter only the last seen observation and the new days, from the stored state
+        anchor_n = n_seen - 1
+        model = self._model(y[anchor_n:], state)
+        model.initialize_known(np.asarray(state['anchor']['state']), np.asarray(state['anchor']['state_cov']))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results = model.filter(np.asarray(state['params']))
+        new = len(y) - n_seen
+        llf_obs = results.filter_results.llf_obs
+        if new == 0:
+            model = FixedParameterForecast(results, state['llf'] + float(llf_obs.sum()), len(y))
+            return ArimaUpdate(model, 'unchanged', 'no new observations', 0, time.perf_counter() - started)
+
+        # Drift only counts observations after the fit (right after a refit the anchor is the last fitted day)
+        errors = results.filter_results.standardized_forecasts_error[0].copy()
+        errors[:max(0, n_fit - anchor_n)] = np.nan
+        counted = np.isfinite(errors)
+        errors[~counted] = 0.0
+        totals = {
+            'llf': state['llf'] + float(llf_obs.sum()),
+            'drift_sum': state['drift_sum'] + float(errors.sum()),
+            'drift_count': state['drift_count'] + int(counted.sum()),
+        }
+        reason = self._check(results, state, len(y) - n_fit, totals, len(y))
+        if reason is not None:
+            return self._refit(y, reason, started)
+
+        # The new last observation becomes the anchor; its own statistics are re-added next time
+        state.update(
+            n_seen=len(y), checksum=_checksum(y), anchor=self._anchor(results, len(y) - 1 - anchor_n),
+            llf=totals['llf'] - float(llf_obs[-1]),
+            drift_sum=totals['drift_sum'] - float(errors[-1]),
+            drift_count=totals['drift_count'] - int(counted[-1]),
+            updated_at=datetime.now().isoformat(),
+        )
+        self._save_state(state)
+        model = FixedParameterForecast(results, totals['llf'], len(y))
+        return ArimaUpdate(model, 'append', f"{new} new observation(s), fixed parameters",
+                           new, time.perf_counter() - started)
+
+    def _check(self, results, state: Dict[str, Any], appended: int,
+               totals: Dict[str, float], nobs: int) -> Optional[str]:
+        """Reason to refit, or None when the fixed-parameter model still fits"""
+        if appended > self.max_appended:
+            return f"{appended} observations since the last fit (max {self.max_appended})"
+        count = totals['drift_count']
+        if count and abs(totals['drift_sum'] / count) * np.sqrt(count) > self.drift_z:
+            return f"drift: mean standardized error {totals['drift_sum'] / count:+.2f} over {count} observations"
+        aic_per_obs = (2 * len(results.params) - 2 * totals['llf']) / nobs
+        if aic_per_obs - state['aic_per_obs'] > self.aic_tolerance:
+            return f"AIC per observation {state['aic_per_obs']:.3f} -> {aic_per_obs:.3f}"
+        return None
+
+    def _refit(self, y: np.ndarray, reason: str, started: float) -> ArimaUpdate:
+        result = self.search.search(y)
+        if result.best is None:
+            return ArimaUpdate(None, 'failed', f"{reason}; no candidate converged", 0,
+                               time.perf_counter() - started, result)
+        results = ArimaOrderSearch.refit(y, result.best)
+        # Anchor on the last observation: llf of everything before it, no appended days yet
+        self._save_state({
+            'version': STATE_VERSION,
+            'order': list(result.best['order']),
+            'seasonal_order': list(result.best['seasonal_order']),
+            'params': [float(p) for p in result.best['params']],
+            'n_fit': len(y),
+            'n_seen': len(y),
+            'checksum': _checksum(y),
+            'aic_per_obs': float(results.aic / results.nobs),
+            'anchor': self._anchor(results, len(y) - 1),
+            'llf': float(results.llf - results.filter_results.llf_obs[-1]),
+            'drift_sum': 0.0,
+            'drift_count': 0,
+            'fitted_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat(),
+        })
+        return ArimaUpdate(results, 'refit', reason, 0, time.perf_counter() - started, result)
@@ -0,0 +1,147 @@
+"""
+ARIMA Order Search - parallel (p,d,q)(P,D,Q,s) selection under a wall-clock budget
+- Candidates are fitted in a multiprocessing pool (one MLE fit per task); the series is
+  shipped to each worker once through the pool initializer
+- Cheapest orders are submitted first, so a short budget still covers the simple models
+- Fits that do not converge within maxiter or whose test forecast is not finite are
+  dropped; when the budget runs out the pool is terminated and pending fits are skipped
+- Only parameters travel back from the workers; the winner is re-filtered in the parent
+  with those parameters (no second optimization)
+- Series are fitted on their values: the business-day record_date index has no
+  frequency, and statsmodels refuses to forecast from such an index
+"""
+
+import itertools
+import multiprocessing
+import os
+import time
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+
+Order = Tuple[int, int, int]
+SeasonalOrder = Tuple[int, int, int, int]
+NO_SEASON: SeasonalOrder = (0, 0, 0, 0)
+
+_SERIES: Optional[np.ndarray] = None
+
+
+def order_grid(max_p: int = 3, max_d: int = 1, max_q: int = 3, seasonal_periods: Iterable[int] = (),
+               max_P: int = 1, max_D: int = 0, max_Q: int = 1) -> List[Tuple[Order, SeasonalOrder]]:
+    """Every (order, seasonal_order) combination, cheapest (fewest parameters) first"""
+    orders = list(itertools.product(range(max_p + 1), range(max_d + 1), range(max_q + 1)))
+    seasonal = [NO_SEASON] + [
+        (P, D, Q, s)
+        for s in seasonal_periods
+        for P, D, Q in itertools.product(range(max_P + 1), range(max_D + 1), range(max_Q + 1))
+        if (P, D, Q) != (0, 0, 0)
+    ]
+    grid = [(order, season) for season in seasonal for order in orders]
+    return sorted(grid, key=lambda c: (c[0][0] + c[0][2] + c[1][0] + c[1][2], c[0][1] + c[1][1]))
+
+
+def _init_worker(series: np.ndarray):
+    global _SERIES
+    _SERIES = series
+
+
+def _fit_candidate(order: Order, seasonal_order: SeasonalOrder, maxiter: int,
+                   series: Optional[np.ndarray] = None) -> Dict:
+    """Fit one candidate; returns its AIC and parameters, or why it was dropped"""
+    y = _SERIES if series is None else series
+    started = time.perf_counter()
+    result = {'order': order, 'seasonal_order': seasonal_order, 'aic': np.inf, 'params': None, 'status': 'ok'}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fitted = ARIMA(y, order=order, seasonal_order=seasonal_order).fit(method_kwargs={'maxiter': maxiter})
+            if not fitted.mle_retvals.get('converged', True):
+                result['status'] = 'not converged'
+            elif not np.isfinite(fitted.forecast(steps=5)).all() or not np.isfinite(fitted.aic):
+                result['status'] = 'non-finite forecast'
+            else:
+                result['aic'] = float(fitted.aic)
+                result['params'] = np.asarray(fitted.params)
+    except Exception as e:
+        result['status'] = f"failed: {e}"
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+@dataclass
+class OrderSearchResult:
+    best: Optional[Dict]
+    candidates: List[Dict] = field(default_factory=list)
+    skipped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def valid(self) -> List[Dict]:
+        """Converged candidates, best AIC first"""
+        return sorted((c for c in self.candidates if c['params'] is not None), key=lambda c: c['aic'])
+
+
+class ArimaOrderSearch:
+    """Select an ARIMA order by AIC over a grid, fitting candidates in parallel"""
+
+    def __init__(self, grid: Optional[Sequence[Tuple[Order, SeasonalOrder]]] = None,
+                 time_budget: float = 60.0, n_jobs: Optional[int] = None, maxiter: int = 50):
+        self.grid = list(grid) if grid is not None else order_grid()
+        self.time_budget = time_budget
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.maxiter = maxiter
+
+    def search(self, series) -> OrderSearchResult:
+        y = np.asarray(series, dtype=float)
+        started = time.monotonic()
+        deadline = started + self.time_budget
+        if self.n_jobs == 1 or len(self.grid) == 1:
+            candidates = self._search_serial(y, deadline)
+        else:
+            candidates = self._search_parallel(y, deadline)
+        valid = [c for c in candidates if c['params'] is not None]
+        best = min(valid, key=lambda c: c['aic']) if valid else None
+        return OrderSearchResult(best=best, candidates=candidates, skipped=len(self.grid) - len(candidates),
+                                 elapsed=time.monotonic() - started)
+
+    def _search_serial(self, y: np.ndarray, deadline: float) -> List[Dict]:
+        candidates = []
+        for order, seasonal_order in self.grid:
+            if time.monotonic() >= deadline:
+                break
+            candidates.append(_fit_candidate(order, seasonal_order, self.maxiter, series=y))
+        return candidates
+
+    def _search_parallel(self, y: np.ndarray, deadline: float) -> List[Dict]:
+        candidates = []
+        pool = multiprocessing.Pool(min(self.n_jobs, len(self.grid)), initializer=_init_worker, initargs=(y,))
+        try:
+            pending = [pool.apply_async(_fit_candidate, (order, seasonal_order, self.maxiter))
+                       for order, seasonal_order in self.grid]
+            while pending and time.monotonic() < deadline:
+                still_running = []
+                for task in pending:
+                    if task.ready():
+                        candidates.append(task.get())
+                    else:
+                        still_running.append(task)
+                pending = still_running
+                if pending:
+                    pending[0].wait(timeout=min(0.05, max(0.0, deadline - time.monotonic())))
+        finally:
+            # Budget exhausted (or done): stop in-flight fits instead of waiting for them
+            pool.terminate()
+            pool.join()
+        return candidates
+
+    @staticmethod
+    def refit(series, candidate: Dict):
+        """ARIMAResults for a searched candidate, filtered with its parameters (no optimization)"""
+        model = ARIMA(np.asarray(series, dtype=float), order=candidate['order'],
+                      seasonal_order=candidate['seasonal_order'])
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return model.filter(candidate['params'])
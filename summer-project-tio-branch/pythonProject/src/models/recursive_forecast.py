@@ -0,0 +1,79 @@
+"""
+Recursive Forecast - multi-step forecasts that feed each prediction back into the features
+- Features must be causal (FeatureSpec.include_current=False): the day being predicted
+  is not in any of its own rolling windows
+- Every path keeps its last max(lags, windows) values in a ring array [paths, L]; a step
+  reads lag_k at (pos - k) % L, gathers each rolling window with one fancy index and
+  overwrites the oldest slot with the new prediction
+- All paths (scenarios with their own history, or sample paths) are stacked into one
+  [paths, n_features] matrix, so each horizon step is a single model.predict call
+- Sample paths add a bootstrap draw from the model's residuals before the prediction is
+  fed back, which turns the point forecast into a distribution
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.models.feature_engine import STATISTICS, FeatureEngine
+
+
+class RecursiveForecaster:
+    """Roll a fitted regressor (trained on FeatureEngine columns) forward over a horizon"""
+
+    def __init__(self, model, engine: FeatureEngine, residuals: Optional[Sequence[float]] = None):
+        self.model = model
+        self.engine = engine
+        self.residuals = None if residuals is None else np.asarray(residuals, dtype=float)
+        spec = engine.spec
+        if spec.include_current:
+            raise ValueError("Recursive forecasting needs rolling windows that end before the "
+                             "predicted day (FeatureSpec(include_current=False))")
+        self.memory = max([*spec.lags, *spec.windows, 1])
+
+    def forecast(self, history, dates: pd.DatetimeIndex, n_paths: int = 1,
+                 random_state: Optional[int] = None) -> np.ndarray:
+        """
+        Predictions [paths, horizon] for dates following history.
+
+        history is [n] (shared by all n_paths) or [scenarios, n] (one path per scenario).
+        With n_paths > 1 and residuals, every path gets its own bootstrap noise.
+        """
+        history = np.asarray(history, dtype=self.engine.dtype)
+        if history.ndim == 1:
+            history = np.broadcast_to(history, (n_paths, len(history)))
+        if history.shape[1] < self.memory:
+            raise ValueError(f"Recursive forecast needs at least {self.memory} observations, got {history.shape[1]}")
+
+        spec = self.engine.spec
+        n_paths, memory = len(history), self.memory
+        dates = pd.DatetimeIndex(dates)
+        n_calendar, n_lags, n_windows = len(spec.calendar), len(spec.lags), len(spec.windows)
+        rng = np.random.default_rng(random_state)
+        noisy = self.residuals is not None and len(self.residuals) > 0 and n_paths > 1
+
+        ring = np.array(history[:, -memory:])          # oldest .. newest; next write at pos
+        pos = 0
+        calendar = self.engine.calendar(dates)
+        features = np.empty((n_paths, len(spec.columns)), dtype=self.engine.dtype)
+        columns = spec.columns
+        out = np.empty((n_paths, len(dates)))
+        lags = np.asarray(spec.lags)
+        offsets = [np.arange(-window, 0) for window in spec.windows]
+
+        for step in range(len(dates)):
+            features[:, :n_calendar] = calendar[step]
+            features[:, n_calendar:n_calendar + n_lags] = ring[:, (pos - lags) % memory]
+            for w_pos, offset in enumerate(offsets):
+                window = ring[:, (pos + offset) % memory]
+                for s_pos, stat in enumerate(spec.statistics):
+                    features[:, n_calendar + n_lags + s_pos * n_windows + w_pos] = STATISTICS[stat](window)
+
+            prediction = self.model.predict(pd.DataFrame(features, columns=columns, copy=False))
+            if noisy:
+                prediction = prediction + rng.choice(self.residuals, size=n_paths)
+            out[:, step] = prediction
+            ring[:, pos] = prediction
+            pos = (pos + 1) % memory
+        return out
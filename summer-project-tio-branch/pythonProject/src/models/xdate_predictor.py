@@ -17,6 +17,10 @@ from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.data.catalog import ARTIFACT, DataCatalog
+from src.data.flow_cube import TOTAL, FlowCube
+from src.data.warehouse import TreasuryWarehouse
+
 # Set English font to avoid display issues
 plt.rcParams['font.family'] = 'Arial'
 plt.rcParams['axes.unicode_minus'] = False
@@ -27,6 +31,8 @@ class XDatePredictor:
     
     def __init__(self, data_dir="./data/raw"):
         self.data_dir = Path(data_dir)
+        self.catalog = DataCatalog.for_data_dir(self.data_dir)
+        self.warehouse = TreasuryWarehouse.for_data_dir(self.data_dir)
         
         # Core fiscal data
         self.current_debt = None
@@ -38,6 +44,7 @@ class XDatePredictor:
         self.cash_flow_forecasts = None
         self.simulation_results = None
         self.x_date = None
+        self.flow_mix = None
         
         # Configuration parameters (based on CBO March 2025 latest report)
         self.config = {
@@ -46,49 +53,45 @@ class XDatePredictor:
             'min_operating_cash_usd': 50e9,  # $50 billion minimum operating cash
         }
     
+    def close(self):
+        """Close the catalog and warehouse connections"""
+        self.catalog.close()
+        self.warehouse.close()
+    
+    def _dataset_csv(self, data_name):
+        """Newest cataloged file of a dataset (None -> the default <data_name>.csv)"""
+        path = self.catalog.path_for(data_name, self.data_dir)
+        return str(path) if path is not None else None
+    
     def load_current_financial_status(self):
         """Load current fiscal status"""
         print("=== Loading Current Financial Status ===")
         
-        # 1. Load debt outstanding data
-        debt_file = self.data_dir / "debt_outstanding_2023-06-29_to_2025-06-28.csv"
-        debt_data = pd.read_csv(debt_file)
-        debt_data['record_date'] = pd.to_datetime(debt_data['record_date'])
-        debt_data = debt_data.sort_values('record_date')
+        # 1. Load debt outstanding data (warehouse, imported from Parquet / the cataloged CSV on first use)
+        warehouse = self.warehouse
+        if not warehouse.ensure_table(self.data_dir, 'debt_outstanding', csv_name=self._dataset_csv('debt_outstanding')):
+            raise FileNotFoundError(f"Dataset not found: debt_outstanding ({self.data_dir})")
         
         # Get latest debt outstanding (in USD)
-        latest_debt = debt_data.iloc[-1]
+        latest_debt = warehouse.latest('debt_outstanding', 'tot_pub_debt_out_amt')
         self.current_debt = latest_debt['tot_pub_debt_out_amt']
         
         print(f"Latest debt outstanding: ${self.current_debt:,.0f} USD (${self.current_debt/1e12:.2f} trillion)")
         
         # 2. Load cash balance data
-        cash_file = self.data_dir / "treasury_cash_balance_2023-06-29_to_2025-06-28.csv"
-        cash_data = pd.read_csv(cash_file)
-        cash_data['record_date'] = pd.to_datetime(cash_data['record_date'])
-        
-        # Process cash balance data (multiple records per day, take the last one)
-        cash_data_clean = cash_data.dropna(subset=['close_today_bal']).copy()
-        cash_data_clean['close_today_bal'] = pd.to_numeric(cash_data_clean['close_today_bal'], errors='coerce')
+        # Last non-null balance of the latest day (multiple records per day, take the last one)
+        latest_cash = None
+        if warehouse.ensure_table(self.data_dir, 'treasury_cash_balance',
+                                  csv_name=self._dataset_csv('treasury_cash_balance')):
+            latest_cash = warehouse.latest('treasury_cash_balance', 'close_today_bal')
         
-        # Clean NaN values again
-        cash_data_clean = cash_data_clean.dropna(subset=['close_today_bal'])
-        
-        if len(cash_data_clean) == 0:
+        if latest_cash is None:
             print("Warning: Cash balance data is empty, using default value")
             self.current_cash = 500e9  # Default $500 billion
         else:
-            # Group by date, take last balance of each day
-            daily_cash = cash_data_clean.groupby('record_date')['close_today_bal'].last().reset_index()
-            daily_cash = daily_cash.sort_values('record_date')
-            
-            if len(daily_cash) == 0:
-                print("Warning: Processed cash balance data is empty, using default value")
-                self.current_cash = 500e9  # Default $500 billion
-            else:
-                # Get latest cash balance (in millions USD, convert to USD)
-                latest_cash_millions = daily_cash.iloc[-1]['close_today_bal']
-                self.current_cash = latest_cash_millions * 1e6  # Convert to USD
+            # Get latest cash balance (in millions USD, convert to USD)
+            latest_cash_millions = latest_cash['close_today_bal']
+            self.current_cash = float(latest_cash_millions) * 1e6  # Convert to USD
         
         print(f"Latest cash balance: ${self.current_cash:,.0f} USD (${self.current_cash/1e9:.1f} billion)")
         
@@ -133,21 +136,22 @@ class XDatePredictor:
         """Load cash flow forecast data"""
         print("\n=== Loading Cash Flow Forecasts ===")
         
-        # Find latest cash flow forecast file
-        forecast_dir = Path("output/forecasts")
-        if not forecast_dir.exists():
-            raise FileNotFoundError("Cash flow forecast results directory not found")
-        
-        # Get latest forecast file
-        forecast_files = list(forecast_dir.glob("cash_flow_forecasts_v2_*.csv"))
-        if not forecast_files:
-            raise FileNotFoundError("Cash flow forecast files not found")
-        
-        latest_file = max(forecast_files, key=lambda x: x.stat().st_mtime)
-        print(f"Loading forecast file: {latest_file.name}")
-        
-        # Load forecast data
-        forecasts = pd.read_csv(latest_file, index_col=0, parse_dates=True)
+        # Latest forecast run from the warehouse, else the newest cataloged forecast CSV
+        # (older output/forecasts files are registered on first lookup)
+        run_id, forecasts = self.warehouse.latest_run('cash_flow_forecasts')
+        if run_id is not None:
+            print(f"Loading forecast run: {run_id}")
+            forecasts = forecasts.set_index(pd.to_datetime(forecasts.pop('date')))
+        else:
+            entry = self.catalog.latest('cash_flow_forecasts')
+            if entry is None:
+                raise FileNotFoundError("Cash flow forecast files not found")
+            
+            latest_file = entry.file
+            print(f"Loading forecast file: {latest_file.name} ({entry.start_date} to {entry.end_date})")
+            
+            # Load forecast data
+            forecasts = pd.read_csv(latest_file, index_col=0, parse_dates=True)
         
         # Convert units: from millions USD to USD
         forecasts_usd = forecasts * 1e6
@@ -347,8 +351,32 @@ class XDatePredictor:
             print(f"Earliest scenario ({earliest['scenario']}): {earliest['x_date'].strftime('%Y-%m-%d')}")
             print(f"Latest scenario ({latest['scenario']}): {latest['x_date'].strftime('%Y-%m-%d')}")
         
+        self.analyze_flow_mix()
+        
         return scenarios
     
+    def analyze_flow_mix(self, days=60):
+        """Average daily deposits/withdrawals per transaction group over the last `days` reported days (flow cube)"""
+        cube = FlowCube(self.data_dir, self.warehouse)
+        if not cube.exists or cube.n_dates == 0:
+            print("\nFlow cube not built yet, skipping historical flow mix")
+            return None
+        
+        # Holidays are dropped by frame(); amounts are in millions USD
+        deposits = cube.frame('deposits').tail(days)
+        withdrawals = cube.frame('withdrawals').tail(days)
+        mix = pd.DataFrame({'deposits': deposits.mean(), 'withdrawals': withdrawals.mean()}) * 1e6
+        mix['net'] = mix['deposits'] - mix['withdrawals']
+        self.flow_mix = mix
+        
+        print(f"\n=== Historical Flow Mix (last {len(deposits)} reported days) ===")
+        print(f"{TOTAL:30s}: {mix.loc[TOTAL, 'net']/1e9:+8.2f} billion USD/day")
+        drivers = mix.drop(index=TOTAL)['net']
+        for group, net in drivers.reindex(drivers.abs().sort_values(ascending=False).index).head(5).items():
+            print(f"{group:30s}: {net/1e9:+8.2f} billion USD/day")
+        
+        return mix
+    
     def visualize_simulation(self):
         """Visualize simulation results"""
         print("\n=== Generating X-Date Simulation Charts ===")
@@ -423,7 +451,11 @@ class XDatePredictor:
         # Save detailed simulation data
         csv_file = output_dir / f"xdate_simulation_{timestamp}.csv"
         self.simulation_results.to_csv(csv_file)
+        self.catalog.register_frame('xdate_simulation', csv_file, self.simulation_results, kind=ARTIFACT)
         print(f"Simulation data saved: {csv_file}")
+        self.warehouse.append_run(
+            'xdate_simulation', self.simulation_results.reset_index(), timestamp
+        )
         
         # Save prediction summary
         summary = {
@@ -444,11 +476,17 @@ class XDatePredictor:
                 'total_unconventional_used_usd': float(self.simulation_results['unconventional_used'].sum())
             }
         }
+        if self.flow_mix is not None:
+            summary['historical_flow_mix_usd_per_day'] = {
+                group: {name: float(value) for name, value in row.items()}
+                for group, row in self.flow_mix.iterrows()
+            }
         
         import json
         json_file = output_dir / f"xdate_prediction_summary_{timestamp}.json"
         with open(json_file, 'w', encoding='utf-8') as f:
             json.dump(summary, f, indent=2, ensure_ascii=False)
+        self.catalog.register('xdate_prediction_summary', json_file, kind=ARTIFACT)
         
         print(f"Prediction summary saved: {json_file}")
         
@@ -498,6 +536,8 @@ def main():
         print(f"❌ Error in prediction process: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        predictor.close()
 
 
 if __name__ == "__main__":
@@ -12,20 +12,31 @@ import seaborn as sns
 from datetime import datetime
 import matplotlib.dates as mdates
 
+from src.data.catalog import DataCatalog
+from src.data.warehouse import WAREHOUSE_FILE, TreasuryWarehouse
+
 # Set style
 sns.set_style("whitegrid")
 plt.rcParams['font.size'] = 10
 
-def load_latest_xdate_data():
+def load_latest_xdate_data(data_dir="./data/raw"):
     """Load latest X-DATE simulation data"""
-    output_dir = Path("output/forecasts")
-    
-    # Find latest xdate simulation file
-    xdate_files = list(output_dir.glob("xdate_simulation_*.csv"))
-    if not xdate_files:
+    # Latest simulation run stored by XDatePredictor.save_results
+    if (Path(data_dir) / WAREHOUSE_FILE).exists():
+        with TreasuryWarehouse.for_data_dir(data_dir) as warehouse:
+            run_id, df = warehouse.latest_run('xdate_simulation')
+        if run_id is not None:
+            print(f"Loading simulation run: {run_id}")
+            df['date'] = pd.to_datetime(df['date'])
+            return df, f"xdate_simulation_{run_id}"
+    
+    # Else the newest simulation file in the catalog (older output/forecasts files included)
+    with DataCatalog.for_data_dir(data_dir) as catalog:
+        entry = catalog.latest('xdate_simulation')
+    if entry is None:
         raise FileNotFoundError("No X-DATE simulation data files found")
     
-    latest_file = max(xdate_files, key=lambda x: x.stat().st_mtime)
+    latest_file = entry.file
     print(f"Loading data: {latest_file.name}")
     
     df = pd.read_csv(latest_file)
@@ -0,0 +1,51 @@
+"""
+Shared fixtures: a local replay server (src/data/replay_server.py) and collectors pointed at it
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.data.data_collector import EnhancedTreasuryCollector  # noqa: E402
+from src.data.replay_server import ReplayConfig, ReplayServer  # noqa: E402
+from replay_helpers import DEPOSITS, ENDPOINT  # noqa: E402
+
+
+@pytest.fixture
+def replay():
+    """Start a replay server serving DEPOSITS: replay(**ReplayConfig fields) -> ReplayServer"""
+    servers = []
+
+    def start(**config) -> ReplayServer:
+        config.setdefault('latency', 0.0)
+        server = ReplayServer({DEPOSITS: ENDPOINT}, ReplayConfig(**config)).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def make_collector(tmp_path):
+    """Collector for DEPOSITS only, writing to tmp_path/raw unless data_dir is given"""
+    collectors = []
+
+    def make(server: ReplayServer, data_dir=None, **kwargs) -> EnhancedTreasuryCollector:
+        kwargs.setdefault('max_requests_per_second', 0)
+        kwargs.setdefault('max_retries', 1)
+        collector = EnhancedTreasuryCollector(data_dir=str(data_dir or tmp_path / 'raw'),
+                                              base_url=server.base_url, **kwargs)
+        collector.client.backoff_base = 0.01
+        collector.detailed_endpoints = {DEPOSITS: ENDPOINT}
+        collectors.append(collector)
+        return collector
+
+    yield make
+    for collector in collectors:
+        collector.close()
+
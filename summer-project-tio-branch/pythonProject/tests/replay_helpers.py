@@ -0,0 +1,41 @@
+"""
+Helpers for driving the replay server from tests
+"""
+
+import pandas as pd
+
+from src.data.data_collector import EnhancedTreasuryCollector
+from src.data.replay_server import ReplayDataset, ReplayServer
+
+DEPOSITS = 'deposits_withdrawals_operating_cash'
+ENDPOINT = EnhancedTreasuryCollector.DETAILED_ENDPOINTS[DEPOSITS]
+WINDOW = ('2000-01-01', '2100-01-01')
+
+
+def grow(server: ReplayServer, days: int, rows_per_day: int):
+    """Append days business days after the last served record_date; returns rows added"""
+    dataset = server.datasets[ENDPOINT]
+    template = dataset.records[:rows_per_day]
+    start = dataset.dates[-1]
+    new_days = pd.bdate_range(start, periods=days + 1)[1:].strftime('%Y-%m-%d')
+    added = [dict(record, record_date=day) for day in new_days for record in template]
+    server.datasets[ENDPOINT] = ReplayDataset(dataset.records + added)
+    return len(added)
+
+
+def record_pages(server: ReplayServer, fail_pages=()):
+    """
+    Log every requested page[number] and return the log.
+
+    Pages in fail_pages answer 404; pass a set and clear() it to let them through again.
+    """
+    requested = []
+    build_page = server.build_page
+
+    def recording(endpoint, query):
+        page_number = int(query.get('page[number]', 1))
+        requested.append(page_number)
+        return None if page_number in fail_pages else build_page(endpoint, query)
+
+    server.build_page = recording
+    return requested
@@ -0,0 +1,74 @@
+"""
+Data catalog: one-time legacy import, relative paths
+"""
+
+import shutil
+
+import pandas as pd
+
+from src.data.catalog import DataCatalog
+
+
+def _write_csv(path, days):
+    pd.DataFrame({'record_date': pd.bdate_range('2025-01-01', periods=days).strftime('%Y-%m-%d'),
+                  'value': range(days)}).to_csv(path, index=False)
+
+
+def test_legacy_import_scans_the_data_dir_once(tmp_path):
+    _write_csv(tmp_path / 'debt_outstanding_2023-06-29_to_2025-06-28.csv', 5)
+    catalog = DataCatalog.for_data_dir(tmp_path)
+    assert catalog.latest('debt_outstanding', tmp_path).row_count == 5
+
+    # Later lookups of unknown names do not scan the directory again
+    _write_csv(tmp_path / 'operating_cash_balance_2023-06-29_to_2025-06-28.csv', 4)
+    assert catalog.latest('operating_cash_balance', tmp_path) is None
+    assert catalog.latest('operating_cash_balance', tmp_path) is None
+
+    assert len(catalog.import_legacy(tmp_path, force=True)) == 1
+    assert catalog.latest('operating_cash_balance', tmp_path).row_count == 4
+
+
+def test_entries_survive_a_moved_checkout(tmp_path):
+    data_dir = tmp_path / 'checkout' / 'data' / 'raw'
+    data_dir.mkdir(parents=True)
+    _write_csv(data_dir / 'daily_cash_flows.csv', 3)
+    catalog = DataCatalog.for_data_dir(data_dir)
+    catalog.register_frame('daily_cash_flows', data_dir / 'daily_cash_flows.csv',
+                           pd.read_csv(data_dir / 'daily_cash_flows.csv'))
+    catalog.close()
+
+    shutil.move(tmp_path / 'checkout', tmp_path / 'moved')
+    moved_dir = tmp_path / 'moved' / 'data' / 'raw'
+    entry = DataCatalog.for_data_dir(moved_dir).latest('daily_cash_flows')
+    assert entry is not None
+    assert entry.file == (moved_dir / 'daily_cash_flows.csv').resolve()
+    assert entry.verify()
+
+
+def test_fresh_checkout_loads_legacy_artifacts(tmp_path, monkeypatch):
+    from src.models.xdate_predictor import XDatePredictor
+    from src.visualization.xdate_visualization import load_latest_xdate_data
+
+    forecasts = tmp_path / 'output' / 'forecasts'
+    forecasts.mkdir(parents=True)
+    dates = pd.date_range('2025-07-01', periods=3).strftime('%Y-%m-%d')
+    for stamp, cash in (('20250710_182311', 2.0), ('20250701_193037', 1.0)):   # newest written first
+        pd.DataFrame({'date': dates, 'cash_balance': cash}).to_csv(forecasts / f'xdate_simulation_{stamp}.csv', index=False)
+        pd.DataFrame({'Ensemble': cash}, index=pd.Index(dates)).to_csv(forecasts / f'cash_flow_forecasts_v2_{stamp}.csv')
+    # A backtest output in the same directory is never taken for a live forecast
+    pd.DataFrame({'Ensemble': 9.0}, index=pd.Index(dates)).to_csv(forecasts / 'cash_flow_backtest_v2_20250801_000000.csv')
+    data_dir = tmp_path / 'data' / 'raw'
+    data_dir.mkdir(parents=True)
+    # Artifacts are found next to the data dir whatever the working directory is
+    elsewhere = tmp_path / 'elsewhere'
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    df, name = load_latest_xdate_data(data_dir)
+    assert name == 'xdate_simulation_20250710_182311'
+    assert (df['cash_balance'] == 2.0).all()
+
+    predictor = XDatePredictor(data_dir)
+    forecast = predictor.load_cash_flow_forecasts()
+    predictor.close()
+    assert list(forecast['Ensemble']) == [2.0e6] * 3
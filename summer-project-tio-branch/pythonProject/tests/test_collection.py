@@ -0,0 +1,98 @@
+"""
+Collector regression tests against the replay server: checkpoint resume, keyed upsert, merge on save,
+freshness probe
+"""
+
+import json
+
+import pandas as pd
+
+from replay_helpers import DEPOSITS, ENDPOINT, WINDOW, grow, record_pages
+from src.data.schemas import natural_key
+
+
+def _key_frame(df: pd.DataFrame) -> pd.DataFrame:
+    key = natural_key(df.columns, DEPOSITS)
+    return df.astype(str).sort_values(key).reset_index(drop=True)
+
+
+def test_resume_after_failure_mid_pull(replay, make_collector):
+    server = replay(synthetic_days=50, rows_per_day=20, max_page_size=100)   # 10 pages
+    failing = {4}
+    requested = record_pages(server, failing)
+
+    collector = make_collector(server, use_cache=False, concurrent_pagination=False)
+    assert collector.collect_detailed_cash_flows(*WINDOW) == {}
+    assert DEPOSITS in collector.collection_errors
+    assert collector.checkpoints.pending() == [DEPOSITS]
+    assert not (collector.data_dir / f"{DEPOSITS}.csv").exists()   # incomplete pulls are never saved
+
+    failing.clear()
+    requested.clear()
+    collector = make_collector(server, use_cache=False, concurrent_pagination=False)
+    df = collector.collect_detailed_cash_flows(*WINDOW, resume=True)[DEPOSITS]
+
+    assert sorted(requested) == list(range(4, 11))   # pages 1-3 came from the checkpoint
+    assert len(df) == 1000
+    assert df['record_date'].is_monotonic_increasing
+    assert collector.checkpoints.pending() == []
+
+
+def test_incremental_upsert_is_idempotent(replay, make_collector, tmp_path):
+    server = replay(synthetic_days=30, rows_per_day=20, max_page_size=200)
+    collector = make_collector(server, use_cache=False)
+    collector.collect_detailed_cash_flows(*WINDOW)
+    grow(server, days=5, rows_per_day=20)
+
+    # Overlapping pull: move the watermark back so the last ten stored days are fetched again
+    marks_file = collector.data_dir / '.watermarks.json'
+    served_days = sorted(set(server.datasets[ENDPOINT].dates))
+    marks_file.write_text(json.dumps({DEPOSITS: served_days[-16]}))
+
+    for _ in range(2):
+        collector = make_collector(server, use_cache=False)
+        collector.collect_detailed_cash_flows(*WINDOW, incremental=True)
+        saved = pd.read_csv(collector.data_dir / f"{DEPOSITS}.csv")
+        assert len(saved) == 700
+        assert collector.warehouse.coverage(DEPOSITS)[2] == 700
+
+    fresh = make_collector(server, data_dir=tmp_path / 'fresh', use_cache=False)
+    expected = fresh.collect_detailed_cash_flows(*WINDOW)[DEPOSITS]
+    expected.to_csv(tmp_path / 'expected.csv', index=False)
+    pd.testing.assert_frame_equal(_key_frame(saved), _key_frame(pd.read_csv(tmp_path / 'expected.csv')))
+
+
+def test_windowed_pull_merges_into_longer_history(replay, make_collector):
+    server = replay(synthetic_days=30, rows_per_day=20, max_page_size=200)
+    collector = make_collector(server, use_cache=False)
+    collector.collect_detailed_cash_flows(*WINDOW)
+
+    # An ordinary (non-incremental) run over a shorter window keeps the older days
+    served_days = sorted(set(server.datasets[ENDPOINT].dates))
+    window = (served_days[-10], WINDOW[1])
+    collector = make_collector(server, use_cache=False)
+    collector.collect_detailed_cash_flows(*window)
+    saved = pd.read_csv(collector.data_dir / f"{DEPOSITS}.csv")
+    assert len(saved) == 600
+    assert saved['record_date'].min() == served_days[0]
+    assert collector.warehouse.coverage(DEPOSITS)[2] == 600
+    assert len(collector.parquet_store.read(DEPOSITS)) == 600
+
+    # Only an explicit rebuild replaces the stored history with the window
+    collector = make_collector(server, use_cache=False)
+    collector.collect_detailed_cash_flows(*window, rebuild=True)
+    assert len(pd.read_csv(collector.data_dir / f"{DEPOSITS}.csv")) == 200
+    assert collector.warehouse.coverage(DEPOSITS)[2] == 200
+    assert len(collector.parquet_store.read(DEPOSITS)) == 200
+
+
+def test_freshness_probe(replay, make_collector):
+    server = replay(synthetic_days=20, rows_per_day=5)
+    collector = make_collector(server, use_cache=False)
+    assert collector.has_new_data()   # never collected
+    collector.collect_detailed_cash_flows(*WINDOW)
+    assert not collector.has_new_data()
+
+    # A failed probe (latest None) counts as new instead of suppressing the run
+    collector.probe_latest_record_date = lambda endpoint: None
+    assert collector.has_new_data()
@@ -0,0 +1,47 @@
+"""
+daily_cash_flows refresh: a date-range refresh on a fresh warehouse bootstraps the raw table;
+a table closes the warehouse it opened but not a shared one
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.data.create_daily_cash_flows import create_daily_cash_flows
+from src.data.daily_flows import DAILY_FLOWS, SOURCE, TGA_ACCOUNT, DailyFlowTable, load_daily_flows
+from src.data.warehouse import TreasuryWarehouse
+
+
+def _write_deposits(data_dir, days):
+    dates = pd.bdate_range('2025-01-01', periods=days).strftime('%Y-%m-%d')
+    rows = [{'record_date': day, 'account_type': TGA_ACCOUNT, 'transaction_type': kind,
+             'transaction_catg': 'Taxes', 'transaction_today_amt': amount, 'src_line_nbr': line}
+            for day in dates
+            for line, (kind, amount) in enumerate((('Deposits', 100), ('Withdrawals', 40)), start=1)]
+    pd.DataFrame(rows).to_csv(data_dir / f"{SOURCE}.csv", index=False)
+
+
+def test_range_refresh_on_fresh_warehouse(tmp_path):
+    _write_deposits(tmp_path, 10)
+    assert create_daily_cash_flows('2025-01-06', '2025-01-10', data_dir=tmp_path)
+
+    daily = DailyFlowTable(tmp_path).totals('2025-01-06', '2025-01-10')
+    assert len(daily) == 5
+    assert (daily['Deposits'] == 100).all()
+    assert (daily['Withdrawals'] == 40).all()
+
+
+def test_table_closes_only_its_own_warehouse(tmp_path):
+    _write_deposits(tmp_path, 5)
+    with TreasuryWarehouse.for_data_dir(tmp_path) as shared:
+        with DailyFlowTable(tmp_path, shared) as table:
+            assert table.ensure()
+        assert shared.has(DAILY_FLOWS)
+
+    with DailyFlowTable(tmp_path) as table:
+        assert table.ensure()
+    with pytest.raises(sqlite3.ProgrammingError):
+        table.warehouse.has(DAILY_FLOWS)
+
+    assert len(load_daily_flows(tmp_path)) == 5
@@ -0,0 +1,66 @@
+"""
+FeatureEngine parity: CAUSAL_SPEC and DEFAULT_SPEC against the original pandas shift/rolling features
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.models.feature_engine import CAUSAL_SPEC, DEFAULT_SPEC, FeatureEngine
+
+
+def _series(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2023-01-02', periods=n)
+    return pd.Series(rng.normal(0, 1000, n).round(1), index=index, name='net_flow')
+
+
+def _baseline(series, include_current):
+    """The forecaster's original pandas feature code; the causal variant shifts rolling stats by one day"""
+    df = pd.DataFrame(index=series.index)
+    df['day_of_week'] = series.index.dayofweek
+    df['day_of_month'] = series.index.day
+    df['month'] = series.index.month
+    df['quarter'] = series.index.quarter
+    # Last business day of the month / quarter
+    df['is_month_end'] = (series.index + pd.offsets.BMonthEnd(0) == series.index).astype(int)
+    df['is_quarter_end'] = (series.index + pd.offsets.BQuarterEnd(0, startingMonth=3) == series.index).astype(int)
+    df['is_friday'] = (series.index.dayofweek == 4).astype(int)
+    df['is_monday'] = (series.index.dayofweek == 0).astype(int)
+    for lag in [1, 2, 3, 7]:
+        df[f'lag_{lag}'] = series.shift(lag)
+    shift = 0 if include_current else 1
+    for window in [7, 30]:
+        df[f'rolling_mean_{window}'] = series.rolling(window).mean().shift(shift)
+    for window in [7, 30]:
+        df[f'rolling_std_{window}'] = series.rolling(window).std().shift(shift)
+    return df
+
+
+def _check(spec):
+    series = _series()
+    features = FeatureEngine(spec).frame(series)
+    expected = _baseline(series, spec.include_current)
+
+    assert list(features.columns) == list(expected.columns)
+    for column in expected.columns:
+        got, want = features[column].to_numpy(np.float64), expected[column].to_numpy(np.float64)
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(want), err_msg=column)
+        np.testing.assert_allclose(got, want, rtol=1e-4, atol=1e-3, equal_nan=True, err_msg=column)
+
+    # Warm-up: the leading rows with a NaN feature, then none
+    has_nan = features.isna().any(axis=1).to_numpy()
+    assert has_nan[:spec.warmup].all() and not has_nan[spec.warmup:].any()
+    return features
+
+
+def test_causal_spec_matches_pandas():
+    features = _check(CAUSAL_SPEC)
+    assert CAUSAL_SPEC.warmup == 30
+    # rolling_*_30 first appears on row 30, covering rows 0..29 only
+    assert np.isnan(features['rolling_mean_30'].iloc[29])
+    assert not np.isnan(features['rolling_mean_30'].iloc[30])
+
+
+def test_default_spec_matches_pandas():
+    assert DEFAULT_SPEC.warmup == 29
+    _check(DEFAULT_SPEC)
@@ -0,0 +1,139 @@
+"""
+Flow cube: business-day row mapping, left shift / growth of the date axis, TOTAL and
+holiday handling checked against a pandas groupby, and the X-Date flow mix reader
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.categorization import TransactionCategorizer
+from src.data.daily_flows import TGA_ACCOUNT
+from src.data.flow_cube import GROWTH_ROWS, TOTAL, FlowCube
+from src.models.xdate_predictor import XDatePredictor
+
+CATEGORIZER = TransactionCategorizer(
+    {'Taxes - Individual': 'Taxes', 'Social Security Benefits': 'Social Security', 'Interest': 'Interest'},
+    excluded_categories=['Sub-Total Deposits'],
+)
+CATEGORIES = ['Taxes - Individual', 'Social Security Benefits', 'Interest', 'Unmapped Item', 'Sub-Total Deposits']
+
+
+def _flows(dates, seed=0, holidays=()):
+    """TGA and non-TGA deposit/withdrawal rows on every date except the holidays"""
+    rng = np.random.default_rng(seed)
+    rows = [{'record_date': day.strftime('%Y-%m-%d'), 'account_type': account, 'transaction_type': kind,
+             'transaction_catg': catg, 'transaction_today_amt': float(rng.integers(1, 1000))}
+            for day in pd.DatetimeIndex(dates) if day not in pd.DatetimeIndex(holidays)
+            for account in (TGA_ACCOUNT, 'Federal Reserve Account')
+            for kind in ('Deposits', 'Withdrawals')
+            for catg in CATEGORIES]
+    return pd.DataFrame(rows)
+
+
+def _expected(df, direction):
+    """Categorized TGA totals per day and group via groupby, plus the TOTAL column"""
+    tga = CATEGORIZER.categorize(df, row_mask=(df['account_type'] == TGA_ACCOUNT).to_numpy())
+    tga = tga[tga['transaction_type'] == direction]
+    table = tga.groupby([pd.to_datetime(tga['record_date']), 'transaction_group'],
+                        observed=False)['transaction_today_amt'].sum().unstack()
+    table[TOTAL] = table.sum(axis=1)
+    return table
+
+
+def test_business_day_row_mapping(tmp_path):
+    cube = FlowCube(tmp_path)
+    assert cube.apply(_flows(pd.bdate_range('2024-01-05', '2024-01-12')), CATEGORIZER) == 6
+
+    assert cube.origin == np.datetime64('2024-01-05')
+    assert cube.n_dates == 6
+    assert cube.date_index('2024-01-05') == 0
+    assert cube.date_index('2024-01-08') == 1
+    # Weekend dates map to the following Monday's row
+    assert cube.date_index('2024-01-06') == cube.date_index('2024-01-07') == 1
+    assert cube.date_index('2024-01-12') == 5
+    pd.testing.assert_index_equal(cube.dates, pd.bdate_range('2024-01-05', '2024-01-12'))
+    assert cube.array('2024-01-09', '2024-01-10').shape[0] == 2
+
+
+def test_cover_shifts_left_and_grows(tmp_path):
+    cube = FlowCube(tmp_path)
+    later = _flows(pd.bdate_range('2024-03-01', '2024-03-15'), seed=1)
+    cube.apply(later, CATEGORIZER)
+    assert cube.index['capacity'] == GROWTH_ROWS
+
+    # An earlier window moves the origin left and keeps the existing rows
+    earlier = _flows(pd.bdate_range('2024-02-01', '2024-02-09'), seed=2)
+    cube.apply(earlier, CATEGORIZER)
+    assert cube.origin == np.datetime64('2024-02-01')
+    assert cube.n_dates == len(pd.bdate_range('2024-02-01', '2024-03-15'))
+    deposits = cube.frame('deposits')
+    pd.testing.assert_frame_equal(deposits.loc['2024-03-01':], _expected(later, 'Deposits'),
+                                  check_names=False, check_freq=False, check_column_type=False)
+    pd.testing.assert_frame_equal(deposits.loc[:'2024-02-09'], _expected(earlier, 'Deposits'),
+                                  check_names=False, check_freq=False, check_column_type=False)
+
+    # A window past the capacity grows the file by whole GROWTH_ROWS steps
+    far = _flows(pd.bdate_range('2025-06-02', '2025-06-06'), seed=3)
+    cube.apply(far, CATEGORIZER)
+    assert cube.n_dates == len(pd.bdate_range('2024-02-01', '2025-06-06'))
+    assert cube.n_dates > GROWTH_ROWS
+    assert cube.index['capacity'] % GROWTH_ROWS == 0 and cube.index['capacity'] >= cube.n_dates
+    withdrawals = cube.frame('withdrawals')
+    assert len(withdrawals) == 7 + 11 + 5
+    pd.testing.assert_frame_equal(withdrawals.loc['2024-03-01':'2024-03-15'], _expected(later, 'Withdrawals'),
+                                  check_names=False, check_freq=False, check_column_type=False)
+    pd.testing.assert_frame_equal(withdrawals.loc['2025-06-02':], _expected(far, 'Withdrawals'),
+                                  check_names=False, check_freq=False, check_column_type=False)
+
+
+def test_total_and_holidays_match_groupby(tmp_path):
+    cube = FlowCube(tmp_path)
+    holiday = pd.Timestamp('2024-01-15')  # MLK day: a weekday without a DTS
+    df = _flows(pd.bdate_range('2024-01-02', '2024-01-31'), seed=4, holidays=[holiday])
+    assert cube.apply(df, CATEGORIZER) == len(pd.bdate_range('2024-01-02', '2024-01-31')) - 1
+
+    assert list(cube.groups) == list(CATEGORIZER.groups) + [TOTAL]
+    for direction, label in (('deposits', 'Deposits'), ('withdrawals', 'Withdrawals')):
+        pd.testing.assert_frame_equal(cube.frame(direction), _expected(df, label),
+                                      check_names=False, check_freq=False, check_column_type=False)
+    net = _expected(df, 'Deposits') - _expected(df, 'Withdrawals')
+    np.testing.assert_allclose(cube.net(TOTAL)[cube.reported()], net[TOTAL].to_numpy())
+    np.testing.assert_allclose(cube.array()[:, -1], cube.array()[:, :-1].sum(axis=1))
+
+    # The holiday keeps a zero row flagged as not reported
+    row = cube.date_index(holiday)
+    assert not cube.reported()[row]
+    assert (cube.array()[row] == 0).all()
+    everything = cube.frame(reported_only=False)
+    assert holiday in everything.index and holiday not in cube.frame().index
+
+    # Re-applying a window replaces its rows instead of adding to them
+    cube.apply(df, CATEGORIZER, '2024-01-02', '2024-01-31')
+    pd.testing.assert_frame_equal(cube.frame('deposits'), _expected(df, 'Deposits'),
+                                  check_names=False, check_freq=False, check_column_type=False)
+
+
+def test_xdate_flow_mix_reads_cube(tmp_path):
+    df = _flows(pd.bdate_range('2024-01-02', '2024-01-31'), seed=5)
+    FlowCube(tmp_path).apply(df, CATEGORIZER)
+
+    predictor = XDatePredictor(tmp_path)
+    try:
+        mix = predictor.analyze_flow_mix(days=10)
+    finally:
+        predictor.close()
+
+    recent = slice('2024-01-18', '2024-01-31')
+    deposits = _expected(df, 'Deposits').loc[recent].mean() * 1e6
+    withdrawals = _expected(df, 'Withdrawals').loc[recent].mean() * 1e6
+    np.testing.assert_allclose(mix['deposits'], deposits.to_numpy())
+    np.testing.assert_allclose(mix['net'], (deposits - withdrawals).to_numpy())
+    assert predictor.flow_mix is mix
+
+
+def test_xdate_flow_mix_without_cube(tmp_path):
+    predictor = XDatePredictor(tmp_path)
+    try:
+        assert predictor.analyze_flow_mix() is None
+    finally:
+        predictor.close()
@@ -0,0 +1,34 @@
+"""
+Response cache regression tests against the replay server
+"""
+
+from replay_helpers import ENDPOINT, grow, record_pages
+
+OPEN_WINDOW = {'filter': 'record_date:gte:2025-01-01,record_date:lte:2100-01-01',
+               'sort': 'record_date', 'page[size]': 100}
+CLOSED_WINDOW = {'filter': 'record_date:gte:2025-01-01,record_date:lte:2025-06-30',
+                 'sort': 'record_date', 'page[size]': 100}
+
+
+def test_open_window_sees_pages_added_after_caching(replay, make_collector):
+    server = replay(synthetic_days=79, rows_per_day=10)   # 790 rows from 2025-01-01: 8 pages
+    collector = make_collector(server, cache_ttl_seconds=0)
+    assert len(collector._make_paginated_request(ENDPOINT, OPEN_WINDOW)) == 790
+
+    grow(server, days=21, rows_per_day=10)
+    assert len(collector._make_paginated_request(ENDPOINT, OPEN_WINDOW)) == 1000
+    uncached = make_collector(server, data_dir=collector.data_dir / 'uncached', use_cache=False)
+    assert len(uncached._make_paginated_request(ENDPOINT, OPEN_WINDOW)) == 1000
+
+
+def test_closed_historical_window_is_served_from_cache(replay, make_collector):
+    server = replay(synthetic_days=79, rows_per_day=10)
+    collector = make_collector(server, cache_ttl_seconds=0)
+    first = collector._make_paginated_request(ENDPOINT, CLOSED_WINDOW)
+
+    requested = record_pages(server)
+    collector.response_cache.reset_stats()
+    again = collector._make_paginated_request(ENDPOINT, CLOSED_WINDOW)
+    assert requested == []
+    assert collector.response_cache.stats()['hits'] == 8
+    assert again.equals(first)
@@ -0,0 +1,39 @@
+"""
+Incremental ARIMA: appends filter only the new days and match a full fixed-parameter filter
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+
+from src.models.incremental_arima import IncrementalArima
+from src.models.order_search import ArimaOrderSearch, order_grid
+
+
+def test_append_matches_full_filter_without_refiltering_history(tmp_path, monkeypatch):
+    y = np.cumsum(np.random.default_rng(0).normal(size=560))
+    search = ArimaOrderSearch(order_grid(max_p=1, max_d=1, max_q=1), time_budget=30, n_jobs=1)
+    arima = IncrementalArima(tmp_path / 'arima_state.json', search, max_appended=100)
+    assert arima.update(y[:500]).action == 'refit'
+
+    filtered = []
+    filter_ = ARIMA.filter
+    monkeypatch.setattr(ARIMA, 'filter', lambda self, *a, **k: filtered.append(self.nobs) or filter_(self, *a, **k))
+    for n in (503, 520, 560):
+        update = arima.update(y[:n])
+        assert update.action == 'append'
+    assert filtered == [4, 18, 41]   # last seen day + new days, never the history
+    monkeypatch.undo()
+
+    state = arima.load_state()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        full = ARIMA(y, order=tuple(state['order']), seasonal_order=tuple(state['seasonal_order'])) \
+            .filter(np.asarray(state['params']))
+    np.testing.assert_allclose(update.results.forecast(5), full.forecast(5))
+    assert np.isclose(update.results.aic, full.aic)   # full-series AIC, not the short re-filtered window
+    with pytest.raises(AttributeError, match='forecast only'):
+        update.results.fittedvalues
+    assert np.isclose(state['llf'], full.llf - full.filter_results.llf_obs[-1])
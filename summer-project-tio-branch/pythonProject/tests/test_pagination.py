@@ -0,0 +1,59 @@
+"""
+Concurrent page fetching in _make_paginated_request: page order, no duplicates, no partial frames
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from replay_helpers import DEPOSITS, ENDPOINT, record_pages
+from src.data.schemas import natural_key
+from src.data.treasury_client import IncompleteDownloadError
+
+PARAMS = {'filter': 'record_date:gte:2000-01-01,record_date:lte:2100-01-01',
+          'sort': 'record_date', 'page[size]': 100}
+
+
+def _finish_out_of_order(server):
+    """Delay early pages so they complete after later ones; returns the completion log"""
+    completed, lock = [], threading.Lock()
+    build_page = server.build_page
+
+    def slow(endpoint, query):
+        page_number = int(query.get('page[number]', 1))
+        if page_number > 1:   # page 1 is fetched alone to read meta.total-pages
+            time.sleep(0.05 * (10 - page_number))
+        page = build_page(endpoint, query)
+        with lock:
+            completed.append(page_number)
+        return page
+
+    server.build_page = slow
+    return completed
+
+
+def test_concurrent_pages_come_back_in_page_order(replay, make_collector):
+    server = replay(synthetic_days=50, rows_per_day=20)   # 1000 rows: 10 pages
+    sequential = make_collector(server, use_cache=False)
+    expected = sequential._make_paginated_request(ENDPOINT, PARAMS, concurrent=False, label=DEPOSITS)
+
+    completed = _finish_out_of_order(server)
+    collector = make_collector(server, use_cache=False, max_workers=4)
+    df = collector._make_paginated_request(ENDPOINT, PARAMS, concurrent=True, label=DEPOSITS)
+
+    assert completed != sorted(completed)   # pages really finished out of order
+    assert sorted(completed) == list(range(1, 11))
+    assert len(df) == 1000
+    assert not df.duplicated(subset=natural_key(df.columns, DEPOSITS)).any()
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_failed_page_raises_instead_of_returning_partial_frame(replay, make_collector):
+    server = replay(synthetic_days=50, rows_per_day=20)
+    record_pages(server, fail_pages={6})
+    collector = make_collector(server, use_cache=False, max_workers=4)
+
+    with pytest.raises(IncompleteDownloadError, match='page'):
+        collector._make_paginated_request(ENDPOINT, PARAMS, concurrent=True, label=DEPOSITS)
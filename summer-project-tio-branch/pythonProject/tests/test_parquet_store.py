@@ -0,0 +1,53 @@
+"""
+Parquet store regression tests: a mid-month write keeps the earlier days of that month
+"""
+
+import pandas as pd
+
+from src.data.parquet_store import ParquetStore
+
+DATA_NAME = 'operating_cash_balance'
+
+
+def _business_days(start: str, end: str) -> pd.DataFrame:
+    dates = pd.bdate_range(start, end)
+    return pd.DataFrame({
+        'record_date': dates,
+        'account_type': 'Treasury General Account (TGA) Closing Balance',
+        'close_today_bal': range(len(dates)),
+        'src_line_nbr': 1,
+    })
+
+
+def test_write_starting_mid_month_keeps_earlier_days(tmp_path):
+    store = ParquetStore(tmp_path)
+    history = _business_days('2024-01-01', '2024-02-29')
+    assert len(history) == 44
+    store.write(DATA_NAME, history)
+    store.write(DATA_NAME, history[history['record_date'] >= '2024-01-16'])
+
+    df = store.read(DATA_NAME)
+    assert len(df) == len(history)
+    assert df['record_date'].min() == pd.Timestamp('2024-01-01')
+    assert df['record_date'].is_unique
+
+
+def test_stream_commit_starting_mid_month_keeps_earlier_days(tmp_path):
+    store = ParquetStore(tmp_path)
+    history = _business_days('2024-01-01', '2024-02-29')
+    store.write(DATA_NAME, history)
+
+    stream = store.open_stream(DATA_NAME)
+    tail = history[history['record_date'] >= '2024-01-16'].copy()
+    tail['close_today_bal'] += 1000
+    for seq, start in enumerate(range(0, len(tail), 10)):
+        stream.write_batch(tail.iloc[start:start + 10], seq)
+    stream.commit()
+
+    df = store.read(DATA_NAME)
+    assert len(df) == len(history)
+    assert df['record_date'].min() == pd.Timestamp('2024-01-01')
+    assert df['record_date'].is_unique
+    refreshed = df[df['record_date'] >= '2024-01-16']
+    assert (refreshed['close_today_bal'] >= 1000).all()
+    assert (df[df['record_date'] < '2024-01-16']['close_today_bal'] < 1000).all()
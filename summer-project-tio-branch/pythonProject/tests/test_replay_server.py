@@ -0,0 +1,24 @@
+"""
+Replay server data used by the collector benchmarks and tests
+"""
+
+from replay_helpers import DEPOSITS, WINDOW
+from src.data.daily_flows import DailyFlowTable
+from src.data.replay_server import SYNTHETIC_LABELS, ReplayConfig, ReplayDataset
+
+
+def test_synthetic_labels_cover_every_combination():
+    records = ReplayDataset.synthetic(DEPOSITS, ReplayConfig(synthetic_days=1, rows_per_day=8)).records
+    pairs = {(r['account_type'], r['transaction_type']) for r in records}
+    assert len(pairs) == len(SYNTHETIC_LABELS['account_type']) * len(SYNTHETIC_LABELS['transaction_type'])
+
+
+def test_synthetic_replay_has_tga_withdrawals(replay, make_collector):
+    server = replay(synthetic_days=10, rows_per_day=8)
+    collector = make_collector(server, use_cache=False)
+    collector.collect_detailed_cash_flows(*WINDOW)
+    assert collector.update_daily_cash_flows()
+
+    totals = DailyFlowTable(collector.data_dir, collector.warehouse).totals()
+    assert (totals['Deposits'] > 0).all()
+    assert (totals['Withdrawals'] > 0).all()